@@ -5,6 +5,7 @@ from celery import Celery
 import redis
 from .routes import register_blueprints
 from .utils.logger import setup_logging
+from .utils.migrations import migrate
 from .socketio_setup import socketio
 from ..config import Config  # Changed from 'from config' to 'from ..config'
 from celery.signals import worker_process_init
@@ -16,6 +17,13 @@ def init_flask_context(**kwargs):
 
 redis_client = redis.Redis(host='redis', port=6379, db=0)
 celery = Celery('app', broker='redis://redis:6379/0', include=['pve.app.vpl.tasks'])
+celery.conf.beat_schedule = {
+    # shared template backtests (vpl/templates.py); a no-op when they are current
+    'precompute-template-results': {
+        'task': 'pve.app.vpl.tasks.precompute_template_results',
+        'schedule': 6 * 3600,
+    },
+}
 include=['pve.app.vpl.tasks']
 
 
@@ -24,6 +32,7 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     CORS(app)
     setup_logging(app)
+    migrate(app.config)                 # columns db_init_query.SQL added later
     register_blueprints(app)
     socketio.init_app(app)
     celery.conf.update(app.config)
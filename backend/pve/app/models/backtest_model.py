@@ -5,9 +5,11 @@ class BacktestResult:
     @staticmethod
     def save(user_id, graph_name, backtest_data, orders,
              precision, min_move, symbol, timeframe,
-             start_date, end_date, graph):
+             start_date, end_date, graph, profile=None, result_key=None):
         """
-        Persist a back-test; **graph** is the raw Blockly / VPL json string.
+        Persist a back-test; **graph** is the raw Blockly / VPL json string,
+        **profile** the per-node timings of the run when it was profiled,
+        **result_key** its vpl.resultcache key when it is cacheable.
         """
         conn = get_db_connection()
         cur = conn.cursor()
@@ -16,9 +18,9 @@ class BacktestResult:
             INSERT INTO backtest_results (
               user_id, graph_name, backtest_data, orders,
               precision, min_move, symbol, timeframe,
-              start_date, end_date, graph,
+              start_date, end_date, graph, profile, result_key,
               created_at, updated_at
-            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,
+            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,
                       CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
             RETURNING id
             """,
@@ -29,6 +31,8 @@ class BacktestResult:
                 precision, min_move, symbol, timeframe,
                 start_date, end_date,
                 json.dumps(graph) if not isinstance(graph, str) else graph,
+                json.dumps(profile) if profile is not None else None,
+                result_key,
             ),
         )
         new_id = cur.fetchone()[0]
@@ -48,7 +52,8 @@ class BacktestResult:
                    precision,  min_move, symbol,
                    timeframe,  start_date, end_date,
                    analyzer_result_id,
-                   COALESCE(graph, 'null')  -- ← guarantees a JSON-parsable value
+                   COALESCE(graph, 'null'),  -- ← guarantees a JSON-parsable value
+                   profile
               FROM backtest_results
              WHERE id = %s
             """,
@@ -60,7 +65,7 @@ class BacktestResult:
             return None
 
         (graph_name, bt_json, ord_json, prec, mm, sym, tf,
-         sd, ed, res_id, graph_val) = row
+         sd, ed, res_id, graph_val, profile) = row
 
         # ---------- safe conversions ----------
         bt_data = bt_json if isinstance(bt_json, list) else json.loads(bt_json)
@@ -84,8 +89,85 @@ class BacktestResult:
             "end_date"          : ed,
             "analyzer_result_id": res_id,
             "graph"             : graph_obj,   # ← may be None
+            "profile"           : profile if not isinstance(profile, str) else json.loads(profile),
         }
 
+    @staticmethod
+    def load_by_result_key(result_key):
+        """
+        The update_chart payload of the newest back-test with this result
+        key (whoever ran it), or None.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT backtest_data, orders, precision, min_move
+              FROM backtest_results
+             WHERE result_key = %s
+             ORDER BY created_at DESC LIMIT 1
+            """,
+            (result_key,),
+        )
+        row = cur.fetchone()
+        cur.close(); conn.close()
+        if not row:
+            return None
+
+        bt_json, ord_json, prec, mm = row
+        return {
+            "data"     : bt_json if isinstance(bt_json, list) else json.loads(bt_json),
+            "orders"   : ord_json if isinstance(ord_json, (list, dict)) else json.loads(ord_json),
+            "precision": int(prec) if prec is not None else None,
+            "min_move" : float(mm) if mm is not None else None,
+        }
+
+    @staticmethod
+    def find_by_result_key(user_id, graph_name, result_key):
+        """Id of this user's back-test of the graph with this result key, or None."""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id FROM backtest_results WHERE user_id = %s AND graph_name = %s AND result_key = %s LIMIT 1",
+            (user_id, graph_name, result_key),
+        )
+        row = cur.fetchone()
+        cur.close(); conn.close()
+        return row[0] if row else None
+
+    @staticmethod
+    def copy_by_result_key(result_key, user_id, graph_name):
+        """
+        Give **user_id** a copy of the newest back-test with this result key
+        under **graph_name**, copied inside the database. Returns the new id,
+        or None when there is no such back-test.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO backtest_results (
+              user_id, graph_name, backtest_data, orders,
+              precision, min_move, symbol, timeframe,
+              start_date, end_date, graph, result_key,
+              created_at, updated_at
+            )
+            SELECT %s, %s, backtest_data, orders,
+                   precision, min_move, symbol, timeframe,
+                   start_date, end_date, graph, result_key,
+                   CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+              FROM backtest_results
+             WHERE result_key = %s
+             ORDER BY created_at DESC LIMIT 1
+            RETURNING id
+            """,
+            (user_id, graph_name, result_key),
+        )
+        row = cur.fetchone()
+        conn.commit()
+        cur.close(); conn.close()
+        return row[0] if row else None
+
     @staticmethod
     def get_all_by_user(user_id, limit=10):
         conn = get_db_connection()
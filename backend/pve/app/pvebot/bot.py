@@ -180,6 +180,8 @@ class Bot:
                 hist_df.reset_index(inplace=True)
 
                 # full back-test  → captures self._graph_state
+                # (indicators column-wise, their streaming state seeded from the
+                # history, so only the trade nodes walk the warm-up bars)
                 final_df, _, _, _, self._graph_state = process_graph(
                     graph_json, None, None, symbol, timeframe,
                     mode='backtest',
@@ -187,7 +189,9 @@ class Bot:
                     warmup_only=False,
                     dataframe=hist_df,
                     incremental=False,
-                    state=self._graph_state
+                    state=self._graph_state,
+                    columnar=True,
+                    compiled=True
                 )
 
                 # Validate we have data after back-test
@@ -203,8 +207,7 @@ class Bot:
 
                 # ─── wipe local back-test orders before LIVE ───────────────
                 from pve.app.vpl.nodes import Node
-                Node.orders.clear()
-                Node.order_id_counter = 0
+                Node.reset_orders()
                 self.logger.info("Cleared back-test orders, switching immediately to LIVE mode")
 
                 # === run the very last bar once in LIVE ===
@@ -20,55 +20,42 @@ def load_template_graph_for_user(user_id):
     """
     Loads ALL template graphs located in backend/template_graphs and saves them
     to the new user. Every template found (*.json) is saved as a graph under
-    the user's account. After saving, each template is compiled once (via the
-    Celery task) so the user immediately has ready-to-go strategies.
+    the user's account, with a copy of its shared precomputed backtest
+    (vpl/templates.py) so the user immediately has ready-to-go strategies.
+    A template without one yet is compiled once via the Celery task.
 
     Returns True if at least one template was processed successfully, False otherwise.
     """
     try:
-        # Get the directory where this file is located
-        current_dir = os.path.dirname(os.path.abspath(__file__))  # .../backend/pve/app/routes
-        # Navigate up three levels to reach the backend directory
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))  # .../backend
-        template_dir = os.path.join(backend_dir, 'template_graphs')
-
-        if not os.path.exists(template_dir):
-            current_app.logger.error(f"Template directory not found at: {template_dir}")
-            return False
+        # import here to avoid circular
+        from ..vpl.templates import TEMPLATE_DIR, load_templates, template_key
+        from ..vpl.tasks import submit_backtest
+        from ..models.backtest_model import BacktestResult
 
-        from ..vpl.tasks import process_graph_task  # import here to avoid circular
+        if not os.path.exists(TEMPLATE_DIR):
+            current_app.logger.error(f"Template directory not found at: {TEMPLATE_DIR}")
+            return False
 
         processed_any = False
 
-        for fname in os.listdir(template_dir):
-            if not fname.lower().endswith('.json'):
-                continue  # skip non-json
-
-            fpath = os.path.join(template_dir, fname)
+        for template in load_templates():
+            graph_name = template['name']
             try:
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    template_data = json.load(f)
-
-                graph_data = template_data.get('graph', {})
-                start_date = template_data.get('startDate', '2024-01-01')
-                end_date = template_data.get('endDate', '2024-01-04')
-                symbol = template_data.get('symbol', 'BTCUSDT')
-                timeframe = template_data.get('timeframe', '1h')
-
-                # Determine graph name – prefer explicit name in JSON, else file name
-                graph_name = template_data.get('graphName') or os.path.splitext(fname)[0].replace('_', ' ').title()
-
-                graph_json = json.dumps(graph_data)
-
-                Graph.save_or_update(user_id, graph_name, graph_json, start_date, end_date, symbol, timeframe)
+                Graph.save_or_update(user_id, graph_name, template['graph_json'],
+                                     template['start_date'], template['end_date'],
+                                     template['symbol'], template['timeframe'])
                 current_app.logger.info(f"Template graph '{graph_name}' saved for user {user_id}")
 
-                # Kick off compilation (fire-and-forget)
-                process_graph_task.delay(user_id, graph_name)
+                key = template_key(template)
+                if key and BacktestResult.copy_by_result_key(key, user_id, graph_name) is not None:
+                    current_app.logger.info(f"Template graph '{graph_name}': shared backtest copied")
+                else:
+                    # Kick off compilation (fire-and-forget)
+                    submit_backtest(user_id, graph_name)
 
                 processed_any = True
             except Exception as inner_e:
-                current_app.logger.error(f"Failed to process template {fname}: {str(inner_e)}")
+                current_app.logger.error(f"Failed to process template {graph_name}: {str(inner_e)}")
                 continue
 
         return processed_any
@@ -206,13 +193,14 @@ class LogCaptureHandler(logging.Handler):
 @rate_limit(10)  # 30 seconds cooldown
 @token_required
 def compile_graph():
-    from ..vpl.tasks import process_graph_task
+    from ..vpl.tasks import submit_backtest
     try:
         request_data = request.get_json()
         user_id = request_data.get('user_id')
         graph_name = request_data.get('name')
+        profile = bool(request_data.get('profile', False))
 
-        task = process_graph_task.delay(user_id, graph_name)
+        task = submit_backtest(user_id, graph_name, profile=profile)
         return jsonify({'status': 'success', 'message': 'Compilation started'})
     except Exception as e:
         current_app.logger.error(f"Error starting task: {str(e)}")
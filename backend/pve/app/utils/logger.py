@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 import logging
 import os
 import time
+import traceback
 from ..socketio_setup import socketio
 from .database import get_db_connection
 from flask import request, current_app
@@ -45,21 +46,55 @@ def setup_logging(app, logfile='logs/app.log'):
     app.logger.propagate = True
 
 class SocketIOLogHandler(logging.Handler):
-    """Stream everything at INFO+ up to the given Socket.IO user room."""
-    def __init__(self, user_id):
+    """
+    Stream everything at INFO+ up to the given Socket.IO user room.
+
+    Records are sent in batches, one 'log_message' event {'messages': [...]}
+    at most every `interval` seconds or `batch` records, rather than one
+    event (a Redis publish and a browser frame) per line. A record arriving
+    after a quiet spell goes out at once; flush() sends what is buffered and
+    close() flushes.
+    """
+    def __init__(self, user_id, interval=0.25, batch=200):
         super().__init__()
         self.user_id = user_id
+        self.interval = interval
+        self.batch = batch
+        self.buffer = []
+        self.sent_at = 0.0
         self.setLevel(logging.INFO)
         fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         self.setFormatter(logging.Formatter(fmt))
 
     def emit(self, record):
         try:
-            msg = self.format(record)
-            socketio.emit('log_message', {'message': msg}, to=str(self.user_id))
+            self.buffer.append(self.format(record))
+            if len(self.buffer) >= self.batch or time.monotonic() - self.sent_at >= self.interval:
+                self._send()
         except Exception:
             self.handleError(record)
 
+    def flush(self):
+        self.acquire()
+        try:
+            self._send()
+        except Exception:
+            if logging.raiseExceptions:
+                traceback.print_exc()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+    def _send(self):
+        self.sent_at = time.monotonic()
+        if not self.buffer:
+            return
+        messages, self.buffer = self.buffer, []
+        socketio.emit('log_message', {'messages': messages}, to=str(self.user_id))
+
 
 class DBLogHandler(logging.Handler):
     """
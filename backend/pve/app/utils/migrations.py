@@ -0,0 +1,52 @@
+# app/utils/migrations.py
+"""
+Schema changes for databases that already exist.
+
+db_init_query.SQL is only run by Postgres when it initializes an empty data
+volume, so a column added there never reaches a running deployment. Every
+statement in MIGRATIONS is idempotent and migrate() applies them all on each
+start (create_app: the API and every Celery worker process), in one
+transaction under an advisory lock so processes starting together take
+turns. New schema changes go both here and in db_init_query.SQL.
+"""
+import logging
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+LOCK_ID = 710_000_001   # pg_advisory_xact_lock key of migrate()
+
+MIGRATIONS = [
+    # per-node timings of profiled backtests
+    "ALTER TABLE backtest_results ADD COLUMN IF NOT EXISTS profile JSONB",
+    # result cache key of cacheable backtests (vpl/resultcache.py)
+    "ALTER TABLE backtest_results ADD COLUMN IF NOT EXISTS result_key CHAR(64)",
+    "CREATE INDEX IF NOT EXISTS backtest_results_result_key_idx ON backtest_results (result_key)",
+]
+
+
+def migrate(config):
+    """Apply MIGRATIONS; `config` holds DB_HOST, DB_NAME, DB_USER and
+    DB_PASSWORD. Returns False (and logs why) when they could not be applied."""
+    try:
+        conn = psycopg2.connect(
+            host=config['DB_HOST'],
+            database=config['DB_NAME'],
+            user=config['DB_USER'],
+            password=config['DB_PASSWORD']
+        )
+    except Exception as e:
+        logger.error("Schema migrations not applied, no database connection: %s", e)
+        return False
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_ID,))
+            for statement in MIGRATIONS:
+                cur.execute(statement)
+        return True
+    except Exception:
+        logger.exception("Schema migrations failed")
+        return False
+    finally:
+        conn.close()
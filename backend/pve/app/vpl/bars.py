@@ -0,0 +1,74 @@
+# app/vpl/bars.py
+"""
+Bar-by-bar access to the candle frame without per-row dicts.
+
+The bar loops used to start with df.to_dict(orient='records'): a dict per
+bar, every value and a pd.Timestamp boxed up front before the first node ran
+(and the incremental path converted the whole slice to read its last row).
+BarCursor keeps the frame's NumPy columns, the dates as int64 nanoseconds,
+and a current position `i`:
+
+  • row.get(name) answers like the dicts did, boxing only the value asked
+    for into a plain Python scalar, so node.execute(row) is unchanged;
+  • the bar's pd.Timestamp is built the first time something asks for
+    'date' (an order created, filled or cancelled) and reused for the rest
+    of that bar; time_ns() / time_ms() skip it.
+
+Iterating a cursor moves it over the bars and yields the cursor itself, so a
+row is only valid for its own bar: keep the values, not the row.
+"""
+import pandas as pd
+
+
+class BarCursor:
+    __slots__ = ('i', 'n', 'dates', 'tz', '_columns', '_stamp_i', '_stamp')
+
+    def __init__(self, df):
+        self.n = len(df)
+        self._columns = {name: df[name].to_numpy() for name in df.columns if name != 'date'}
+        if 'date' in df.columns:
+            dates = pd.DatetimeIndex(df['date'])
+            self.tz = dates.tz
+            self.dates = dates.as_unit('ns').asi8
+        else:
+            self.tz = None
+            self.dates = None
+        self.i = 0
+        self._stamp_i = None
+        self._stamp = None
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        for i in range(self.n):
+            self.i = i
+            yield self
+
+    def at(self, i):
+        """Move to bar `i` (negative counts from the end) and return the cursor."""
+        self.i = i if i >= 0 else self.n + i
+        return self
+
+    def get(self, name, default=None):
+        column = self._columns.get(name)
+        if column is not None:
+            return column.item(self.i)
+        if name == 'date' and self.dates is not None:
+            return self.timestamp()
+        return default
+
+    def timestamp(self):
+        """pd.Timestamp of the current bar."""
+        if self._stamp_i != self.i:
+            self._stamp = pd.Timestamp(int(self.dates[self.i]), tz=self.tz)
+            self._stamp_i = self.i
+        return self._stamp
+
+    def time_ns(self):
+        """Epoch nanoseconds of the current bar."""
+        return int(self.dates[self.i])
+
+    def time_ms(self):
+        """Epoch milliseconds of the current bar."""
+        return int(self.dates[self.i]) // 1_000_000
@@ -0,0 +1,45 @@
+# app/vpl/buffers.py
+"""
+Per-bar series kept in preallocated NumPy arrays.
+
+tools/add_indicator and tools/add_signal used to grow Python lists one bar
+at a time (a boxed float, a marker dict). SeriesBuffer keeps the values in a
+single array allocated up front, sized for the run when the caller knows it,
+and doubled when an incremental run goes past the end. A bar then costs one
+store, and the frame's columns are filled from a slice of the array instead
+of being rebuilt from a list.
+"""
+import numpy as np
+
+
+class SeriesBuffer:
+    __slots__ = ('data', 'n')
+
+    def __init__(self, capacity=0, dtype=float):
+        self.data = np.empty(max(capacity, 16), dtype=dtype)
+        self.n = 0
+
+    @classmethod
+    def of(cls, values, dtype=float):
+        """A buffer already holding `values`."""
+        buf = cls(len(values), dtype)
+        buf.data[:len(values)] = values
+        buf.n = len(values)
+        return buf
+
+    def __len__(self):
+        return self.n
+
+    def append(self, value):
+        if self.n == len(self.data):
+            self.data = np.concatenate([self.data, np.empty_like(self.data)])
+        self.data[self.n] = value
+        self.n += 1
+
+    def values(self):
+        """The filled part, as a view."""
+        return self.data[:self.n]
+
+    def tail(self, k):
+        """The last `k` values (fewer if there aren't as many), as a view."""
+        return self.data[max(self.n - k, 0):self.n]
@@ -0,0 +1,443 @@
+# app/vpl/codegen.py
+"""
+Straight-line code generation for the per-bar loop.
+
+execute_stateful interprets the DAG on every bar: it walks input_conn_list,
+looks ports up by name in output_values dicts and dispatches node.execute.
+compile_bar_loop instead turns the sorted DAG into the source of one Python
+function that contains the whole bar loop:
+
+  • every port is a local variable of that function;
+  • get/*, set/*, math (+ - * / clip), compare/*, logic/* and trade/is_none
+    are inlined with exactly the semantics of their execute(); literal
+    inputs (folded constants, see optimize.py) are locals set once;
+  • every other node is called through its bound execute, with only the
+    ports it reads / the ports read from it copied in and out of its dicts;
+  • a node with a trigger (trade / telegram) is only called, after its lazy
+    arguments (see optimize.lazy_arguments), when triggered() holds, and
+    idles otherwise.
+
+Inlined nodes keep their state in locals and write it back to the node
+(output_values, input_values, cross last_a/last_b) when the loop ends, so
+the nodes look the same afterwards as with the interpreter. A node without
+an execute of its own (unknown type) raises CodegenUnsupported and the
+caller keeps using the interpreter.
+
+Nothing read from the graph JSON is pasted into the source as code: the
+locals of a node are named by its position k in sorted_ids (node{k},
+c{k}_{slot}, last_a_{k}, ...), nodes are taken from env['nodes'], input
+slots must be ints, and any other value (port names, ids in messages) is
+written as its repr when it is a str or int and looked up in env['consts']
+otherwise.
+"""
+import logging
+from collections import Counter
+
+import numpy as np
+
+from .optimize import lazy_arguments
+
+logger = logging.getLogger(__name__)
+
+
+class CodegenUnsupported(Exception):
+    """Raised when a graph cannot be compiled to a straight-line loop."""
+
+
+class _Source:
+    def __init__(self):
+        self.lines = []
+        self.depth = 0
+
+    def emit(self, *lines):
+        for line in lines:
+            self.lines.append('    ' * self.depth + line)
+
+    def __str__(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+# ────────────────────────────────────────────────────────────────
+# inline emitters: (src, node, k, ins, outs) where k is the node's
+# position (names its locals), `ins` are the local names (or 'None')
+# feeding each input slot and `outs` the local names of its output ports
+# ----------------------------------------------------------------
+
+_CLASS_NAMES = {
+    'math/multiply_float': 'MultiplyFloatNode',
+    'math/add_float':      'AddFloatNode',
+    'math/subtract_float': 'SubtractFloatNode',
+    'math/divide_float':   'DivideFloatNode',
+    'math/clip_float':     'ClipFloatNode',
+    'compare/greater':     'GreaterNode',
+    'compare/smaller':     'LessNode',
+    'compare/equal':       'EqualNode',
+}
+
+def _get(column):
+    def emit(src, node, k, ins, outs):
+        src.emit(f"{outs[column]} = row.get({column!r}, None)")
+    return emit
+
+def _none_guard(src, ins, n, out, log_none=None, otherwise=True):
+    """`if any input is None: out = None` and open the else branch."""
+    src.emit(f"if {' or '.join(f'{v} is None' for v in ins[:n])}:")
+    src.depth += 1
+    if log_none:
+        src.emit(f"log.error({log_none!r})")
+    src.emit(f"{out} = None")
+    src.depth -= 1
+    if otherwise:
+        src.emit("else:")
+
+def _guarded(src, expr, out, error):
+    """`out = expr` with the nodes' own except branch."""
+    src.emit("try:")
+    src.emit(f"    {out} = {expr}")
+    src.emit("except Exception as e:")
+    src.emit(f"    log.error({error!r} + str(e))")
+    src.emit(f"    {out} = None")
+
+def _arith(symbol, verb, log_none):
+    def emit(src, node, k, ins, outs):
+        name = f"{_CLASS_NAMES[node.type]} {node.id}"
+        out = outs['Float']
+        _none_guard(src, ins, 2, out,
+                    f"{name}: One or both input values are None." if log_none else None)
+        src.depth += 1
+        _guarded(src, f"{ins[0]} {symbol} {ins[1]}", out, f"{name}: Error computing {verb}: ")
+        src.depth -= 1
+    return emit
+
+def _divide(src, node, k, ins, outs):
+    name = f"DivideFloatNode {node.id}"
+    out = outs['Float']
+    _none_guard(src, ins, 2, out, f"{name}: One or both input values are None.", otherwise=False)
+    src.emit(f"elif {ins[1]} == 0:")
+    src.emit(f"    log.error({name + ': Division by zero.'!r})")
+    src.emit(f"    {out} = None")
+    src.emit("else:")
+    src.depth += 1
+    _guarded(src, f"{ins[0]} / {ins[1]}", out, f"{name}: Error computing division: ")
+    src.depth -= 1
+
+def _clip(src, node, k, ins, outs):
+    name = f"ClipFloatNode {node.id}"
+    out = outs['Float']
+    lo, hi, value = ins[:3]
+    _none_guard(src, ins, 3, out, f"{name}: One or more input values are None.")
+    src.depth += 1
+    src.emit("try:")
+    src.emit(f"    lo, hi = {lo}, {hi}")
+    src.emit("    if lo > hi:")
+    src.emit(f"        log.warning({name + ': '!r} + f'Min value ({{lo}}) is greater than max value ({{hi}}). Swapping values.')")
+    src.emit("        lo, hi = hi, lo")
+    src.emit(f"    {out} = max(lo, min(hi, {value}))")
+    src.emit("except Exception as e:")
+    src.emit(f"    log.error({name + ': Error computing clip: '!r} + str(e))")
+    src.emit(f"    {out} = None")
+    src.depth -= 1
+
+def _compare(symbol, log_none):
+    def emit(src, node, k, ins, outs):
+        name = f"{_CLASS_NAMES[node.type]} {node.id}"
+        out = outs['Bool']
+        _none_guard(src, ins, 2, out,
+                    f"{name}: One or both input values are None." if log_none else None)
+        src.depth += 1
+        _guarded(src, f"{ins[0]} {symbol} {ins[1]}", out, f"{name}: Error computing condition: ")
+        src.depth -= 1
+    return emit
+
+def _cross(over):
+    def emit(src, node, k, ins, outs):
+        out, (a, b) = outs['Condition'], ins[:2]
+        last_a, last_b = f"last_a_{k}", f"last_b_{k}"
+        cond = f"({last_a} < {last_b}) and ({a} > {b})" if over else \
+               f"({last_a} > {last_b}) and ({a} < {b})"
+        _none_guard(src, ins, 2, out)
+        src.emit(f"    if {last_a} is not None and {last_b} is not None:")
+        src.emit(f"        {out} = {cond}")
+        src.emit("    else:")
+        src.emit(f"        {out} = False")
+        src.emit(f"{last_a} = {a}", f"{last_b} = {b}")
+    return emit
+
+def _logic(op):
+    def emit(src, node, k, ins, outs):
+        out = outs['Bool']
+        _none_guard(src, ins, 2, out)
+        src.emit(f"    {out} = {ins[0]} {op} {ins[1]}")
+    return emit
+
+def _not(src, node, k, ins, outs):
+    out = outs['Bool']
+    _none_guard(src, ins, 1, out)
+    src.emit(f"    {out} = not {ins[0]}")
+
+def _if(src, node, k, ins, outs):
+    go, stop = outs['True'], outs['False']
+    src.emit(f"if {ins[0]} is None:",
+             f"    {go} = None",
+             f"    {stop} = None",
+             f"elif {ins[0]}:",
+             f"    {go} = 'GO'",
+             f"    {stop} = None",
+             "else:",
+             f"    {go} = None",
+             f"    {stop} = 'GO'")
+
+def _is_none(src, node, k, ins, outs):
+    src.emit(f"{outs['None?']} = {ins[0]} is None")
+
+INLINE = {
+    'get/open':            _get('open'),
+    'get/close':           _get('close'),
+    'get/high':            _get('high'),
+    'get/low':             _get('low'),
+    'get/volume':          _get('volume'),
+
+    'math/multiply_float': _arith('*', 'multiplication', log_none=False),
+    'math/add_float':      _arith('+', 'addition', log_none=True),
+    'math/subtract_float': _arith('-', 'subtraction', log_none=True),
+    'math/divide_float':   _divide,
+    'math/clip_float':     _clip,
+
+    'compare/greater':     _compare('>', log_none=False),
+    'compare/smaller':     _compare('<', log_none=False),
+    'compare/equal':       _compare('==', log_none=True),
+    'compare/cross_over':  _cross(over=True),
+    'compare/cross_under': _cross(over=False),
+
+    'logic/and':           _logic('and'),
+    'logic/or':            _logic('or'),
+    'logic/not':           _not,
+    'logic/if':            _if,
+    'trade/is_none':       _is_none,
+}
+
+# set/* outputs never change: they are evaluated once before the loop
+CONSTANTS = {'set/float', 'set/integer', 'set/string', 'set/bool'}
+
+# output ports of the inlined / constant node types
+OUTPUTS = {
+    'get/open': ('open',), 'get/close': ('close',), 'get/high': ('high',),
+    'get/low': ('low',), 'get/volume': ('volume',),
+
+    'set/float': ('Float',), 'set/integer': ('Integer',),
+    'set/string': ('String',), 'set/bool': ('Bool',),
+
+    'math/multiply_float': ('Float',), 'math/add_float': ('Float',),
+    'math/subtract_float': ('Float',), 'math/divide_float': ('Float',),
+    'math/clip_float': ('Float',),
+
+    'compare/greater': ('Bool',), 'compare/smaller': ('Bool',), 'compare/equal': ('Bool',),
+    'compare/cross_over': ('Condition',), 'compare/cross_under': ('Condition',),
+
+    'logic/and': ('Bool',), 'logic/or': ('Bool',), 'logic/not': ('Bool',),
+    'logic/if': ('True', 'False'), 'trade/is_none': ('None?',),
+}
+
+
+# ────────────────────────────────────────────────────────────────
+# compiler
+# ----------------------------------------------------------------
+
+class CompiledLoop:
+    """The generated bar loop plus the environment it was compiled against."""
+
+    def __init__(self, source, env, record=()):
+        self.source = source
+        namespace = {}
+        exec(compile(source, '<vpl bar loop>', 'exec'), namespace)
+        self._run = namespace['run']
+        self._env = env
+        self.record = tuple(record)
+
+    def __call__(self, rows, feeds=None, progress=None):
+        """Run over `rows`; returns {port: object array} for the recorded ports.
+        A `progress` (progress.py) is ticked as the bars go by."""
+        recorded = {port: np.full(len(rows), None, dtype=object) for port in self.record}
+        tick = progress.tick if progress is not None else None
+        self._run(rows, feeds or {}, recorded, self._env, tick)
+        return recorded
+
+
+def compile_bar_loop(sorted_ids, nodes, update_orders, log=logger, fed=(), record=()):
+    """
+    Compile the per-bar loop over `sorted_ids`. `fed` lists the
+    (node id, output name) ports whose per-bar values are passed in as
+    `feeds` at call time (see execute_columnar); ports of any other node
+    outside `sorted_ids` are read once, before the loop. The ports in
+    `record` (of nodes in `sorted_ids`) are stored after every bar into the
+    arrays the compiled loop returns.
+    """
+    compiled = set(sorted_ids)
+    index = {nid: k for k, nid in enumerate(sorted_ids)}
+    for nid in sorted_ids:
+        node = nodes[nid]
+        if node.type not in INLINE and node.type not in CONSTANTS and \
+                getattr(type(node), 'execute', None) is None:
+            raise CodegenUnsupported(f"no execute() for node {nid} ({node.type})")
+        if any(type(slot) is not int for slot, _, _ in node.input_conn_list):
+            raise CodegenUnsupported(f"non-integer input slot on node {nid}")
+    for nid, name in record:
+        if nid not in compiled:
+            raise CodegenUnsupported(f"recorded port {name!r} of node {nid} is not in the loop")
+
+    env = {'update_orders': update_orders, 'log': log,
+           'nodes': [nodes[nid] for nid in sorted_ids], 'consts': []}
+    ports = {}
+
+    def port(nid, name):
+        if (nid, name) not in ports:
+            ports[(nid, name)] = f"p{len(ports)}"
+        return ports[(nid, name)]
+
+    def lit(value):
+        """Source text of a value from the graph: a str or int is its repr,
+        which is always a plain literal; anything else an env lookup."""
+        if value is None or type(value) in (str, int, bool):
+            return repr(value)
+        env['consts'].append(value)
+        return f"consts[{len(env['consts']) - 1}]"
+
+    # ports read by compiled nodes
+    consumed = {(origin.id, name)
+                for nid in sorted_ids
+                for _, origin, name in nodes[nid].input_conn_list}
+
+    prologue, body, epilogue = _Source(), _Source(), _Source()
+    prologue.emit("def run(rows, feeds, recorded, env, tick):")
+    prologue.depth = 1
+    prologue.emit("update_orders = env['update_orders']", "log = env['log']",
+                  "nodes = env['nodes']", "consts = env['consts']",
+                  "next_tick = -1 if tick is None else 0")
+    body.depth = 3
+    epilogue.depth = 2
+
+    # ports coming from outside: fed per bar, or constant for the whole run
+    external = sorted({key for key in consumed if key[0] not in compiled}, key=str)
+    for nid, name in external:
+        local = port(nid, name)
+        if (nid, name) in fed:
+            prologue.emit(f"feed_{local} = feeds[{lit((nid, name))}]", f"{local} = None")
+            body.emit(f"{local} = feed_{local}[i]")
+        else:
+            prologue.emit(f"{local} = {lit(nodes[nid].output_values)}.get({lit(name)})")
+
+    # nodes with a trigger run their lazy arguments (see optimize.py) and
+    # themselves only when it is on; a shared argument runs once per bar
+    arguments = lazy_arguments(nodes, sorted_ids, keep={nid for nid, _ in record})
+    users = Counter(lid for lids in arguments.values() for lid in lids)
+    declared = {}
+
+    def declare(nid):
+        """Prologue / epilogue of a node, once; returns its input and output locals."""
+        if nid in declared:
+            return declared[nid]
+        node, k = nodes[nid], index[nid]
+        ins_by_slot = {slot: port(origin.id, name) for slot, origin, name in node.input_conn_list}
+        literals = {slot: f"c{k}_{slot}" for slot, value in enumerate(node.input_values)
+                    if slot not in ins_by_slot and value is not None}
+        n_inputs = max([3] + [slot + 1 for slot in ins_by_slot] + [slot + 1 for slot in literals])
+        ins = [ins_by_slot.get(slot, literals.get(slot, 'None')) for slot in range(n_inputs)]
+        outs = {}
+        prologue.emit(f"node{k} = nodes[{k}]")
+        for slot, local in literals.items():
+            prologue.emit(f"{local} = node{k}.input_values[{slot}]")
+
+        if node.type in CONSTANTS:
+            # evaluated once by the node itself so the value is exactly its own
+            name, = OUTPUTS[node.type]
+            prologue.emit(f"node{k}.execute(None)",
+                          f"{port(nid, name)} = node{k}.output_values.get({name!r})")
+
+        elif node.type in INLINE:
+            outs = {name: port(nid, name) for name in OUTPUTS[node.type]}
+            for name, local in outs.items():
+                prologue.emit(f"{local} = node{k}.output_values.get({name!r})")
+                epilogue.emit(f"node{k}.output_values[{name!r}] = {local}")
+            for slot, local in ins_by_slot.items():
+                epilogue.emit(f"node{k}.input_values[{slot}] = {local}")
+
+            if node.type in ('compare/cross_over', 'compare/cross_under'):
+                prologue.emit(f"last_a_{k}, last_b_{k} = node{k}.last_a, node{k}.last_b")
+                epilogue.emit(f"node{k}.last_a, node{k}.last_b = last_a_{k}, last_b_{k}")
+        else:
+            prologue.emit(f"iv{k} = node{k}.input_values",
+                          f"ov{k} = node{k}.output_values",
+                          f"x{k} = node{k}.execute")
+            if nid in arguments:
+                if type(node.trigger) is not int:
+                    raise CodegenUnsupported(f"non-integer trigger slot on node {nid}")
+                prologue.emit(f"t{k} = node{k}.triggered", f"idle{k} = node{k}.idle")
+        if users[nid] > 1:
+            prologue.emit(f"done{k} = -1")
+        declared[nid] = ins_by_slot, ins, outs
+        return declared[nid]
+
+    def emit_node(nid):
+        node, k = nodes[nid], index[nid]
+        ins_by_slot, ins, outs = declare(nid)
+        if users[nid] > 1:
+            body.emit(f"if done{k} != i:")
+            body.depth += 1
+            body.emit(f"done{k} = i")
+        body.emit(f"# node {k}: {str(node.type)!r}")
+
+        if node.type in CONSTANTS:
+            pass
+        elif node.type in INLINE:
+            INLINE[node.type](body, node, k, ins, outs)
+        else:
+            trigger = node.trigger if nid in arguments else None
+            if trigger is not None:
+                if trigger in ins_by_slot:
+                    body.emit(f"iv{k}[{trigger}] = {ins_by_slot[trigger]}")
+                body.emit(f"if t{k}({ins_by_slot.get(trigger, f'iv{k}[{trigger}]')}):")
+                body.depth += 1
+                for lid in arguments[nid]:
+                    emit_node(lid)
+            for slot, local in sorted(ins_by_slot.items()):
+                if slot != trigger:
+                    body.emit(f"iv{k}[{slot}] = {local}")
+            body.emit(f"x{k}(row)")
+            if trigger is not None:
+                body.depth -= 1
+                body.emit("else:", f"    idle{k}()")
+            for (origin_id, name) in sorted(consumed, key=str):
+                if origin_id == nid:
+                    body.emit(f"{port(nid, name)} = ov{k}.get({lit(name)})")
+
+        if users[nid] > 1:
+            body.depth -= 1
+
+    for nid in sorted_ids:
+        if nid not in users:
+            emit_node(nid)
+
+    # recorded ports: the port's local, or its output dict when nothing reads it
+    for j, (nid, name) in enumerate(record):
+        prologue.emit(f"rec{j} = recorded[{lit((nid, name))}]")
+        if (nid, name) in ports:
+            body.emit(f"rec{j}[i] = {ports[(nid, name)]}")
+        else:
+            body.emit(f"rec{j}[i] = node{index[nid]}.output_values.get({lit(name)})")
+
+    # ports of bound nodes read downstream before their first bar
+    for (nid, name), local in ports.items():
+        if nid in compiled and nodes[nid].type not in OUTPUTS:
+            prologue.emit(f"{local} = node{index[nid]}.output_values.get({lit(name)})")
+    source = _Source()
+    source.lines = prologue.lines[:]
+    source.depth = 1
+    source.emit("try:",
+                "    for i, row in enumerate(rows):",
+                "        if i == next_tick:",
+                "            next_tick = tick(i)",
+                "        update_orders(row)")
+    source.lines += body.lines
+    source.emit("finally:")
+    source.lines += epilogue.lines or ['        pass']
+    return CompiledLoop(str(source), env, record)
@@ -0,0 +1,483 @@
+# app/vpl/columnar.py
+"""
+Columnar execution mode for indicator-only graphs.
+
+Instead of pushing every bar through every node (execute_stateful), each node
+is evaluated exactly once over the whole candle frame. A port value is either
+a plain Python scalar (set/* constants, names) or a float64 NumPy array with
+one entry per bar, where NaN stands for the ``None`` the streaming node would
+have produced on that bar (so a NaN coming out of diverging arithmetic is
+treated like None as well).
+
+Only side-effect-free nodes qualify: no trade/* node (trade/is_none
+excepted) and no telegram/* node. A graph made of such nodes only runs fully
+column-wise; otherwise its pure prefix (see pure_prefix) is precomputed here and
+the per-bar loop only runs the remaining trade suffix, reading the prefix
+values by bar index.
+
+Afterwards every node is left in the state the per-bar loop would have left
+it in: indicators get their streaming state (vpl/streaming.py) seeded from
+the history, so a live bot can run its history column-wise and carry on bar
+by bar from there.
+"""
+import logging
+import time
+import numpy as np
+import pandas as pd
+
+from .utils import (
+    ma_batch, rsi_batch, supertrend_batch, rolling_extreme_batch
+)
+from .buffers import SeriesBuffer
+from .streaming import make_ma, RollingExtreme, RSI, SuperTrend
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarUnsupported(Exception):
+    """Raised when a graph cannot be evaluated column-wise."""
+
+
+# ────────────────────────────────────────────────────────────────
+# value helpers
+# ----------------------------------------------------------------
+
+def _is_col(value):
+    return isinstance(value, np.ndarray)
+
+def _col(value, n):
+    """Broadcast a scalar port value to a float column (None → NaN)."""
+    if _is_col(value):
+        return value
+    if value is None:
+        return np.full(n, np.nan)
+    try:
+        return np.full(n, float(value))
+    except (TypeError, ValueError):
+        raise ColumnarUnsupported(f"non-numeric value {value!r} on a numeric port")
+
+def _scalar(value):
+    """Scalar port value, or raise when a per-bar column was wired in."""
+    if _is_col(value):
+        raise ColumnarUnsupported("per-bar value on a constant-only port")
+    return value
+
+def _first_valid(value):
+    """Streaming nodes latch the first non-None value of their window input."""
+    if _is_col(value):
+        valid = np.flatnonzero(~np.isnan(value))
+        if not len(valid):
+            return None
+        value = value[valid[0]].item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _last(value):
+    """Value the streaming node would hold after the final bar."""
+    if not _is_col(value):
+        return value
+    if not len(value) or np.isnan(value[-1]):
+        return None
+    return value[-1].item()
+
+def _bool_col(cond, *inputs):
+    """bool mask → 1.0 / 0.0 column, NaN wherever one of the inputs is None."""
+    out = cond.astype(float)
+    for v in inputs:
+        out[np.isnan(v)] = np.nan
+    return out
+
+def _compressed(fn, n, *columns):
+    """Run `fn` over the bars where every input is valid and scatter back.
+
+    Stateful streaming nodes skip bars with a None input without touching
+    their history, which is exactly a kernel over the compressed column.
+    """
+    valid = np.ones(n, dtype=bool)
+    for c in columns:
+        valid &= ~np.isnan(c)
+    out = np.full(n, np.nan)
+    if valid.any():
+        out[valid] = fn(*(c[valid] for c in columns))
+    return out
+
+
+# ────────────────────────────────────────────────────────────────
+# per node-type kernels: (node, inputs, ctx) -> {output name: value}
+# ----------------------------------------------------------------
+
+def _get(column, output):
+    def kernel(node, ins, ctx):
+        return {output: ctx.column(column)}
+    return kernel
+
+def _set(output, default):
+    def kernel(node, ins, ctx):
+        return {output: node.properties.get('value', default)}
+    return kernel
+
+def _binary(op):
+    def kernel(node, ins, ctx):
+        a, b = _col(ins[0], ctx.n), _col(ins[1], ctx.n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {'Float': op(a, b)}
+    return kernel
+
+def _divide(a, b):
+    return np.where(b == 0, np.nan, a / b)
+
+def _compare(op):
+    def kernel(node, ins, ctx):
+        a, b = _col(ins[0], ctx.n), _col(ins[1], ctx.n)
+        with np.errstate(invalid='ignore'):
+            return {'Bool': _bool_col(op(a, b), a, b)}
+    return kernel
+
+def _logic(pick_b):
+    """`a and b` / `a or b` return one of the operands, not a bool."""
+    def kernel(node, ins, ctx):
+        a, b = _col(ins[0], ctx.n), _col(ins[1], ctx.n)
+        out = np.where(pick_b(a != 0), b, a)
+        out[np.isnan(a) | np.isnan(b)] = np.nan
+        return {'Bool': out}
+    return kernel
+
+def _not(node, ins, ctx):
+    a = _col(ins[0], ctx.n)
+    return {'Bool': _bool_col(a == 0, a)}
+
+def _if(node, ins, ctx):
+    cond = _col(ins[0], ctx.n)
+    go = np.where(cond != 0, 1.0, np.nan)
+    stop = np.where(cond != 0, np.nan, 1.0)
+    go[np.isnan(cond)] = np.nan
+    stop[np.isnan(cond)] = np.nan
+    return {'True': go, 'False': stop}
+
+def _is_none(node, ins, ctx):
+    return {'None?': np.isnan(ins[0]).astype(float)}
+
+def _clip(node, ins, ctx):
+    lo, hi, value = (_col(v, ctx.n) for v in ins[:3])
+    lo, hi = np.minimum(lo, hi), np.maximum(lo, hi)
+    return {'Float': np.maximum(lo, np.minimum(hi, value))}
+
+def _cross(over):
+    def kernel(node, ins, ctx):
+        a, b = _col(ins[0], ctx.n), _col(ins[1], ctx.n)
+        prev_a = np.concatenate([[np.nan], a[:-1]])
+        prev_b = np.concatenate([[np.nan], b[:-1]])
+        with np.errstate(invalid='ignore'):
+            if over:
+                cond = (prev_a < prev_b) & (a > b)
+            else:
+                cond = (prev_a > prev_b) & (a < b)
+        return {'Condition': _bool_col(cond, a, b)}
+    return kernel
+
+def _extreme(kind):
+    def kernel(node, ins, ctx):
+        window = _first_valid(ins[1])
+        if window is None:
+            return {'Float': np.full(ctx.n, np.nan)}
+        values = _col(ins[0], ctx.n)
+        return {'Float': _compressed(lambda v: rolling_extreme_batch(v, window, kind), ctx.n, values)}
+    return kernel
+
+def _ma(node, ins, ctx):
+    window = _first_valid(ins[1])
+    if window is None:
+        return {'Float': np.full(ctx.n, np.nan)}
+    ma_type = node.properties.get('ma_type', 'ema')
+    prices = _col(ins[0], ctx.n)
+    return {'Float': _compressed(lambda p: ma_batch(p, window, ma_type), ctx.n, prices)}
+
+def _rsi(node, ins, ctx):
+    window = _first_valid(ins[1])
+    if window is None:
+        return {'Float': np.full(ctx.n, np.nan)}
+    prices = _col(ins[0], ctx.n)
+    return {'Float': _compressed(lambda p: rsi_batch(p, window), ctx.n, prices)}
+
+def _super_trend(node, ins, ctx):
+    window = _first_valid(ins[3])
+    if window is None:
+        return {'Float': np.full(ctx.n, np.nan)}
+    multiplier = node.properties.get('multiplier', 3.0)
+    h, l, c = (_col(v, ctx.n) for v in ins[:3])
+    return {'Float': _compressed(
+        lambda hh, ll, cc: supertrend_batch(hh, ll, cc, window, multiplier), ctx.n, h, l, c)}
+
+def _add_indicator(node, ins, ctx):
+    _scalar(ins[1])
+    return {}
+
+def _add_signal(node, ins, ctx):
+    _scalar(ins[1])
+    return {}
+
+KERNELS = {
+    'get/open':            _get('open', 'open'),
+    'get/close':           _get('close', 'close'),
+    'get/high':            _get('high', 'high'),
+    'get/low':             _get('low', 'low'),
+    'get/volume':          _get('volume', 'volume'),
+
+    'set/float':           _set('Float', 1.0),
+    'set/integer':         _set('Integer', 1),
+    'set/string':          _set('String', ''),
+    'set/bool':            _set('Bool', False),
+
+    'math/multiply_float': _binary(np.multiply),
+    'math/add_float':      _binary(np.add),
+    'math/subtract_float': _binary(np.subtract),
+    'math/divide_float':   _binary(_divide),
+    'math/clip_float':     _clip,
+    'math/lowest':         _extreme('min'),
+    'math/highest':        _extreme('max'),
+
+    'compare/greater':     _compare(np.greater),
+    'compare/smaller':     _compare(np.less),
+    'compare/equal':       _compare(np.equal),
+    'compare/cross_over':  _cross(over=True),
+    'compare/cross_under': _cross(over=False),
+
+    'logic/and':           _logic(lambda truthy: truthy),
+    'logic/or':            _logic(lambda truthy: ~truthy),
+    'logic/not':           _not,
+    'logic/if':            _if,
+    'trade/is_none':       _is_none,
+
+    'indicators/ma':          _ma,
+    'indicators/rsi':         _rsi,
+    'indicators/super_trend': _super_trend,
+
+    'tools/add_indicator': _add_indicator,
+    'tools/add_signal':    _add_signal,
+}
+
+
+# Nodes whose output only depends on the current bar's inputs. With nothing
+# but constants wired in, their output is a constant too, and is computed by
+# the node's own execute() so scalar semantics stay exactly the same.
+STATELESS = {
+    'math/multiply_float', 'math/add_float', 'math/subtract_float',
+    'math/divide_float', 'math/clip_float',
+    'compare/greater', 'compare/smaller', 'compare/equal',
+    'logic/and', 'logic/or', 'logic/not', 'logic/if', 'trade/is_none',
+}
+
+# Nodes with streaming state (vpl/streaming.py) that is seeded from the
+# column history once the columnar pass is done.
+SEEDED = {
+    'indicators/ma', 'indicators/rsi', 'indicators/super_trend',
+    'math/lowest', 'math/highest',
+}
+
+# Columns are float64 whatever the node emits; the kind of a port tells how
+# to turn a bar back into the Python value a streaming node would have set.
+BOOL_OUTPUTS = {
+    'compare/greater', 'compare/smaller', 'compare/equal',
+    'compare/cross_over', 'compare/cross_under',
+    'logic/not', 'trade/is_none',
+}
+
+
+# ────────────────────────────────────────────────────────────────
+# executor
+# ----------------------------------------------------------------
+
+class _Context:
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self._columns = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = self.df[name].to_numpy(dtype=float)
+        return self._columns[name]
+
+
+def supports_columnar(nodes):
+    """True when every node of the graph has a side-effect-free column kernel."""
+    return all(node.type in KERNELS for node in nodes.values())
+
+
+def pure_prefix(nodes, order):
+    """Ids, in execution order, of the nodes that can be evaluated column-wise:
+    they have a kernel and every node upstream of them is pure as well."""
+    pure, seen = [], set()
+    for nid in order:
+        node = nodes[nid]
+        if node.type in KERNELS and all(origin.id in seen for _, origin, _ in node.input_conn_list):
+            pure.append(nid)
+            seen.add(nid)
+    return pure
+
+
+def _value_kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if value == 'GO':
+        return 'go'
+    return 'float'
+
+
+def _output_kind(node, in_kinds):
+    if node.type == 'logic/if':
+        return 'go'
+    if node.type in BOOL_OUTPUTS:
+        return 'bool'
+    if node.type in ('logic/and', 'logic/or'):
+        return in_kinds[0] if in_kinds[0] == in_kinds[1] else 'float'
+    return 'float'
+
+
+def bar_values(column, kind):
+    """Per-bar Python values of a column, as the streaming node would emit them."""
+    values = column.tolist()
+    if kind == 'go':
+        return ['GO' if v == 1.0 else None for v in values]
+    if kind == 'bool':
+        return [None if v != v else v != 0 for v in values]
+    return [None if v != v else v for v in values]
+
+
+def _constant_outputs(node, inputs):
+    """A stateless node over constant inputs, run by its own execute on
+    scratch copies of its ports: the node itself is only changed by
+    _bind_results, once the whole pass succeeded."""
+    ports = node.input_values, node.output_values
+    node.input_values, node.output_values = list(node.input_values), {}
+    try:
+        for slot, _, _ in node.input_conn_list:
+            node.input_values[slot] = inputs[slot]
+        node.execute(None)
+        return dict(node.output_values)
+    finally:
+        node.input_values, node.output_values = ports
+
+
+def _valid_values(*columns):
+    """Python floats of the bars where every column is valid (what a streaming
+    node would have been fed, see _compressed)."""
+    valid = ~np.isnan(columns[0])
+    for c in columns[1:]:
+        valid &= ~np.isnan(c)
+    return [c[valid].tolist() for c in columns]
+
+
+def _seed_streaming(node, inputs, ctx):
+    """Hand the history over to the node's streaming state, so live bars
+    continue where the column kernels stopped."""
+    window_slot = 3 if node.type == 'indicators/super_trend' else 1
+    window = _first_valid(inputs[window_slot])
+    if window is None:
+        return
+    node.window = window
+
+    if node.type == 'indicators/super_trend':
+        highs, lows, closes = _valid_values(*(_col(v, ctx.n) for v in inputs[:3]))
+        node.supertrend = SuperTrend(window)
+        node.supertrend.seed(highs, lows, closes, node.properties.get('multiplier', 3.0))
+        return
+
+    values, = _valid_values(_col(inputs[0], ctx.n))
+    if node.type == 'indicators/ma':
+        state = make_ma(node.properties.get('ma_type', 'ema'), window)
+        node.ma = state
+    elif node.type == 'indicators/rsi':
+        state = node.rsi = RSI(window)
+    else:
+        state = node.extreme = RollingExtreme(window, 'min' if node.type == 'math/lowest' else 'max')
+    state.seed(values)
+
+
+def _bind_results(node, inputs, outputs, ctx):
+    """Leave the node in the state the per-bar loop would have left it in."""
+    for slot, _, _ in node.input_conn_list:
+        node.input_values[slot] = _last(inputs[slot])
+    for name, value in outputs.items():
+        node.output_values[name] = _last(value)
+
+    if node.type == 'tools/add_indicator':
+        if inputs[1]:
+            node.indicator_name = inputs[1]
+        node.indicator_series = SeriesBuffer.of(_col(inputs[0], ctx.n))
+        node.output_values['Series'] = node.indicator_series
+
+    elif node.type in ('compare/cross_over', 'compare/cross_under'):
+        node.last_a = node.input_values[0]
+        node.last_b = node.input_values[1]
+
+    elif node.type in SEEDED:
+        _seed_streaming(node, inputs, ctx)
+
+    elif node.type == 'tools/add_signal':
+        signal = inputs[0]
+        if _is_col(signal):
+            fired = np.flatnonzero(~np.isnan(signal) & (signal != 0))
+        else:
+            fired = np.arange(ctx.n) if signal else np.array([], dtype=int)
+        dates = pd.DatetimeIndex(ctx.df['date']).as_unit('ns').asi8
+        node.marker_dates = SeriesBuffer.of(dates[fired], dtype='int64')
+        node.output_values['Markers'] = node.marker_dates
+
+
+def execute_columnar(sorted_ids, nodes, df, profile=None):
+    """Evaluate `sorted_ids` (a pure prefix or the whole graph) node by node
+    over the whole frame.
+
+    Returns {(node id, output name): per-bar values} for every column that
+    feeds a node outside `sorted_ids`; constant outputs are simply left on
+    the node's output_values. With a `profile` (profiler.py) each node's
+    kernel is timed.
+    """
+    ctx = _Context(df)
+    values, kinds = {}, {}
+    results = []
+
+    for nid in sorted_ids:
+        node = nodes[nid]
+        n_inputs = max([5, len(node.inputs), len(node.input_values)] +
+                       [slot + 1 for slot, _, _ in node.input_conn_list])
+        # unlinked slots hold their literal (a folded constant) or None
+        inputs = list(node.input_values) + [None] * (n_inputs - len(node.input_values))
+        in_kinds = ['float'] * n_inputs
+        for slot, origin, out_name in node.input_conn_list:
+            inputs[slot] = values.get((origin.id, out_name))
+            in_kinds[slot] = kinds.get((origin.id, out_name), 'float')
+        for slot, value in enumerate(inputs):
+            if value is not None and not _is_col(value):
+                in_kinds[slot] = _value_kind(value)
+
+        t0 = time.perf_counter()
+        if node.type in STATELESS and not any(_is_col(v) for v in inputs):
+            outputs = _constant_outputs(node, inputs)
+        else:
+            outputs = KERNELS[node.type](node, inputs, ctx)
+        kind = _output_kind(node, in_kinds)
+        for name, value in outputs.items():
+            values[(nid, name)] = value
+            kinds[(nid, name)] = kind
+        results.append((node, inputs, outputs, time.perf_counter() - t0))
+
+    # only touch node state once the whole graph evaluated successfully,
+    # so a ColumnarUnsupported half-way leaves the nodes untouched
+    for node, inputs, outputs, seconds in results:
+        _bind_results(node, inputs, outputs, ctx)
+        if profile is not None:
+            profile.column(node.id, seconds)
+
+    inside = set(sorted_ids)
+    feeds = {}
+    for nid, node in nodes.items():
+        if nid in inside:
+            continue
+        for _, origin, out_name in node.input_conn_list:
+            key = (origin.id, out_name)
+            if key not in feeds and _is_col(values.get(key)):
+                feeds[key] = bar_values(values[key], kinds[key])
+    return feeds
@@ -0,0 +1,160 @@
+# app/vpl/graphcache.py
+"""
+Compiled graphs, cached by content.
+
+Turning LiteGraph JSON into something runnable (parse it, build and wire the
+nodes, sort them, optimize, find the pure prefix and the lookback) gives the
+same result every time for the same JSON, yet every Celery backtest did it
+again and every bot launch did it twice (warm-up lookback, then the run).
+
+CompiledGraph is that result as plain data: the specs of the nodes that
+survived the optimizer, the links between them, the literal inputs left by
+constant folding, the execution order, the pure prefix, the lookback and
+what the optimizer removed. nodes.py builds it (compile_graph) and makes
+fresh Node objects from it (instantiate_graph): one constructor call per
+node and the links, no parsing, sorting or optimizing. Node specs are
+shared, read-only, by every instance.
+
+GraphCache keeps them under a sha256 of the graph JSON and ENGINE_VERSION:
+an in-process LRU in front of Redis, so a graph compiled by one worker is
+reused by the others. Redis stores JSON, never pickles, and is optional:
+when it cannot be reached the cache logs it, leaves it alone for
+RETRY_AFTER seconds and compiles locally.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever compile_graph / instantiate_graph or the node semantics they
+# capture change, so artifacts of an older engine are never reused.
+ENGINE_VERSION = 1
+
+LRU_SIZE = 64
+REDIS_TTL = 7 * 24 * 3600
+RETRY_AFTER = 60
+
+
+class CompiledGraph:
+    """
+    nodes:    node specs {id, type, properties, inputs, outputs}
+    links:    [link id, origin id, origin slot, target id, target slot, type]
+    literals: [node id, slot, value] of the unlinked inputs set by folding
+    order, prefix, lookback: as computed by _compile / _graph_lookback
+    removed:  {'folded': [ids], 'merged': [[id, kept id]], 'pruned': [ids]}
+    """
+    __slots__ = ('nodes', 'links', 'literals', 'order', 'prefix', 'lookback', 'removed')
+
+    def __init__(self, nodes, links, literals, order, prefix, lookback, removed):
+        self.nodes = nodes
+        self.links = links
+        self.literals = literals
+        self.order = order
+        self.prefix = prefix
+        self.lookback = lookback
+        self.removed = removed
+
+    def to_json(self):
+        return json.dumps({name: getattr(self, name) for name in self.__slots__})
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(**json.loads(text))
+
+
+class GraphCache:
+    """get(graph_json) -> CompiledGraph, compiling with `compile` on a miss."""
+
+    def __init__(self, compile, size=LRU_SIZE, redis_client=None, ttl=REDIS_TTL):
+        self._compile = compile
+        self._size = size
+        self._redis = redis_client
+        self._ttl = ttl
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+
+    @staticmethod
+    def key(graph_json):
+        digest = hashlib.sha256(graph_json.encode('utf-8')).hexdigest()
+        return f"vpl:graph:{ENGINE_VERSION}:{digest}"
+
+    def get(self, graph_json):
+        key = self.key(graph_json)
+        with self._lock:
+            compiled = self._lru.get(key)
+            if compiled is not None:
+                self._lru.move_to_end(key)
+                logger.debug("Compiled graph %s from memory", key)
+                return compiled
+
+        compiled = self._load(key)
+        if compiled is None:
+            compiled = self._compile(graph_json)
+            self._save(key, compiled)
+
+        with self._lock:
+            self._lru[key] = compiled
+            while len(self._lru) > self._size:
+                self._lru.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def _available(self):
+        return self._redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _failed(self, action, key, error):
+        logger.warning("Graph cache: Redis %s of %s failed (%s), not using it for %ds",
+                       action, key, error, RETRY_AFTER)
+        self._redis_retry_at = time.monotonic() + RETRY_AFTER
+
+    def _load(self, key):
+        if not self._available():
+            return None
+        try:
+            text = self._redis.get(key)
+        except redis.RedisError as e:
+            self._failed('read', key, e)
+            return None
+        if text is None:
+            return None
+        try:
+            compiled = CompiledGraph.from_json(text)
+        except (ValueError, TypeError) as e:
+            logger.warning("Graph cache: unreadable entry %s (%s), compiling again", key, e)
+            return None
+        logger.debug("Compiled graph %s from Redis", key)
+        return compiled
+
+    def _save(self, key, compiled):
+        if not self._available():
+            return
+        try:
+            text = compiled.to_json()
+        except (ValueError, TypeError) as e:
+            logger.debug("Graph cache: %s kept in memory only (%s)", key, e)
+            return
+        try:
+            self._redis.set(key, text, ex=self._ttl)
+        except redis.RedisError as e:
+            self._failed('write', key, e)
+
+
+def redis_client():
+    # Created directly, as in utils/rate_limiter.py, to avoid circular imports;
+    # short timeouts and no retries so a missing Redis costs a compile, not a
+    # stalled run
+    return redis.Redis(host='redis', port=6379, db=0,
+                       socket_connect_timeout=0.5, socket_timeout=0.5,
+                       retry=Retry(NoBackoff(), 0))
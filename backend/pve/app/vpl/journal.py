@@ -0,0 +1,115 @@
+# app/vpl/journal.py
+"""
+Trade events of a run, kept as records instead of log lines.
+
+Every order created, filled, cancelled or looked up in a backtest used to
+format an f-string for logger.info, and inside the Celery task each of
+those lines also went out as a Socket.IO emit. A grid backtest makes tens
+of thousands of them. The trade nodes and update_orders now append one
+tuple per event to Node.journal, (kind, bar time, ...) with the values as
+they were at that moment, and nothing is formatted during the run.
+
+render() turns events into the old messages on demand; process_graph logs a
+count per kind and the last TAIL events of a backtest, and flushes the few
+events of each incremental (bot) bar to the log right away. Live API calls
+still log as they happen.
+"""
+from collections import Counter
+
+TAIL = 50
+
+ORDER_CREATED = 'order_created'              # node, direction, type, qty, price, id
+CONDITIONAL_CREATED = 'conditional_created'  # node, direction, qty, trigger price, id
+ORDER_CANCELLED = 'order_cancelled'          # node, direction, id
+NOTHING_TO_CANCEL = 'nothing_to_cancel'      # node
+MODIFY_SKIPPED = 'modify_skipped'            # node, id
+LAST_ORDER = 'last_order'                    # node, direction, type, id, status, price, qty, cancelled
+ORDER_FILLED = 'order_filled'                # id, category, type, direction, trigger, price, qty, low, high, close
+MESSAGE_SKIPPED = 'message_skipped'          # node
+
+
+def _side(direction):
+    return "BUY" if direction else "SELL"
+
+
+def _filled(symbol, oid, category, kind, direction, trigger, price, qty, low, high, close):
+    if category == 'conditional':
+        if trigger is None:
+            return f"[CONDITIONAL ORDER EXECUTED] {oid} immediately (no trigger_price)."
+        if direction:
+            return (f"[CONDITIONAL ORDER EXECUTED] BUY conditional order {oid} executed: "
+                    f"Symbol: {symbol}, current high {high} >= trigger {trigger}, Qty: {qty}")
+        return (f"[CONDITIONAL ORDER EXECUTED] SELL conditional order {oid} executed: "
+                f"Symbol: {symbol}, current low {low} <= trigger {trigger}, Qty: {qty}")
+    if kind == 'market':
+        return (f"[MARKET ORDER EXECUTED] {_side(direction)} market order {oid} executed immediately: "
+                f"Symbol: {symbol}, Price: {close}, Qty: {qty}")
+    if direction:
+        return (f"[LIMIT ORDER EXECUTED] BUY limit order {oid} executed: "
+                f"Symbol: {symbol}, current low {low} <= order price {price}, Qty: {qty}")
+    return (f"[BACKTEST LIMIT ORDER EXECUTED] SELL limit order {oid} executed: "
+            f"Symbol: {symbol}, current high {high} >= order price {price}, Qty: {qty}")
+
+
+_MESSAGES = {
+    ORDER_CREATED: lambda symbol, node, direction, kind, qty, price, oid: (
+        f"[BACKTEST ORDER CREATED] Node {node}: {_side(direction)} {kind} order - "
+        f"Symbol: {symbol}, Qty: {qty}, Price: {price}, Local ID: {oid}"),
+    CONDITIONAL_CREATED: lambda symbol, node, direction, qty, trigger, oid: (
+        f"[BACKTEST CONDITIONAL ORDER CREATED] Node {node}: {_side(direction)} conditional order - "
+        f"Symbol: {symbol}, Qty: {qty}, Trigger Price: {trigger}, Local ID: {oid}"),
+    ORDER_CANCELLED: lambda symbol, node, direction, oid: (
+        f"[BACKTEST ORDER CANCELLED] Node {node}: {_side(direction)} order cancelled - "
+        f"Symbol: {symbol}, Local ID: {oid}"),
+    NOTHING_TO_CANCEL: lambda symbol, node: (
+        f"CancelAllOrderNode {node}: no open orders to cancel, skipping."),
+    MODIFY_SKIPPED: lambda symbol, node, oid: (
+        f"[ORDER MODIFY SKIPPED] Node {node}: No changes needed for order {oid}"),
+    LAST_ORDER: lambda symbol, node, direction, kind, oid, status, price, qty, cancelled: (
+        f"[LAST ORDER] Node {node}: {_side(direction)} {kind} order {oid} - "
+        f"Symbol: {symbol}, Status: {status}, Price: {price}, Qty: {qty}, Cancelled: {cancelled}"),
+    ORDER_FILLED: _filled,
+    MESSAGE_SKIPPED: lambda symbol, node: (
+        f"SendMessageNode {node}: Condition not met, stop of execution."),
+}
+
+
+class Journal:
+    """Append-only list of (kind, bar time, *fields) event tuples."""
+    __slots__ = ('events',)
+
+    def __init__(self):
+        self.events = []
+
+    def add(self, *event):
+        self.events.append(event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def counts(self):
+        return Counter(event[0] for event in self.events)
+
+    def render(self, symbol=None, events=None):
+        """The events (all by default) as log messages, oldest first."""
+        for kind, time, *fields in self.events if events is None else events:
+            message = _MESSAGES[kind](symbol, *fields)
+            yield message if time is None else f"{time} {message}"
+
+    def summarize(self, logger, symbol=None, tail=TAIL):
+        """Log how many events of each kind the run had and the last `tail`."""
+        if not self.events:
+            return
+        counts = ', '.join(f"{n} {kind}" for kind, n in sorted(self.counts().items()))
+        logger.info("Trade journal: %d events (%s)", len(self.events), counts)
+        if len(self.events) > tail:
+            logger.info("Trade journal: last %d events", tail)
+        for message in self.render(symbol, self.events[-tail:]):
+            logger.info(message)
+
+    def flush(self, logger, symbol=None, since=0):
+        """Log the events from index `since` on, then drop them all
+        (incremental runs: one bar's worth; older ones were summarized)."""
+        for message in self.render(symbol, self.events[since:]):
+            logger.info(message)
+        self.events.clear()
@@ -1,10 +1,12 @@
 # app/vpl/nodes.py
 import logging
 import traceback
+import numpy as np
 import pandas as pd
 import json
 import time
 import threading
+from functools import partial
 from flask import current_app
 import asyncio
 import telegram
@@ -16,6 +18,18 @@ from pybit.unified_trading import HTTP
 from .utils import (
     fetch_data
 )
+from .columnar import execute_columnar, pure_prefix, ColumnarUnsupported
+from .codegen import compile_bar_loop, CodegenUnsupported
+from .optimize import optimize as optimize_dag, lazy_arguments
+from .graphcache import CompiledGraph, GraphCache, redis_client as graphcache_redis
+from .profiler import Profile
+from .progress import BarProgress
+from . import journal
+from .journal import Journal
+from .orderbook import OrderBook, PositionLedger
+from .bars import BarCursor
+from .buffers import SeriesBuffer
+from .streaming import make_ma, state_lookback, RollingExtreme, RSI, SuperTrend
 
 default_category = 'linear'
 
@@ -39,9 +53,13 @@ class _NodeMeta(type):
         "df":              lambda: None,
         "symbol":          lambda: None,
         "instrument_specs": lambda: None,
-        "mode":            lambda: "backtest",
+        "runtime_mode":    lambda: "backtest",
         "api_key":         lambda: None,
         "api_secret":      lambda: None,
+        "book":            lambda: OrderBook(),
+        "order_index":     lambda: {},
+        "ledger":          lambda: PositionLedger(),
+        "journal":         lambda: Journal(),
     }
 
     def _ensure(cls):
@@ -75,8 +93,25 @@ class Node(metaclass=_NodeMeta):
     """Core VPL node. The runtime-specific attributes (orders, df, etc.) are
     now automatically isolated per thread so that each bot operates on its
     own independent state.
+
+    Nodes are slotted (every subclass declares the state it adds). Input
+    ports are numbered: input_values is a list indexed by slot, holding at
+    least `n_inputs` slots, the ports the node's execute() reads. A slot
+    with no link keeps its value for the whole run (folded constants are put
+    there, see optimize.py). Output ports keep the names the editor gives
+    them in output_values.
+
+    Nodes with a `trigger` slot only act on bars where triggered() holds for
+    it; otherwise execute() comes down to idle().
     """
 
+    __slots__ = ('id', 'type', 'properties', 'inputs', 'outputs',
+                 'input_values', 'output_values', 'input_connections',
+                 'output_connections', 'input_conn_list', 'bybit', 'mode')
+
+    n_inputs = 0
+    trigger = None          # input slot gating execute(): trade / telegram nodes
+
     # ------------------------------------------------------------------
 
     def __init__(self, node_id, node_type, properties, inputs, outputs,
@@ -86,27 +121,93 @@ class Node(metaclass=_NodeMeta):
         self.properties = properties
         self.inputs = inputs
         self.outputs = outputs
-        self.input_values = {}
+        self.input_values = [None] * max(len(inputs or ()), self.n_inputs)
         self.output_values = {}
         self.input_connections = {}
         self.output_connections = {}
+        self.input_conn_list = []
         self.bybit = None
-        self.mode = mode if mode is not None else Node.mode
+        self.mode = mode if mode is not None else Node.runtime_mode
         if self.mode == 'live' and self.bybit is None:
             self.bybit = HTTP(
                 api_key=api_key if api_key is not None else Node.api_key,
                 api_secret=api_secret if api_secret is not None else Node.api_secret,
             )
 
+    def triggered(self, value):
+        """Whether `value` on the trigger slot makes execute() act this bar."""
+        return value == 'GO'
+
+    def idle(self):
+        """What execute() does on a bar its trigger is off: lets the bar loop
+        skip the node, and the pure nodes computing its arguments, then."""
+        self.output_values['Exec'] = None
+
+    def lookback(self, window=None):
+        """
+        Bars of history, the current one included, this node needs on top of
+        settled inputs before its output stops depending on where the history
+        started. Windowed nodes read their window from a constant input (or
+        take `window`) and return None when only the run can tell it.
+        """
+        return 1
+
+    def constant_window(self, slot):
+        """The window in `slot` when it is a literal (a folded constant, see
+        optimize.py), else None."""
+        if slot in self.input_connections or slot >= len(self.input_values):
+            return None
+        try:
+            window = int(self.input_values[slot])
+        except (ValueError, TypeError):
+            return None
+        return window if window > 0 else None
+
     @classmethod
     def configure_runtime(cls, mode, api_key, api_secret):
-        cls.mode = mode
+        cls.runtime_mode = mode
         cls.api_key = api_key
         cls.api_secret = api_secret
 
     @classmethod
     def set_orders(cls, orders):
         cls.orders = orders
+        cls.book = OrderBook(o for o in orders if o.get('status') == 'open')
+        cls.ledger = PositionLedger(orders)
+        cls.order_index = {}
+        for o in orders:
+            cls.index_order(o)
+
+    @classmethod
+    def reset_orders(cls):
+        """Drop every order record, the open-order book, the id index, the
+        position and the trade journal."""
+        cls.orders = []
+        cls.order_id_counter = 0
+        cls.book = OrderBook()
+        cls.order_index = {}
+        cls.ledger = PositionLedger()
+        cls.journal = Journal()
+
+    @classmethod
+    def register_order(cls, order):
+        """Record a newly created order: history list, open-order book, id index."""
+        cls.orders.append(order)
+        cls.book.add(order)
+        cls.index_order(order)
+
+    @classmethod
+    def index_order(cls, order):
+        """(Re)index an order under its local id and, once known, its remote id."""
+        index = cls.order_index
+        index.setdefault(order['id'], order)
+        if order.get('remote_id') is not None:
+            index.setdefault(order['remote_id'], order)
+
+    @classmethod
+    def find_order(cls, order_id):
+        """Order record for a local or remote id, None if unknown."""
+        return cls.order_index.get(order_id)
 
     @classmethod
     def get_orders(cls):
@@ -179,53 +280,74 @@ def retry(max_attempts=3, delays=None):
     return decorator
 
 class GetOpenNode(Node):
+    __slots__ = ()
+
     def execute(self, row):
         open_value = row.get('open', None)
         self.output_values['open'] = open_value
 
 class GetCloseNode(Node):
+    __slots__ = ()
+
     def execute(self, row):
         close_value = row.get('close', None)
         self.output_values['close'] = close_value
 
 class GetHighNode(Node):
+    __slots__ = ()
+
     def execute(self, row):
         high_value = row.get('high', None)
         self.output_values['high'] = high_value
 
 class GetLowNode(Node):
+    __slots__ = ()
+
     def execute(self, row):
         low_value = row.get('low', None)
         self.output_values['low'] = low_value
 
 class GetVolumeNode(Node):
+    __slots__ = ()
+
     def execute(self, row):
         volume_value = row.get('volume', None)
         self.output_values['volume'] = volume_value
 
 class SetFloatNode(Node):
+    __slots__ = ()
+
     def execute(self, row=None):
         float_value = self.properties.get('value', 1.0)
         self.output_values['Float'] = float_value
 
 class SetIntegerNode(Node):
+    __slots__ = ()
+
     def execute(self, row=None):
         integer_value = self.properties.get('value', 1)
         self.output_values['Integer'] = integer_value
 
 class SetStringNode(Node):
+    __slots__ = ()
+
     def execute(self, row=None):
         string_value = self.properties.get('value', '')
         self.output_values['String'] = string_value
 
 class SetBoolNode(Node):
+    __slots__ = ()
+
     def execute(self, row=None):
         bool_value = self.properties.get('value', False)
         self.output_values['Bool'] = bool_value
 
 class IsNoneNode(Node):
+    __slots__ = ()
+    n_inputs = 1
+
     def execute(self, row=None):
-        value = self.input_values.get(0)
+        value = self.input_values[0]
         is_none = (value is None)
         self.output_values['None?'] = is_none
         #logger.info(f"IsNoneNode {self.id}: Value is None? {is_none}")
@@ -264,28 +386,34 @@ def adjust_order_parameters(requested_qty, requested_price, specs):
     )
 
 class CreateOrderNode(Node):
+    __slots__ = ('last_order',)
+    n_inputs = 5
+    trigger = 0
+
     def __init__(self, node_id, node_type, properties, inputs, outputs,
                  mode='backtest', api_key=None, api_secret=None):
         super().__init__(node_id, node_type, properties, inputs, outputs,
                          mode, api_key, api_secret)
         self.last_order = None
 
+    def idle(self):
+        # propagate last ID even when no new order
+        if self.last_order:
+            self.output_values['ID'] = self.last_order['id']
+        self.output_values['Exec'] = None
+
     @retry(max_attempts=3)
     def _api_place_order(self, **params):
         return self.bybit.place_order(**params)
 
     def execute(self, row=None):
-        trigger = self.input_values.get(0)
-        if trigger != 'GO':
-            # propagate last ID even when no new order
-            if self.last_order:
-                self.output_values['ID'] = self.last_order['id']
-            self.output_values['Exec'] = None
-            return None
+        trigger = self.input_values[0]
+        if not self.triggered(trigger):
+            return self.idle()
 
-        direction = self.input_values.get(1)
-        is_limit  = self.input_values.get(2)
-        qty       = self.input_values.get(4)
+        direction = self.input_values[1]
+        is_limit  = self.input_values[2]
+        qty       = self.input_values[4]
         timestamp = row.get('date')
         if None in (direction, is_limit, qty):
             logger.error(f"CreateOrderNode {self.id}: Missing inputs")
@@ -305,7 +433,7 @@ class CreateOrderNode(Node):
         # adjust qty & price
         direction_text = "BUY" if direction else "SELL"
         if is_limit:
-            price_in = self.input_values.get(3)
+            price_in = self.input_values[3]
             adj_qty, adj_price = adjust_order_parameters(qty, price_in, specs)
             exec_time = None
         else:
@@ -314,7 +442,7 @@ class CreateOrderNode(Node):
             exec_time = timestamp
 
         # create local order record
-        ts = int(row.get('date').timestamp() * 1e3)  # e.g. 1682000000123
+        ts = row.time_ms()  # e.g. 1682000000123
         seq = Node.order_id_counter  # small in‑memory counter
         link_id = f"local_{seq}_{ts}"  # local_1682000000123_0
         Node.order_id_counter = seq + 1
@@ -332,7 +460,7 @@ class CreateOrderNode(Node):
             'order_category' : 'normal'
         }
 
-        Node.orders.append(order)
+        Node.register_order(order)
         self.last_order = order
 
         # send to Bybit if live
@@ -362,6 +490,7 @@ class CreateOrderNode(Node):
             if res.get('retCode') == 0:
                 oid = res['result']['orderId']
                 order['remote_id']   = oid
+                Node.index_order(order)
                 order['time_executed'] = exec_time
                 order['status']      = 'open'
                 logger.info(f"[LIVE ORDER CREATED] Node {self.id}: {direction_text} {order['type']} order - "
@@ -372,11 +501,9 @@ class CreateOrderNode(Node):
                 msg = res.get('retMsg', '<no message>')
                 logger.error(f"[LIVE ORDER FAILED] Node {self.id}: Place failed, retCode={res.get('retCode')} msg={msg}")
 
-        # Log the order creation regardless of mode
         if self.mode == 'backtest':
-            logger.info(f"[BACKTEST ORDER CREATED] Node {self.id}: {direction_text} {order['type']} order - "
-                       f"Symbol: {Node.get_symbol()}, Qty: {abs(adj_qty)}, Price: {adj_price}, "
-                       f"Local ID: {link_id}")
+            Node.journal.add(journal.ORDER_CREATED, timestamp, self.id, direction, order['type'],
+                             order['quantity'], adj_price, link_id)
 
 
         if self.mode == 'live' and order.get('remote_id') is not None:
@@ -388,27 +515,34 @@ class CreateOrderNode(Node):
         return order['id']
 
 class CreateConditionalOrderNode(Node):
+    __slots__ = ('last_order',)
+    n_inputs = 4
+    trigger = 0
+
     def __init__(self, node_id, node_type, properties, inputs, outputs,
                  mode='backtest', api_key=None, api_secret=None):
         super().__init__(node_id, node_type, properties, inputs, outputs,
                          mode, api_key, api_secret)
         self.last_order = None
 
+    def idle(self):
+        # propagate last ID even when no new order
+        if self.last_order:
+            self.output_values['ID'] = self.last_order['id']
+        self.output_values['Exec'] = None
+
     @retry(max_attempts=3)
     def _api_place_conditional(self, **params):
         return self.bybit.place_order(**params)
 
     def execute(self, row=None):
-        trigger = self.input_values.get(0)
-        if trigger != 'GO':
-            if self.last_order:
-                self.output_values['ID'] = self.last_order['id']
-            self.output_values['Exec'] = None
-            return None
+        trigger = self.input_values[0]
+        if not self.triggered(trigger):
+            return self.idle()
 
-        direction     = self.input_values.get(1)
-        trigger_price = self.input_values.get(2)
-        qty           = self.input_values.get(3)
+        direction     = self.input_values[1]
+        trigger_price = self.input_values[2]
+        qty           = self.input_values[3]
         timestamp     = row.get('date')
         if None in (direction, trigger_price, qty):
             logger.error(f"CreateConditionalOrderNode {self.id}: Missing inputs")
@@ -430,7 +564,7 @@ class CreateConditionalOrderNode(Node):
         adj_qty, adj_price = adjust_order_parameters(qty, trigger_price, specs)
 
         # create local order record with a single link_id
-        ts = int(row.get('date').timestamp() * 1e3)  # e.g. 1682000000123
+        ts = row.time_ms()  # e.g. 1682000000123
         seq = Node.order_id_counter  # small in‑memory counter
         link_id = f"local_{seq}_{ts}"  # local_1682000000123_0
         Node.order_id_counter = seq + 1
@@ -449,7 +583,7 @@ class CreateConditionalOrderNode(Node):
             'order_category': 'conditional',
         }
 
-        Node.orders.append(order)
+        Node.register_order(order)
         self.last_order = order
 
         # send to Bybit if live
@@ -477,6 +611,7 @@ class CreateConditionalOrderNode(Node):
             if res.get('retCode') == 0:
                 oid = res['result']['orderId']
                 order['remote_id'] = oid
+                Node.index_order(order)
                 logger.info(f"[LIVE CONDITIONAL ORDER CREATED] Node {self.id}: {direction_text} conditional order - "
                            f"Symbol: {Node.get_symbol()}, Qty: {abs(adj_qty)}, Trigger Price: {adj_price}, "
                            f"Remote ID: {oid}, Local ID: {link_id}")
@@ -485,12 +620,9 @@ class CreateConditionalOrderNode(Node):
                 msg = res.get('retMsg', '<no message>')
                 logger.error(f"[LIVE CONDITIONAL ORDER FAILED] Node {self.id}: Failed retCode={res.get('retCode')} msg={msg}")
 
-        # Log the order creation regardless of mode
-
         if self.mode == 'backtest':
-            logger.info(f"[BACKTEST CONDITIONAL ORDER CREATED] Node {self.id}: {direction_text} conditional order - "
-                       f"Symbol: {Node.get_symbol()}, Qty: {abs(adj_qty)}, Trigger Price: {adj_price}, "
-                       f"Local ID: {link_id}")
+            Node.journal.add(journal.CONDITIONAL_CREATED, timestamp, self.id, direction,
+                             order['quantity'], adj_price, link_id)
 
 
         # outputs back to graph
@@ -503,20 +635,24 @@ class CreateConditionalOrderNode(Node):
         return order['id']
 
 class CancelOrderNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+    trigger = 0
+
     @retry(max_attempts=3)
     def _api_cancel_order(self, **params):
         return self.bybit.cancel_order(**params)
 
     def execute(self, row=None):
-        trigger = self.input_values.get(0)
-        local_id = self.input_values.get(1)
-        if trigger != 'GO' or local_id is None or trigger is None:
-            self.output_values['Exec'] = None
-            return None
-        order = next((o for o in Node.orders if o['id'] == local_id), None)
+        trigger = self.input_values[0]
+        local_id = self.input_values[1]
+        if not self.triggered(trigger) or local_id is None:
+            return self.idle()
+        order = Node.find_order(local_id)
         if not order:
             self.output_values['Exec'] = None
             return None
+        was_executed = order['status'] == 'executed'
         if self.mode == 'live':
             params = {
                 'category': current_app.config.get('BYBIT_CATEGORY', default_category),
@@ -527,6 +663,7 @@ class CancelOrderNode(Node):
             if res.get('retCode') == 0:
                 order['status'] = 'cancelled'
                 order['time_executed'] = row.get('date')
+                Node.book.remove(order)
                 direction_text = "BUY" if order.get('direction') else "SELL"
                 logger.info(f"[LIVE ORDER CANCELLED] Node {self.id}: {direction_text} order cancelled - "
                            f"Symbol: {Node.get_symbol()}, Local ID: {order['id']}, "
@@ -539,13 +676,19 @@ class CancelOrderNode(Node):
         else:
             order['status'] = 'cancelled'
             order['time_executed'] = row.get('date')
-            direction_text = "BUY" if order.get('direction') else "SELL"
-            logger.info(f"[BACKTEST ORDER CANCELLED] Node {self.id}: {direction_text} order cancelled - "
-                       f"Symbol: {Node.get_symbol()}, Local ID: {order['id']}")
+            Node.book.remove(order)
+            if was_executed:
+                Node.ledger.forget(order)
+            Node.journal.add(journal.ORDER_CANCELLED, order['time_executed'], self.id,
+                             order.get('direction'), order['id'])
         self.output_values['Exec'] = 'GO'
         return True
 
 class CancelAllOrderNode(Node):
+    __slots__ = ()
+    n_inputs = 1
+    trigger = 0
+
 
     @retry(max_attempts=3)
     def _api_cancel_all(self, **params):
@@ -556,13 +699,12 @@ class CancelAllOrderNode(Node):
         return self.bybit.cancel_all_orders(**params)
 
     def execute(self, row=None):
-        trigger = self.input_values.get(0)
-        if trigger != 'GO':
-            self.output_values['Exec'] = None
-            return None
+        trigger = self.input_values[0]
+        if not self.triggered(trigger):
+            return self.idle()
 
         # collect only the local orders we think are still open
-        open_orders = [o for o in Node.orders if o['status'] == 'open']
+        open_orders = Node.book.open_orders()
 
         if self.mode == 'live' and open_orders:
             try:
@@ -580,34 +722,37 @@ class CancelAllOrderNode(Node):
 
         elif not open_orders:
             # nothing to cancel anywhere
-            logger.info(f"CancelAllOrderNode {self.id}: no open orders to cancel, skipping.")
+            Node.journal.add(journal.NOTHING_TO_CANCEL, row.get('date'), self.id)
 
         # always mark our local opens as cancelled
         for o in open_orders:
             o['status'] = 'cancelled'
             o['time_executed'] = row.get('date')
+            Node.book.remove(o)
 
         self.output_values['Exec'] = 'GO'
         return True
 
 class ModifyOrderNode(Node):
+    __slots__ = ()
+    n_inputs = 4
+    trigger = 0
+
     @retry(max_attempts=3)
     def _api_amend_order(self, **params):
         return self.bybit.amend_order(**params)
 
     def execute(self, row=None):
-        trigger   = self.input_values.get(0)
-        local_id  = self.input_values.get(1)
-        new_price = self.input_values.get(2)
-        new_qty   = self.input_values.get(3)
+        trigger   = self.input_values[0]
+        local_id  = self.input_values[1]
+        new_price = self.input_values[2]
+        new_qty   = self.input_values[3]
 
-        if trigger != 'GO' or local_id is None:
-            self.output_values['Exec'] = None
-            return None
+        if not self.triggered(trigger) or local_id is None:
+            return self.idle()
 
-        order = next((o for o in Node.orders
-                      if o['id'] == local_id and o['status'] == 'open'), None)
-        if not order:
+        order = Node.find_order(local_id)
+        if not order or order['status'] != 'open':
             self.output_values['Exec'] = None
             return None
 
@@ -623,7 +768,7 @@ class ModifyOrderNode(Node):
 
         # nothing really changes → pretend it succeeded
         if not price_changed and not qty_changed:
-            logger.info(f"[ORDER MODIFY SKIPPED] Node {self.id}: No changes needed for order {local_id}")
+            Node.journal.add(journal.MODIFY_SKIPPED, row.get('date'), self.id, local_id)
             self.output_values.update({'ID': local_id, 'Exec': 'GO'})
             return local_id
 
@@ -668,6 +813,8 @@ class ModifyOrderNode(Node):
         })
         order['price']    = adj_price
         order['quantity'] = abs(adj_qty)
+        if price_changed:
+            Node.book.reprice(order)
         '''
         if self.mode == 'backtest':
             logger.info(f"[BACKTEST ORDER MODIFIED] Node {self.id}: Order {local_id} modified - "
@@ -681,6 +828,8 @@ class ModifyOrderNode(Node):
 
 
 class GetLastOrderNode(Node):
+    __slots__ = ()
+
     @retry(max_attempts=3)
     def _api_get_open(self, **params):
         return self.bybit.get_open_orders(**params)
@@ -710,24 +859,22 @@ class GetLastOrderNode(Node):
         is_cancelled = (last.get('status') == 'cancelled')
         self.output_values['Cancelled'] = is_cancelled
         
-        # Log last order information
-        direction_text = "BUY" if last.get('direction') else "SELL"
-        order_type = last.get('type', 'unknown')
-        status = last.get('status', 'unknown')
-        logger.info(f"[LAST ORDER] Node {self.id}: {direction_text} {order_type} order {last['id']} - "
-                   f"Symbol: {Node.get_symbol()}, Status: {status}, "
-                   f"Price: {last.get('price')}, Qty: {last.get('quantity')}, "
-                   f"Cancelled: {is_cancelled}")
+        Node.journal.add(journal.LAST_ORDER, row.get('date'), self.id, last.get('direction'),
+                         last.get('type', 'unknown'), last['id'], last.get('status', 'unknown'),
+                         last.get('price'), last.get('quantity'), is_cancelled)
         
         return last
 
 class GetOrderNode(Node):
+    __slots__ = ()
+    n_inputs = 1
+
     @retry(max_attempts=3)
     def _api_get_orders(self, **params):
         return self.bybit.get_open_orders(**params)
 
     def execute(self, row=None):
-        order_id = self.input_values.get(0)
+        order_id = self.input_values[0]
         if order_id is None:
             return None
         if self.mode == 'live':
@@ -744,252 +891,126 @@ class GetOrderNode(Node):
                 return None
             entry = orders_list[0]
 
-            for order in Node.orders:
-                if order['id'] == order_id:
-                    self.output_values['ID'] = entry.get('orderLinkId')
-                    self.output_values['Price'] = float(entry.get('price', 0))
-                    self.output_values['Quantity'] = float(entry.get('qty', 0))
-                    created_ms = int(entry.get('createdTime', 0))
-                    diff = row.get('date').timestamp()*1000 - created_ms
-                    current_time = row.get('date')
-                    self.output_values['Created'] = diff/60000
-                    is_executed = (entry.get('orderStatus') == 'Filled' and order.get('time_executed') == current_time)
-                    is_open = (entry.get('orderStatus') in ('New', 'PartiallyFilled'))
-                    self.output_values['Executed?'] = is_executed
-                    self.output_values['Open?'] = is_open
-                    
-                    # Log order status information
-                    direction_text = "BUY" if order.get('direction') else "SELL"
-                    status = entry.get('orderStatus')
-                    # logger.info(f"[LIVE ORDER STATUS] Node {self.id}: {direction_text} order {order_id} - "
-                    #            f"Symbol: {Node.get_symbol()}, Status: {status}, "
-                    #            f"Price: {float(entry.get('price', 0))}, Qty: {float(entry.get('qty', 0))}, "
-                    #            f"Created: {diff/60000:.1f} min ago, "
-                    #            f"Executed: {is_executed}, Open: {is_open}")
-                    
-                    return entry
-
-        for order in Node.orders:
-            current_time = row.get('date')
-            created = order.get('time_created')
-            if order['id'] == order_id:
-                diff = current_time - Timestamp(created)
-                minutes_diff = diff.total_seconds() / 60
-                is_executed = (order.get('status') == 'executed' and order.get('time_executed') == current_time)
-                is_open = (order['status'] == 'open')
-                
-                self.output_values['ID'] = order['id']
-                self.output_values['Price'] = order['price']
-                self.output_values['Quantity'] = order['quantity']
-                self.output_values['Created'] = minutes_diff
+            order = Node.find_order(order_id)
+            if order is not None:
+                self.output_values['ID'] = entry.get('orderLinkId')
+                self.output_values['Price'] = float(entry.get('price', 0))
+                self.output_values['Quantity'] = float(entry.get('qty', 0))
+                created_ms = int(entry.get('createdTime', 0))
+                diff = row.time_ms() - created_ms
+                current_time = row.get('date')
+                self.output_values['Created'] = diff/60000
+                is_executed = (entry.get('orderStatus') == 'Filled' and order.get('time_executed') == current_time)
+                is_open = (entry.get('orderStatus') in ('New', 'PartiallyFilled'))
                 self.output_values['Executed?'] = is_executed
                 self.output_values['Open?'] = is_open
-                
+
                 # Log order status information
                 direction_text = "BUY" if order.get('direction') else "SELL"
-                status = order.get('status')
-                '''
-                logger.info(f"[BACKTEST ORDER STATUS] Node {self.id}: {direction_text} order {order_id} - "
-                           f"Symbol: {Node.get_symbol()}, Status: {status}, "
-                           f"Price: {order['price']}, Qty: {order['quantity']}, "
-                           f"Created: {minutes_diff:.1f} min ago, "
-                           f"Executed: {is_executed}, Open: {is_open}")
-                '''
-                return order
+                status = entry.get('orderStatus')
+                # logger.info(f"[LIVE ORDER STATUS] Node {self.id}: {direction_text} order {order_id} - "
+                #            f"Symbol: {Node.get_symbol()}, Status: {status}, "
+                #            f"Price: {float(entry.get('price', 0))}, Qty: {float(entry.get('qty', 0))}, "
+                #            f"Created: {diff/60000:.1f} min ago, "
+                #            f"Executed: {is_executed}, Open: {is_open}")
+
+                return entry
+
+        order = Node.find_order(order_id)
+        if order is None:
+            return None
+
+        current_time = row.get('date')
+        diff = current_time - Timestamp(order.get('time_created'))
+        minutes_diff = diff.total_seconds() / 60
+        is_executed = (order.get('status') == 'executed' and order.get('time_executed') == current_time)
+        is_open = (order['status'] == 'open')
+
+        self.output_values['ID'] = order['id']
+        self.output_values['Price'] = order['price']
+        self.output_values['Quantity'] = order['quantity']
+        self.output_values['Created'] = minutes_diff
+        self.output_values['Executed?'] = is_executed
+        self.output_values['Open?'] = is_open
+        return order
 
 class MANode(Node):
+    __slots__ = ('window', 'ma')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.prices = []
         self.window = None
-        self.ma_series = []
-        # State variables for different MA types
-        self.ma_states = {}
+        # Ring-buffer state of the selected MA type (see streaming.py)
+        self.ma = None
+
+    def lookback(self, window=None):
+        window = window or self.constant_window(1)
+        return state_lookback(make_ma(self.properties.get('ma_type', 'ema'), window), window) if window else None
 
     def execute(self, row=None):
-        from .utils import (
-            ma_sma, ma_ema, ma_dema, ma_tema, ma_wma, ma_hma, ma_rma, 
-            ma_linreg, ma_trima, ma_kama, ma_alma, ma_fwma, ma_pwma, 
-            ma_sinwma, ma_swma, ma_zlma, ma_ssf, ma_ssf3, ma_t3, 
-            ma_vidya, ma_mcgd, ma_smma, ma_jma, ma_hwma
-        )
-        
-        price = self.input_values.get(0)
+        price = self.input_values[0]
         if self.window is None:
-            self.window = self.input_values.get(1)
+            self.window = self.input_values[1]
         if price is None or self.window is None:
             self.output_values['Float'] = None
-            self.ma_series.append(None)
             return None
 
-        self.prices.append(price)
-        ma_type = self.properties.get('ma_type', 'ema')
-        
-        # Calculate the moving average based on type
-        ma_value = None
-        
-        if ma_type == 'sma':
-            ma_value = ma_sma(self.prices, self.window)
-            
-        elif ma_type == 'ema':
-            prev_ema = self.ma_states.get('prev_ema')
-            ma_value = ma_ema(price, self.window, prev_ema)
-            self.ma_states['prev_ema'] = ma_value
-            
-        elif ma_type == 'dema':
-            ema1_state = self.ma_states.get('ema1_state')
-            ema2_state = self.ma_states.get('ema2_state')
-            ma_value, ema1_state, ema2_state = ma_dema(self.prices, self.window, ema1_state, ema2_state)
-            self.ma_states['ema1_state'] = ema1_state
-            self.ma_states['ema2_state'] = ema2_state
-            
-        elif ma_type == 'tema':
-            ema1_state = self.ma_states.get('ema1_state')
-            ema2_state = self.ma_states.get('ema2_state')
-            ema3_state = self.ma_states.get('ema3_state')
-            ma_value, ema1_state, ema2_state, ema3_state = ma_tema(self.prices, self.window, ema1_state, ema2_state, ema3_state)
-            self.ma_states['ema1_state'] = ema1_state
-            self.ma_states['ema2_state'] = ema2_state
-            self.ma_states['ema3_state'] = ema3_state
-            
-        elif ma_type == 'wma':
-            ma_value = ma_wma(self.prices, self.window)
-            
-        elif ma_type == 'hma':
-            hma_values = self.ma_states.get('hma_values')
-            ma_value, hma_values = ma_hma(self.prices, self.window, hma_values)
-            self.ma_states['hma_values'] = hma_values
-            
-        elif ma_type == 'rma':
-            prev_rma = self.ma_states.get('prev_rma')
-            ma_value = ma_rma(price, self.window, prev_rma)
-            self.ma_states['prev_rma'] = ma_value
-            
-        elif ma_type == 'linreg':
-            ma_value = ma_linreg(self.prices, self.window)
-            
-        elif ma_type == 'trima':
-            trima_sma1 = self.ma_states.get('trima_sma1')
-            ma_value, trima_sma1 = ma_trima(self.prices, self.window, trima_sma1)
-            self.ma_states['trima_sma1'] = trima_sma1
-            
-        elif ma_type == 'kama':
-            prev_kama = self.ma_states.get('prev_kama')
-            ma_value = ma_kama(self.prices, self.window, prev_kama)
-            self.ma_states['prev_kama'] = ma_value
-            
-        elif ma_type == 'alma':
-            ma_value = ma_alma(self.prices, self.window)
-            
-        elif ma_type == 'fwma':
-            ma_value = ma_fwma(self.prices, self.window)
-            
-        elif ma_type == 'pwma':
-            ma_value = ma_pwma(self.prices, self.window)
-            
-        elif ma_type == 'sinwma':
-            ma_value = ma_sinwma(self.prices, self.window)
-            
-        elif ma_type == 'swma':
-            ma_value = ma_swma(self.prices, self.window)
-            
-        elif ma_type == 'zlma':
-            zlma_ema = self.ma_states.get('zlma_ema')
-            ma_value, zlma_ema = ma_zlma(self.prices, self.window, zlma_ema)
-            self.ma_states['zlma_ema'] = zlma_ema
-            
-        elif ma_type == 'ssf':
-            ssf_prev = self.ma_states.get('ssf_prev')
-            ma_value, ssf_prev = ma_ssf(self.prices, self.window, ssf_prev)
-            self.ma_states['ssf_prev'] = ssf_prev
-            
-        elif ma_type == 'ssf3':
-            ssf3_prev = self.ma_states.get('ssf3_prev')
-            ma_value, ssf3_prev = ma_ssf3(self.prices, self.window, ssf3_prev)
-            self.ma_states['ssf3_prev'] = ssf3_prev
-            
-        elif ma_type == 't3':
-            t3_states = self.ma_states.get('t3_states')
-            ma_value, t3_states = ma_t3(price, self.window, t3_states)
-            self.ma_states['t3_states'] = t3_states
-            
-        elif ma_type == 'vidya':
-            prev_vidya = self.ma_states.get('prev_vidya')
-            ma_value = ma_vidya(self.prices, self.window, prev_vidya)
-            self.ma_states['prev_vidya'] = ma_value
-            
-        elif ma_type == 'mcgd':
-            prev_mcgd = self.ma_states.get('prev_mcgd')
-            ma_value = ma_mcgd(price, self.window, prev_mcgd)
-            self.ma_states['prev_mcgd'] = ma_value
-            
-        elif ma_type == 'smma':
-            prev_smma = self.ma_states.get('prev_smma')
-            is_first = self.ma_states.get('smma_first', True)
-            ma_value = ma_smma(price, self.window, prev_smma, is_first)
-            self.ma_states['prev_smma'] = ma_value
-            self.ma_states['smma_first'] = False
-            
-        elif ma_type == 'jma':
-            jma_state = self.ma_states.get('jma_state')
-            ma_value, jma_state = ma_jma(price, self.window, jma_state)
-            self.ma_states['jma_state'] = jma_state
-            
-        elif ma_type == 'hwma':
-            hwma_state = self.ma_states.get('hwma_state')
-            ma_value, hwma_state = ma_hwma(price, hwma_state)
-            self.ma_states['hwma_state'] = hwma_state
-            
-        else:
-            # Default to SMA for unknown types
-            ma_value = ma_sma(self.prices, self.window)
-            
+        if self.ma is None:
+            self.ma = make_ma(self.properties.get('ma_type', 'ema'), self.window)
+        ma_value = self.ma.update(price)
+
         self.output_values['Float'] = ma_value
-        self.ma_series.append(ma_value)
         return ma_value
 
 class RSINode(Node):
+    __slots__ = ('window', 'rsi')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.prices = []
         self.window = None
-        self.rsi_state = None
+        self.rsi = None
+
+    def lookback(self, window=None):
+        window = window or self.constant_window(1)
+        return state_lookback(RSI(window), window) if window else None
 
     def execute(self, row=None):
-        from .utils import rsi_calculate
-        
-        price = self.input_values.get(0)
+        price = self.input_values[0]
         if self.window is None:
-            self.window = self.input_values.get(1)
+            self.window = self.input_values[1]
         if price is None or self.window is None:
             self.output_values['Float'] = None
             return None
 
-        self.prices.append(price)
-        
         # Calculate RSI
-        rsi_value, self.rsi_state = rsi_calculate(self.prices, self.window, self.rsi_state)
-        
+        if self.rsi is None:
+            self.rsi = RSI(self.window)
+        rsi_value = self.rsi.update(price)
+
         self.output_values['Float'] = rsi_value
         return rsi_value
 
 class SuperTrendNode(Node):
+    __slots__ = ('window', 'supertrend')
+    n_inputs = 4
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.highs = []
-        self.lows = []
-        self.closes = []
         self.window = None
-        self.supertrend_state = None
+        self.supertrend = None
+
+    def lookback(self, window=None):
+        window = window or self.constant_window(3)
+        return state_lookback(SuperTrend(window), window) if window else None
 
     def execute(self, row=None):
-        from .utils import supertrend_calculate
-        
-        high = self.input_values.get(0)
-        low = self.input_values.get(1)
-        close = self.input_values.get(2)
+        high = self.input_values[0]
+        low = self.input_values[1]
+        close = self.input_values[2]
         if self.window is None:
-            self.window = self.input_values.get(3)
+            self.window = self.input_values[3]
         
         if None in (high, low, close, self.window):
             self.output_values['Float'] = None
@@ -998,27 +1019,29 @@ class SuperTrendNode(Node):
         # Get multiplier from properties (set by widget)
         multiplier = self.properties.get('multiplier', 3.0)
 
-        self.highs.append(high)
-        self.lows.append(low)
-        self.closes.append(close)
-        
         # Calculate SuperTrend
-        supertrend_value, self.supertrend_state = supertrend_calculate(
-            self.highs, self.lows, self.closes, self.window, multiplier, self.supertrend_state
-        )
-        
+        if self.supertrend is None:
+            self.supertrend = SuperTrend(self.window)
+        supertrend_value = self.supertrend.update(high, low, close, multiplier)
+
         self.output_values['Float'] = supertrend_value
         return supertrend_value
 
 class CrossOverNode(Node):
+    __slots__ = ('last_a', 'last_b')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
         self.last_a = None
         self.last_b = None
 
+    def lookback(self, window=None):
+        return 2                        # the previous bar's inputs
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"CrossOverNode {self.id}: One or both input values are None.")
             self.output_values['Condition'] = None
@@ -1039,14 +1062,20 @@ class CrossOverNode(Node):
         return condition
 
 class CrossUnderNode(Node):
+    __slots__ = ('last_a', 'last_b')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
         self.last_a = None
         self.last_b = None
 
+    def lookback(self, window=None):
+        return 2                        # the previous bar's inputs
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"CrossUnderNode {self.id}: One or both input values are None.")
             self.output_values['Condition'] = None
@@ -1067,9 +1096,12 @@ class CrossUnderNode(Node):
         return condition
 
 class GreaterNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"GreaterNode {self.id}: One or both input values are None.")
             self.output_values['Bool'] = None
@@ -1085,9 +1117,12 @@ class GreaterNode(Node):
             return None
 
 class LessNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"LessNode {self.id}: One or both input values are None.")
             self.output_values['Bool'] = None
@@ -1103,9 +1138,12 @@ class LessNode(Node):
             return None
 
 class EqualNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             logger.error(f"EqualNode {self.id}: One or both input values are None.")
             self.output_values['Bool'] = None
@@ -1121,9 +1159,12 @@ class EqualNode(Node):
             return None
 
 class AndNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"AndNode {self.id}: One or both input conditions are None.")
             self.output_values['Bool'] = None
@@ -1134,9 +1175,12 @@ class AndNode(Node):
         return result
 
 class OrNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"OrNode {self.id}: One or both input conditions are None.")
             self.output_values['Bool'] = None
@@ -1147,8 +1191,11 @@ class OrNode(Node):
         return result
 
 class NotNode(Node):
+    __slots__ = ()
+    n_inputs = 1
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
+        a = self.input_values[0]
         if a is None:
             #logger.error(f"NotNode {self.id}: Input condition is None.")
             self.output_values['Bool'] = None
@@ -1159,8 +1206,11 @@ class NotNode(Node):
         return result
 
 class IfNode(Node):
+    __slots__ = ()
+    n_inputs = 1
+
     def execute(self, row=None):
-        cond = self.input_values.get(0)
+        cond = self.input_values[0]
         if cond is None:
             #logger.error(f"IfNode {self.id}: Input condition is None.")
             self.output_values['True'] = None
@@ -1177,9 +1227,12 @@ class IfNode(Node):
         return cond
 
 class MultiplyFloatNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             #logger.error(f"MultiplyFloatNode {self.id}: One or both input values are None.")
             self.output_values['Float'] = None
@@ -1195,9 +1248,12 @@ class MultiplyFloatNode(Node):
             return None
 
 class DivideFloatNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             logger.error(f"DivideFloatNode {self.id}: One or both input values are None.")
             self.output_values['Float'] = None
@@ -1217,9 +1273,12 @@ class DivideFloatNode(Node):
             return None
 
 class AddFloatNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             logger.error(f"AddFloatNode {self.id}: One or both input values are None.")
             self.output_values['Float'] = None
@@ -1235,9 +1294,12 @@ class AddFloatNode(Node):
             return None
 
 class SubtractFloatNode(Node):
+    __slots__ = ()
+    n_inputs = 2
+
     def execute(self, row=None):
-        a = self.input_values.get(0)
-        b = self.input_values.get(1)
+        a = self.input_values[0]
+        b = self.input_values[1]
         if a is None or b is None:
             logger.error(f"SubtractFloatNode {self.id}: One or both input values are None.")
             self.output_values['Float'] = None
@@ -1253,10 +1315,13 @@ class SubtractFloatNode(Node):
             return None
 
 class ClipFloatNode(Node):
+    __slots__ = ()
+    n_inputs = 3
+
     def execute(self, row=None):
-        min_val = self.input_values.get(0)
-        max_val = self.input_values.get(1)
-        value = self.input_values.get(2)
+        min_val = self.input_values[0]
+        max_val = self.input_values[1]
+        value = self.input_values[2]
         
         if min_val is None or max_val is None or value is None:
             logger.error(f"ClipFloatNode {self.id}: One or more input values are None.")
@@ -1280,74 +1345,79 @@ class ClipFloatNode(Node):
             return None
 
 class LowestNode(Node):
+    __slots__ = ('window', 'extreme')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.values = []
         self.window = None
+        self.extreme = None
+
+    def lookback(self, window=None):
+        return window or self.constant_window(1)
 
     def execute(self, row=None):
-        value = self.input_values.get(0)
+        value = self.input_values[0]
         if self.window is None:
-            self.window = self.input_values.get(1)
+            self.window = self.input_values[1]
         if value is None or self.window is None:
             self.output_values['Float'] = None
             return None
 
-        self.values.append(value)
-        
-        # Keep only the last 'window' values for efficiency
-        if len(self.values) > self.window:
-            self.values.pop(0)
-        
-        # Calculate the minimum value in the current window
-        if len(self.values) >= self.window:
-            min_value = min(self.values)
-        else:
-            # Not enough values yet, return the minimum of what we have
-            min_value = min(self.values) if self.values else None
-        
+        # Rolling minimum of the last 'window' values (fewer while warming up)
+        if self.extreme is None:
+            self.extreme = RollingExtreme(self.window, 'min')
+        min_value = self.extreme.update(value)
+
         self.output_values['Float'] = min_value
         return min_value
 
 class HighestNode(Node):
+    __slots__ = ('window', 'extreme')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.values = []
         self.window = None
+        self.extreme = None
+
+    def lookback(self, window=None):
+        return window or self.constant_window(1)
 
     def execute(self, row=None):
-        value = self.input_values.get(0)
+        value = self.input_values[0]
         if self.window is None:
-            self.window = self.input_values.get(1)
+            self.window = self.input_values[1]
         if value is None or self.window is None:
             self.output_values['Float'] = None
             return None
 
-        self.values.append(value)
-        
-        # Keep only the last 'window' values for efficiency
-        if len(self.values) > self.window:
-            self.values.pop(0)
-        
-        # Calculate the maximum value in the current window
-        if len(self.values) >= self.window:
-            max_value = max(self.values)
-        else:
-            # Not enough values yet, return the maximum of what we have
-            max_value = max(self.values) if self.values else None
-        
+        # Rolling maximum of the last 'window' values (fewer while warming up)
+        if self.extreme is None:
+            self.extreme = RollingExtreme(self.window, 'max')
+        max_value = self.extreme.update(value)
+
         self.output_values['Float'] = max_value
         return max_value
 
 class SendMessageNode(Node):
-    def execute(self):
-        exec = self.input_values.get(0)
-        message = self.input_values.get(1)  # Input message
-        user_id = self.input_values.get(2)  # Input user ID
+    __slots__ = ()
+    n_inputs = 3
+    trigger = 0
 
-        if exec is None:
-            logger.info(f"SendMessageNode {self.id}: Condition not met, stop of execution.")
-            return
+    def triggered(self, value):
+        return value is not None
+
+    def idle(self):
+        Node.journal.add(journal.MESSAGE_SKIPPED, None, self.id)
+
+    def execute(self, row=None):
+        exec = self.input_values[0]
+        message = self.input_values[1]  # Input message
+        user_id = self.input_values[2]  # Input user ID
+
+        if not self.triggered(exec):
+            return self.idle()
 
         if message is None or user_id is None:
             logger.error(f"SendMessageNode {self.id}: Message or UserID is None.")
@@ -1368,6 +1438,8 @@ class SendMessageNode(Node):
 
 
 class GetPositionNode(Node):
+    __slots__ = ()
+
     @retry(max_attempts=3)
     def _api_get_positions(self, **params):
         """
@@ -1428,73 +1500,8 @@ class GetPositionNode(Node):
             
             return self.output_values
 
-        # Filter executed orders and sort by execution time (or creation time fallback)
-        executed_orders = [o for o in Node.orders if o.get('status') == 'executed']
-        sorted_orders = sorted(
-            executed_orders,
-            key=lambda o: pd.to_datetime(o.get('time_executed') or o.get('time_created'))
-        )
-
-        unmatched_entries = []
-
-        # Process each order in time order and perform offsetting:
-        for order in sorted_orders:
-            qty = order.get('quantity')
-            price = order.get('price')
-            order_time = order.get('time_created')
-            direction = order.get('direction')  # True = BUY, False = SELL
-            remaining_qty = qty
-
-            if direction is True:  # BUY order: try to offset an existing SELL entry (short position)
-                while remaining_qty > 0 and unmatched_entries and unmatched_entries[0]['direction'] is False:
-                    # Offset with the earliest unmatched SELL order
-                    entry = unmatched_entries[0]
-                    if entry['quantity'] > remaining_qty:
-                        entry['quantity'] -= remaining_qty
-                        remaining_qty = 0
-                    else:
-                        remaining_qty -= entry['quantity']
-                        unmatched_entries.pop(0)
-                # Any residual BUY quantity is added as a new unmatched BUY entry.
-                if remaining_qty > 0:
-                    unmatched_entries.append({
-                        'quantity': remaining_qty,
-                        'price': price,
-                        'direction': True,
-                        'time_created': order_time
-                    })
-            else:  # SELL order: try to offset an existing BUY entry (long position)
-                while remaining_qty > 0 and unmatched_entries and unmatched_entries[0]['direction'] is True:
-                    entry = unmatched_entries[0]
-                    if entry['quantity'] > remaining_qty:
-                        entry['quantity'] -= remaining_qty
-                        remaining_qty = 0
-                    else:
-                        remaining_qty -= entry['quantity']
-                        unmatched_entries.pop(0)
-                # If there is residual SELL quantity, it becomes a new unmatched SELL entry.
-                if remaining_qty > 0:
-                    unmatched_entries.append({
-                        'quantity': remaining_qty,
-                        'price': price,
-                        'direction': False,
-                        'time_created': order_time
-                    })
-
-        # Calculate the net position.
-        # BUY entries add, SELL entries subtract (we treat SELL as negative).
-        net_quantity = sum(e['quantity'] if e['direction'] else -e['quantity']
-                           for e in unmatched_entries)
-
-        # Compute the weighted average price.
-        if net_quantity != 0:
-            weighted_price_sum = sum(e['quantity'] * e['price'] for e in unmatched_entries)
-            avg_price = weighted_price_sum / abs(net_quantity)
-        else:
-            avg_price = None
-
-        # Use the earliest creation time among unmatched entries as the "Created" time.
-        created_time = min((e['time_created'] for e in unmatched_entries), default=None)
+        # Net position is kept up to date by the fill engine (update_orders)
+        avg_price, net_quantity, created_time = Node.ledger.position()
 
         # Set output values.
         self.output_values['Price'] = avg_price
@@ -1515,114 +1522,73 @@ class GetPositionNode(Node):
         return self.output_values
 
 class AddSignalNode(Node):
+    __slots__ = ('marker_dates', 'signal_name')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.markers = []
+        self.marker_dates = SeriesBuffer(dtype='int64')     # epoch ns of the bars it fired on
         self.signal_name = properties.get("name", f"Signal_{node_id}")
 
     def execute(self, row=None):
-        signal_value = self.input_values.get(0)
-        name = self.input_values.get(1) or self.signal_name
+        signal_value = self.input_values[0]
 
         if row is None:
             return None
 
-        try:
-            marker_date = pd.to_datetime(row.get('date'))
-        except Exception as e:
-            logger.error(f"AddSignalNode {self.id}: Ошибка преобразования времени: {e}")
-            return None
-
         if signal_value:
-            marker = {
-                "date": marker_date,  # сохраняем напрямую Timestamp
-                "text": name,
-                "position": "belowBar",  # например, под свечой
-                "shape": "circle",
-                "lineWidth": 2
-            }
-            self.markers.append(marker)
-        self.output_values["Markers"] = self.markers
-        return self.markers
+            self.marker_dates.append(row.time_ns())
+        self.output_values["Markers"] = self.marker_dates
+        return self.marker_dates
 
 class AddIndicatorNode(Node):
+    __slots__ = ('indicator_series', 'indicator_name')
+    n_inputs = 2
+
     def __init__(self, node_id, node_type, properties, inputs, outputs):
         super().__init__(node_id, node_type, properties, inputs, outputs)
-        self.indicator_series = []
+        df = Node.get_df()
+        self.indicator_series = SeriesBuffer(len(df) if df is not None else 0)
         self.indicator_name = properties.get("name", f"Indicator_{node_id}")
 
     def execute(self, row=None):
         """
-        На каждом шаге узел получает входное числовое значение (float) и собирает серию.
+        На каждом шаге узел получает входное числовое значение (float) и собирает серию
+        (None хранится как NaN).
         """
-        value = self.input_values.get(0)
-        name_input = self.input_values.get(1)
+        value = self.input_values[0]
+        name_input = self.input_values[1]
         if name_input:
             self.indicator_name = name_input
 
         if value is None:
-            self.indicator_series.append(None)
+            self.indicator_series.append(np.nan)
         else:
             try:
                 self.indicator_series.append(float(value))
             except Exception as e:
                 logger.error(f"AddIndicatorNode {self.id}: Ошибка преобразования значения: {e}")
-                self.indicator_series.append(None)
+                self.indicator_series.append(np.nan)
 
         self.output_values["Series"] = self.indicator_series
         return self.indicator_series
 
-def update_orders(current_price, current_low_price, current_high_price, current_time):
-    for order in Node.orders:
-        if order.get('status') != 'open':
-            continue
-        order_category = order.get('order_category')
-        order_type = order.get('type')
-        direction = order.get('direction')
-        if order_category == 'conditional':
-            trigger_price = order.get('trigger_price')
-            if trigger_price is None:
-                order['status'] = 'executed'
-                order['time_executed'] = current_time
-                logger.info(f"[CONDITIONAL ORDER EXECUTED] {order.get('id')} immediately (no trigger_price).")
-            else:
-                if direction and current_high_price >= trigger_price:
-                    order['status'] = 'executed'
-                    order['time_executed'] = current_time
-                    direction_text = "BUY" if direction else "SELL"
-                    logger.info(f"[CONDITIONAL ORDER EXECUTED] {direction_text} conditional order {order.get('id')} executed: "
-                               f"Symbol: {Node.get_symbol()}, current high {current_high_price} >= trigger {trigger_price}, "
-                               f"Qty: {order.get('quantity')}")
-                elif (not direction) and current_low_price <= trigger_price:
-                    order['status'] = 'executed'
-                    order['time_executed'] = current_time
-                    direction_text = "BUY" if direction else "SELL"
-                    logger.info(f"[CONDITIONAL ORDER EXECUTED] {direction_text} conditional order {order.get('id')} executed: "
-                               f"Symbol: {Node.get_symbol()}, current low {current_low_price} <= trigger {trigger_price}, "
-                               f"Qty: {order.get('quantity')}")
-
-        else:  # normal orders
-            direction_text = "BUY" if direction else "SELL"
-            if order_type == 'market':
-                order['status'] = 'executed'
-                order['time_executed'] = current_time
-                logger.info(f"[MARKET ORDER EXECUTED] {direction_text} market order {order.get('id')} executed immediately: "
-                           f"Symbol: {Node.get_symbol()}, Price: {current_price}, Qty: {order.get('quantity')}")
-            elif order_type == 'limit':
-                order_price = order.get('price')
-                if order_price is not None:
-                    if direction and current_low_price <= order_price:
-                        order['status'] = 'executed'
-                        order['time_executed'] = current_time
-                        logger.info(f"[LIMIT ORDER EXECUTED] {direction_text} limit order {order.get('id')} executed: "
-                                   f"Symbol: {Node.get_symbol()}, current low {current_low_price} <= order price {order_price}, "
-                                   f"Qty: {order.get('quantity')}")
-                    elif (not direction) and current_high_price >= order_price:
-                        order['status'] = 'executed'
-                        order['time_executed'] = current_time
-                        logger.info(f"[BACKTEST LIMIT ORDER EXECUTED] {direction_text} limit order {order.get('id')} executed: "
-                                   f"Symbol: {Node.get_symbol()}, current high {current_high_price} >= order price {order_price}, "
-                                   f"Qty: {order.get('quantity')}")
+def update_orders(bar):
+    # only the open orders touched by the cursor's current bar come back
+    # from the book, in creation order
+    current_low_price, current_high_price = bar.get('low'), bar.get('high')
+    filled = Node.book.fill(current_low_price, current_high_price)
+    if not filled:
+        return
+    current_price, current_time = bar.get('close'), bar.get('date')
+    ledger, add = Node.ledger, Node.journal.add
+    for order in filled:
+        order['status'] = 'executed'
+        order['time_executed'] = current_time
+        ledger.apply(order)
+        add(journal.ORDER_FILLED, current_time, order.get('id'), order.get('order_category'),
+            order.get('type'), order.get('direction'), order.get('trigger_price'), order.get('price'),
+            order.get('quantity'), current_low_price, current_high_price, current_price)
 
 def build_connections(links_data, nodes):
     for link in links_data:
@@ -1675,33 +1641,122 @@ def topological_sort(nodes, graph, in_degree):
     return sorted_nodes
 
 
-def execute_stateful(sorted_ids, nodes):
-    outputs = []
-    df = Node.get_df()
-    # Convert DataFrame to a list of dictionaries to avoid the slow iterrows
-    rows = df.to_dict(orient='records')
-    for row in rows:
-        current_price = row.get('close')
-        current_low_price = row.get('low')
-        current_high_price = row.get('high')
-        current_time = row.get('date')
+def execute_stateful(sorted_ids, nodes, precomputed=None, record=(), rows=None, profile=None,
+                     progress=None):
+    """
+    Per-bar loop over `sorted_ids`. `precomputed` maps (node id, output name)
+    of nodes already evaluated column-wise to their per-bar values; inputs
+    wired to those are read by bar index instead of from the origin node.
+    Nodes get the bar as `row`, a BarCursor (bars.py) over the frame, or
+    over `rows` when given (the last bar, for an incremental run).
+
+    A node with a trigger (trade / telegram) only runs on the bars its
+    trigger is on, and so do the pure nodes only its other inputs need (see
+    lazy_arguments in optimize.py); on the other bars it only idles.
+
+    Nothing is kept per bar unless asked for: `record` lists the
+    (node id, output name) ports to trace (debugging, node inspection), and
+    the result maps each of them to a preallocated object array holding the
+    port's value after every bar.
+
+    With a `profile` (profiler.py), each node's execute and update_orders
+    are swapped for timed wrappers; without one the loop is untouched. A
+    `progress` (progress.py) is ticked as the bars go by.
+    """
+    rows = rows if rows is not None else BarCursor(Node.get_df())
+    recorded = {port: np.full(len(rows), None, dtype=object) for port in record}
+    probes = [(nodes[nid].output_values, name, recorded[(nid, name)]) for nid, name in record]
+
+    precomputed = precomputed or {}
+
+    def run(node):
+        return node.execute if profile is None else profile.node(node)
+
+    def wiring(node, slots=None):
+        live, fed = [], []
+        for slot, origin, out_name in node.input_conn_list:
+            if slots is not None and slot not in slots:
+                continue
+            series = precomputed.get((origin.id, out_name))
+            if series is None:
+                live.append((slot, origin, out_name))
+            else:
+                fed.append((slot, series))
+        return live, fed
+
+    arguments = lazy_arguments(nodes, sorted_ids, keep={nid for nid, _ in record})
+    lazy = {lid for lids in arguments.values() for lid in lids}
+    plan = []
+    for nid in sorted_ids:
+        node = nodes[nid]
+        if nid in lazy:
+            continue
+        if nid not in arguments:
+            plan.append((node, run(node), *wiring(node), None))
+            continue
+        others = set(range(len(node.input_values))) - {node.trigger}
+        args = [(nodes[lid], run(nodes[lid]), *wiring(nodes[lid])) for lid in arguments[nid]]
+        plan.append((node, run(node), *wiring(node, others), (*wiring(node, {node.trigger}), args)))
+    ran = {nodes[lid]: -1 for lid in lazy}
+    update = update_orders if profile is None else profile.update_orders(update_orders)
+    tick = progress.tick if progress is not None else None
+    next_tick = -1 if tick is None else 0
+
+    for i, row in enumerate(rows):
+        if i == next_tick:
+            next_tick = tick(i)
 
         # Update orders only once per row
-        update_orders(current_price, current_low_price, current_high_price, current_time)
+        update(row)
 
         # For each node, update input values from connected outputs
-        for nid in sorted_ids:
-            node = nodes[nid]
-            #logger.debug(f"▶ Node {nid} ({node.type}) inputs: {node.input_values}")
-            for slot, origin, out_name in node.input_conn_list:
+        for node, execute, live, fed, gate in plan:
+            if gate is not None:
+                trigger_live, trigger_fed, args = gate
+                for slot, origin, out_name in trigger_live:
+                    node.input_values[slot] = origin.output_values.get(out_name)
+                for slot, series in trigger_fed:
+                    node.input_values[slot] = series[i]
+                if not node.triggered(node.input_values[node.trigger]):
+                    node.idle()
+                    continue
+                for arg, arg_execute, arg_live, arg_fed in args:
+                    if ran[arg] != i:
+                        ran[arg] = i
+                        for slot, origin, out_name in arg_live:
+                            arg.input_values[slot] = origin.output_values.get(out_name)
+                        for slot, series in arg_fed:
+                            arg.input_values[slot] = series[i]
+                        arg_execute(row)
+            #logger.debug(f"▶ Node {node.id} ({node.type}) inputs: {node.input_values}")
+            for slot, origin, out_name in live:
                 node.input_values[slot] = origin.output_values.get(out_name)
-            node.execute(row)
+            for slot, series in fed:
+                node.input_values[slot] = series[i]
+            execute(row)
             #logger.debug(f"  ↳ Node {nid} outputs: {node.output_values!r}")
 
-        # Cache output_values per node for this row
-        out_row = {nid: nodes[nid].output_values.copy() for nid in sorted_ids}
-        outputs.append(out_row)
-    return outputs
+        for values, name, column in probes:
+            column[i] = values.get(name)
+    if profile is not None:
+        profile.bars += len(rows)
+    return recorded
+
+
+def execute_compiled(sorted_ids, nodes, precomputed=None, record=(), progress=None):
+    """
+    Same as execute_stateful, but the bar loop is first compiled to a
+    straight-line function (see codegen.py). Falls back to the interpreter
+    when the graph has a node the compiler can't handle.
+    """
+    precomputed = precomputed or {}
+    try:
+        loop = compile_bar_loop(sorted_ids, nodes, update_orders, logger, fed=precomputed, record=record)
+    except CodegenUnsupported as e:
+        logger.info("Bar loop not compiled (%s), using the interpreter", e)
+        return execute_stateful(sorted_ids, nodes, precomputed, record, progress=progress)
+    logger.debug("Compiled bar loop:\n%s", loop.source)
+    return loop(BarCursor(Node.get_df()), precomputed, progress)
 
 
 def get_precision_and_min_move_local(symbol, json_filepath="bybit_instruments_info.json"):
@@ -1776,6 +1831,59 @@ def resample_df(df, timeframe):
         }).dropna()
     return df
 
+NODE_CLASSES = {
+    'get/open':                        GetOpenNode,
+    'get/close':                       GetCloseNode,
+    'get/high':                        GetHighNode,
+    'get/low':                         GetLowNode,
+    'get/volume':                      GetVolumeNode,
+
+    'math/multiply_float':             MultiplyFloatNode,
+    'math/add_float':                  AddFloatNode,
+    'math/subtract_float':             SubtractFloatNode,
+    'math/divide_float':               DivideFloatNode,
+    'math/clip_float':                 ClipFloatNode,
+    'math/lowest':                     LowestNode,
+    'math/highest':                    HighestNode,
+
+    'set/float':                       SetFloatNode,
+    'set/string':                      SetStringNode,
+    'set/integer':                     SetIntegerNode,
+    'set/bool':                        SetBoolNode,
+
+    'indicators/ma':                   MANode,
+    'indicators/rsi':                  RSINode,
+    'indicators/super_trend':          SuperTrendNode,
+
+    'tools/add_indicator':             AddIndicatorNode,
+    'tools/add_signal':                AddSignalNode,
+
+    'compare/cross_over':              CrossOverNode,
+    'compare/cross_under':             CrossUnderNode,
+    'compare/equal':                   EqualNode,
+    'compare/smaller':                 LessNode,
+    'compare/greater':                 GreaterNode,
+
+    'logic/and':                       AndNode,
+    'logic/or':                        OrNode,
+    'logic/not':                       NotNode,
+    'logic/if':                        IfNode,
+
+    'trade/cancel_all_order':          CancelAllOrderNode,
+    'trade/cancel_order':              CancelOrderNode,
+    'trade/create_conditional_order':  CreateConditionalOrderNode,
+    'trade/create_order':              CreateOrderNode,
+    'trade/get_position':              GetPositionNode,
+    'trade/get_order':                 GetOrderNode,
+    'trade/get_last_order':            GetLastOrderNode,
+
+    'telegram/send_message':           SendMessageNode,
+
+    'trade/is_none':                   IsNoneNode,
+    'trade/modify_order':              ModifyOrderNode,
+}
+
+
 def build_nodes(nodes_data):
     nodes = {}
     for node_data in nodes_data:
@@ -1785,101 +1893,11 @@ def build_nodes(nodes_data):
         inputs = node_data.get('inputs', [])
         outputs = node_data.get('outputs', [])
 
-        if node_type == 'get/open':
-            node = GetOpenNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'get/close':
-            node = GetCloseNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'get/high':
-            node = GetHighNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'get/low':
-            node = GetLowNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'get/volume':
-            node = GetVolumeNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'math/multiply_float':
-            node = MultiplyFloatNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'math/add_float':
-            node = AddFloatNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'math/subtract_float':
-            node = SubtractFloatNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'math/divide_float':
-            node = DivideFloatNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'math/clip_float':
-            node = ClipFloatNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'math/lowest':
-            node = LowestNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'math/highest':
-            node = HighestNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'set/float':
-            node = SetFloatNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'set/string':
-            node = SetStringNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'set/integer':
-            node = SetIntegerNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'set/bool':
-            node = SetBoolNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'indicators/ma':
-            node = MANode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'indicators/rsi':
-            node = RSINode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'indicators/super_trend':
-            node = SuperTrendNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'tools/add_indicator':
-            node = AddIndicatorNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'tools/add_signal':
-            node = AddSignalNode(node_id, node_type, properties, inputs, outputs)
-
-
-        elif node_type == 'compare/cross_over':
-            node = CrossOverNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'compare/cross_under':
-            node = CrossUnderNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'compare/equal':
-            node = EqualNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'compare/smaller':
-            node = LessNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'compare/greater':
-            node = GreaterNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'logic/and':
-            node = AndNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'logic/or':
-            node = OrNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'logic/not':
-            node = NotNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'logic/if':
-            node = IfNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'trade/cancel_all_order':
-            node = CancelAllOrderNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/cancel_order':
-            node = CancelOrderNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/create_conditional_order':
-            node = CreateConditionalOrderNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/create_order':
-            node = CreateOrderNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/get_position':
-            node = GetPositionNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/get_order':
-            node = GetOrderNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/get_last_order':
-            node = GetLastOrderNode(node_id, node_type, properties, inputs, outputs)
-
-        elif node_type == 'telegram/send_message':
-            node = SendMessageNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/is_none':
-            node = IsNoneNode(node_id, node_type, properties, inputs, outputs)
-        elif node_type == 'trade/modify_order':
-            node = ModifyOrderNode(node_id, node_type, properties, inputs, outputs)
-
-        else:
+        cls = NODE_CLASSES.get(node_type)
+        if cls is None:
             logger.error(f"Unknown node type: {node_type}")
-            node = Node(node_id, node_type, properties, inputs, outputs)
-
-        nodes[node_id] = node
+            cls = Node
+        nodes[node_id] = cls(node_id, node_type, properties, inputs, outputs)
     return nodes
 
 def get_instrument_specs(symbol, json_filepath="bybit_instruments_info.json"):
@@ -1930,81 +1948,74 @@ def get_instrument_specs(symbol, json_filepath="bybit_instruments_info.json"):
 # helpers
 # ---------------------------------------------------------------------------
 
-def _max_lookback(nodes_json: list) -> int:
-    """Return the largest rolling-window size used by any indicator node.
+def _guess_window(node) -> int:
+    """Window of a node whose window input is computed, read off the editor JSON.
 
-    Besides checking common property names (length / period / window), we also
-    look at the second input slot (index 1) which, in LiteGraph-generated JSON,
-    often stores the default window length (e.g. {"inputs":[{"name":"float"},
-    {"name":"window","value":100}]}). This allows a correct lookback even when
-    the parameter is supplied via the UI rather than the *properties* dict.
+    Common property names (length / period / window) first, then the default
+    the editor keeps on the window input slot, then any numeric property or
+    input default, and at last the largest constant feeding the node.
     """
-    w_max = 1
-
-    for n in nodes_json:
-        node_type = n.get("type", "")
-        if not (node_type.startswith("indicators/") or node_type in ("math/lowest", "math/highest")):
+    props = node.properties or {}
+    inputs = node.inputs or []
+    candidates = [props.get(key) for key in ("length", "period", "window")]
+    if len(inputs) > 1 and isinstance(inputs[1], dict):
+        candidates.append(inputs[1].get("value"))
+    for value in candidates:
+        try:
+            if value is not None and int(value) > 0:
+                return int(value)
+        except (ValueError, TypeError):
             continue
 
-        window_val = None
-        props = n.get("properties", {})
-        # check common property keys first
-        for key in ("length", "period", "window"):
-            if key in props and props[key] is not None:
-                window_val = props[key]
-                break
-
-        # fallback – inspect the 2nd input slot's default value (LiteGraph)
-        if window_val is None:
-            inputs = n.get("inputs", [])
-            if len(inputs) > 1:
-                slot1 = inputs[1]
-                window_val = slot1.get("value")  # may be None if linked
-
-        # guard – convert to int safely, defaulting to 1
+    defaults = list(props.values())
+    for inp in inputs:
+        if isinstance(inp, dict):
+            defaults.append(inp.get("value"))
+        elif len(inp) > 2 and isinstance(inp[2], dict):
+            # litegraph sometimes stores as [name, type, {obj}]
+            defaults.append(inp[2].get("value"))
+
+    # constants feeding the node: literal inputs once folded (optimize.py)
+    seen, stack = set(), [node]
+    while stack:
+        n = stack.pop()
+        if n.id in seen:
+            continue
+        seen.add(n.id)
+        if n.type.startswith('set/'):
+            defaults.append((n.properties or {}).get("value"))
+        defaults.extend(v for slot, v in enumerate(n.input_values) if slot not in n.input_connections)
+        stack.extend(o for o, _ in n.input_connections.values())
+
+    w = 1
+    for value in defaults:
         try:
-            w = int(window_val) if window_val is not None else 1
+            w = max(w, int(value))
         except (ValueError, TypeError):
-            w = 1
-
-        # if still 1, attempt to scan *any* numeric property values as fallback
-        if w == 1 and props:
-            for v in props.values():
-                try:
-                    iv = int(v)
-                    if iv > 1:
-                        w = max(w, iv)
-                except (ValueError, TypeError):
-                    continue
+            continue
+    return w
 
-        # final fallback: scan all input slot default values
-        if w == 1 and inputs:
-            for inp in inputs:
-                if isinstance(inp, dict):
-                    val = inp.get("value")
-                else:
-                    # litegraph sometimes stores as [name, type, {obj}]; value may be 3rd element
-                    val = inp[2].get("value") if len(inp) > 2 and isinstance(inp[2], dict) else None
-                try:
-                    iv = int(val)
-                    if iv > 1:
-                        w = max(w, iv)
-                except (ValueError, TypeError):
-                    continue
 
-        w_max = max(w_max, w)
-    
-    # ── 2) gather constants declared by set/integer nodes ─────────────
-    for n in nodes_json:
-        if n.get("type") == "set/integer":
-            try:
-                v = int(n.get("properties", {}).get("value"))
-                w_max = max(w_max, v)
-            except (ValueError, TypeError):
-                continue
+def _graph_lookback(nodes, order) -> int:
+    """Warm-up bars the graph needs before its last bar is fully settled.
 
-    logger.debug("[_max_lookback] computed lookback=%s", w_max)
-    return w_max
+    Each node declares its own lookback (Node.lookback) and it adds up along
+    the edges: a node needing L bars on top of an input that needs M needs
+    L + M - 1 (HMA(50) feeding Highest(200): 56 + 200 - 1). The graph needs
+    the longest such path. A window computed at run time is guessed for that
+    node alone from the editor JSON (_guess_window).
+    """
+    needed = {}
+    for nid in order:
+        node = nodes[nid]
+        own = node.lookback()
+        if own is None:
+            own = node.lookback(_guess_window(node))
+            logger.info("Lookback of node %s (%s) guessed: %d", nid, node.type, own)
+        upstream = max((needed[origin.id] for origin, _ in node.input_connections.values()), default=1)
+        needed[nid] = own + upstream - 1
+    logger.debug("[_graph_lookback] per node: %s", needed)
+    return max(needed.values(), default=1)
 
 
 def _parse_graph_json(graph_json: str) -> dict:
@@ -2032,28 +2043,98 @@ def _initialise_node_runtime(df, symbol, *, reset_state: bool = True):
     Node.set_symbol(symbol)
 
     if reset_state:
-        Node.orders = []
-        Node.order_id_counter = 0
+        Node.reset_orders()
 
     if Node.instrument_specs is None:
         Node.instrument_specs = get_instrument_specs(symbol)
 
 
-def _build_dag(graph_dict):
-    """Return {id:Node}, execution order list."""
+def _compile(graph_dict, optimize=True) -> CompiledGraph:
+    """
+    Build the nodes once to find the execution order, the pure prefix (side-
+    effect-free nodes that can be precomputed column-wise; the rest is the
+    stateful trade suffix) and the lookback. Constants are folded, duplicate
+    nodes merged and dead ones dropped first (see optimize.py) unless
+    `optimize` is False. Only what instantiate_graph needs is kept.
+    """
     nodes = build_nodes(graph_dict['nodes'])
     build_connections(graph_dict['links'], nodes)
+    _index_ports(nodes)
 
-    for node in nodes.values():           # cache static mapping once
+    g, indeg = build_graph(nodes)
+    order = topological_sort(nodes, g, indeg)
+    removed = {'folded': [], 'merged': {}, 'pruned': []}
+    if optimize:
+        order, removed = optimize_dag(nodes, order)
+        logger.info("Optimizer: folded %d constant node(s) %s, merged %d duplicate(s) %s, "
+                    "pruned %d dead node(s) %s",
+                    len(removed['folded']), removed['folded'],
+                    len(removed['merged']), removed['merged'],
+                    len(removed['pruned']), removed['pruned'])
+    _index_ports(nodes)
+
+    prefix = pure_prefix(nodes, order)
+    lookback = _graph_lookback(nodes, order)
+    logger.info("Execution order: %s", order)
+    logger.info("Pure prefix: %d of %d nodes, lookback %d candles", len(prefix), len(order), lookback)
+
+    links, literals = [], []
+    for nid in order:
+        node = nodes[nid]
+        for slot, value in enumerate(node.input_values):
+            link = node.input_connections.get(slot)
+            if link is not None:
+                links.append([len(links), link[0].id, link[1], nid, slot, None])
+            elif value is not None:
+                literals.append([nid, slot, value])
+    return CompiledGraph(
+        nodes=[spec for spec in graph_dict['nodes'] if spec['id'] in nodes],
+        links=links, literals=literals,
+        order=order, prefix=prefix, lookback=lookback,
+        removed={'folded': removed['folded'],
+                 'merged': [[nid, kept] for nid, kept in removed['merged'].items()],
+                 'pruned': removed['pruned']})
+
+
+def compile_graph(graph_json) -> CompiledGraph:
+    return _compile(_parse_graph_json(graph_json))
+
+
+def _index_ports(nodes):
+    """Size input_values to the linked slots and cache each node's
+    (slot, origin, output name) list."""
+    for node in nodes.values():
+        linked = max((slot + 1 for slot in node.input_connections), default=0)
+        if linked > len(node.input_values):
+            node.input_values.extend([None] * (linked - len(node.input_values)))
         node.input_conn_list = [
             (slot, origin, origin.outputs[origin_slot]['name'])
             for slot, (origin, origin_slot) in node.input_connections.items()
         ]
 
-    g, indeg = build_graph(nodes)
-    order = topological_sort(nodes, g, indeg)
-    logger.info("Execution order: %s", order)
-    return nodes, order
+
+def instantiate_graph(compiled: CompiledGraph):
+    """Fresh {id:Node}, execution order and pure prefix for one run."""
+    nodes = build_nodes(compiled.nodes)
+    build_connections(compiled.links, nodes)
+    _index_ports(nodes)
+    for nid, slot, value in compiled.literals:
+        values = nodes[nid].input_values
+        if slot >= len(values):
+            values.extend([None] * (slot + 1 - len(values)))
+        values[slot] = value
+    return nodes, list(compiled.order), list(compiled.prefix)
+
+
+def _build_dag(graph_dict, optimize=True):
+    """
+    Return {id:Node}, execution order list and the pure prefix of that order,
+    built from the graph dict without going through the cache.
+    """
+    return instantiate_graph(_compile(graph_dict, optimize))
+
+
+graph_cache = GraphCache(compile_graph, redis_client=graphcache_redis())
 
 
 def _postprocess_orders(final_df):
@@ -2090,49 +2171,41 @@ def _add_indicator_and_signal_cols(nodes, final_df):
         # ───────────────────── indicators ───────────────────────────
         if node.type == 'tools/add_indicator':
             col = node.properties.get("name", f"Indicator_{node.id}")
-            if node.input_values.get(1) is not None:           # runtime rename
+            if node.input_values[1] is not None:           # runtime rename
                 col = node.input_values[1]
 
-            series_full = getattr(node, "indicator_series", [])
-            if not series_full:
+            series = node.indicator_series.tail(len(final_df))
+            if not len(series):
                 continue                                        # nothing yet
 
-            # tail-slice so the length exactly equals the dataframe length
-            series = series_full[-len(final_df):]
-            if len(series) < len(final_df):                     # pad left
-                series = [None] * (len(final_df) - len(series)) + series
+            # tail-slice so the length exactly equals the dataframe length,
+            # NaN-padded on the left
+            column = np.full(len(final_df), np.nan)
+            column[len(final_df) - len(series):] = series
 
-            final_df[col] = series
+            final_df[col] = column
             #logger.info("Added indicator column '%s' (node %s)", col, node.id)
 
         # ───────────────────── signals / markers ────────────────────
         elif node.type == 'tools/add_signal':
             col = node.properties.get("name", f"Signal_{node.id}")
-            if node.input_values.get(1) is not None:
+            if node.input_values[1] is not None:
                 col = "$" + node.input_values[1]
             if not col.startswith("$"):
                 col = "$" + col
 
-            markers = getattr(node, "markers", [])
-            series = [None] * len(final_df)
+            # only the most recent `len(final_df)` markers, matched against
+            # the frame's dates in one pass
+            dates = pd.DatetimeIndex(final_df['date']).as_unit('ns').asi8
+            fired = np.isin(dates, node.marker_dates.tail(len(final_df)))
 
-            # only inspect the most recent `len(final_df)` markers
-            date_col = final_df['date']
-            for m in markers[-len(final_df):]:
-                dt = m.get('date')
-                if dt is None:
-                    continue
-                idx = date_col[date_col == dt].index
-                for i in idx:
-                    series[i] = col
-
-            final_df[col] = series
+            final_df[col] = np.where(fired, col, None)
             logger.info("Added signal column '%s' (node %s)", col, node.id)
 
 def _apply_runtime(nodes):
     for n in nodes.values():
-        if n.mode != Node.mode: 
-            n.mode = Node.mode
+        if n.mode != Node.runtime_mode:
+            n.mode = Node.runtime_mode
         if n.mode == 'live' and n.bybit is None:
             n.bybit = HTTP(api_key=Node.api_key,
                            api_secret=Node.api_secret)
@@ -2149,19 +2222,23 @@ def process_graph(graph_json,
                   warmup_only=True,
                   dataframe=None,
                   state=None,
-                  incremental=False):
+                  incremental=False,
+                  columnar=False,
+                  compiled=False,
+                  profile=False,
+                  progress=None,
+                  cancelled=None):
     logger.info("Starting graph processing")
     t0 = time.time()
 
     # 1) configure runtime
     Node.configure_runtime(mode, api_key, api_secret)
-    graph_dict = _parse_graph_json(graph_json)
 
     # 2) warm‑up only: return lookback
     if warmup_only:
-        lookback = _max_lookback(graph_dict['nodes'])
-        logger.info("Max lookback (%d candles)", lookback)
-        return None, None, None, lookback
+        compiled = graph_cache.get(graph_json)
+        logger.info("Max lookback (%d candles)", compiled.lookback)
+        return None, None, None, compiled.lookback
 
     # 3) prepare your full history DataFrame
     df = dataframe if dataframe is not None else _prepare_dataframe(symbol, start_date, end_date, timeframe)
@@ -2172,27 +2249,58 @@ def process_graph(graph_json,
     # 5) build or restore the DAG structure
     if incremental and state and 'nodes' in state:
         nodes, exec_order = state['nodes'], state['exec_order']
+        prefix = state.get('prefix', [])
     else:
-        nodes, exec_order = _build_dag(graph_dict)
-        state = {'nodes': nodes, 'exec_order': exec_order}
+        nodes, exec_order, prefix = instantiate_graph(graph_cache.get(graph_json))
+        state = {'nodes': nodes, 'exec_order': exec_order, 'prefix': prefix}
     _apply_runtime(nodes)
 
     # 6) dispatch candles through the nodes
+    run_bars = execute_compiled if compiled else execute_stateful
+    profiler = None
+    if profile:
+        # per-node timings need the interpreter; incremental runs add up
+        profiler = (state.get('profile') if incremental else None) or Profile()
+        state['profile'] = profiler
+        run_bars = partial(execute_stateful, profile=profiler)
+    # progress(bars done, total, bars/sec, ETA seconds) of a full run;
+    # cancelled() -> True stops it with progress.Cancelled
+    bars = None
+    if (progress is not None or cancelled is not None) and not incremental:
+        bars = BarProgress(len(df), progress, cancelled)
+    since = len(Node.journal)
     if incremental:
-        last = df.to_dict(orient='records')[-1]
-        update_orders(last['close'], last['low'], last['high'], last['date'])
-        for nid in exec_order:
-            node = nodes[nid]
-            for slot, origin, name in node.input_conn_list:
-                node.input_values[slot] = origin.output_values.get(name)
-            node.execute(last)
+        execute_stateful(exec_order, nodes, rows=BarCursor(df.iloc[-1:]), profile=profiler)
+    elif columnar and mode == 'backtest' and prefix:
+        # pure prefix: one whole-column call per node; only the trade
+        # suffix (if any) still walks the bars
+        in_prefix = set(prefix)
+        suffix = [nid for nid in exec_order if nid not in in_prefix]
+        try:
+            feeds = execute_columnar(prefix, nodes, df, profile=profiler)
+        except ColumnarUnsupported as e:
+            logger.info("Columnar execution not possible (%s), falling back to per-bar loop", e)
+            run_bars(exec_order, nodes, progress=bars)
+        else:
+            logger.info("Columnar execution of %d nodes over %d bars, %d nodes left per bar",
+                        len(prefix), len(df), len(suffix))
+            if suffix:
+                run_bars(suffix, nodes, feeds, progress=bars)
     else:
-        execute_stateful(exec_order, nodes)
+        run_bars(exec_order, nodes, progress=bars)
+    if bars is not None:
+        bars.finish()
 
     # 7) collect outputs
     final_df = Node.get_df()
     orders   = _postprocess_orders(final_df)
     _add_indicator_and_signal_cols(nodes, final_df)
+    if incremental:
+        Node.journal.flush(logger, symbol, since)
+    else:
+        Node.journal.summarize(logger, symbol)
+    if profiler is not None and not incremental:
+        profiler.log(nodes)
 
     # 8) housekeeping & return
     #final_df.to_csv('test_out3.csv', index=False)
@@ -0,0 +1,182 @@
+# app/vpl/optimize.py
+"""
+Graph rewrites applied once, when the DAG is built (see _compile in nodes.py).
+
+Editor graphs are drawn for people, not for the bar loop. Every set/* node
+re-executes on every bar although its value never changes, math / compare /
+logic nodes wired only to constants recompute the same value every bar, and
+the same indicator often shows up twice (an EMA(50) of the close feeding a
+cross, another one feeding a plot), or is left over from an earlier draft
+and feeds nothing. Three passes remove that work:
+
+  • constant folding: set/* nodes, and the STATELESS nodes (columnar.py)
+    whose inputs are all constant, run their own execute() once, here. Their
+    outputs become literal input values of the nodes they fed (an unlinked
+    slot keeps its input_values entry for the whole run) and they leave the
+    graph;
+  • merging: side-effect-free nodes (a column kernel, tools/* excepted) with
+    the same type, properties and inputs, i.e. the same upstream ports or
+    equal literals, compute the same values on every bar, stateful or not.
+    The first one in execution order is kept and the consumers of the others
+    are rewired to it;
+  • dead nodes: a node none of the nodes with an effect (trade/* and
+    telegram/* nodes, tools/* outputs, any type without a column kernel)
+    depends on is dropped.
+
+The passes run in execution order, so a merge upstream lets identical nodes
+downstream merge too. What every remaining node sees on every bar does not
+change, nor do the results. optimize() returns what it removed.
+
+lazy_arguments() plans the other half, at run time: a node with a `trigger`
+slot (trade / telegram) does nothing on the bars its trigger is off, and the
+pure nodes that only compute its other inputs (price, quantity, ...) need
+not run on those bars either. Being pure, they give the same values when run
+right before the node, on the bars it is triggered. Indicators and anything
+else with state still run on every bar.
+"""
+import json
+
+from .columnar import KERNELS, STATELESS
+
+CONSTANTS = {'set/float', 'set/integer', 'set/string', 'set/bool'}
+
+
+def _detach_inputs(node):
+    """Remove the links into `node` from its origins' output_connections."""
+    for slot, (origin, origin_slot) in node.input_connections.items():
+        targets = origin.output_connections[origin_slot]
+        targets[:] = [(t, s) for t, s in targets if not (t is node and s == slot)]
+        if not targets:
+            del origin.output_connections[origin_slot]
+    node.input_connections.clear()
+
+
+def fold_constants(nodes, order):
+    """Execute the constant nodes once and turn their outputs into literal
+    inputs of their consumers. Returns the ids of the folded nodes."""
+    folded = []
+    for nid in order:
+        node = nodes[nid]
+        if node.input_connections or not (node.type in CONSTANTS or node.type in STATELESS):
+            continue
+        node.execute(None)
+        for origin_slot, targets in node.output_connections.items():
+            value = node.output_values.get(node.outputs[origin_slot]['name'])
+            for target, target_slot in targets:
+                target.input_values[target_slot] = value
+                del target.input_connections[target_slot]
+        node.output_connections.clear()
+        folded.append(nid)
+    return folded
+
+
+def _signature(node):
+    """What the node computes: type, properties, output ports and inputs."""
+    inputs = []
+    for slot, value in enumerate(node.input_values):
+        link = node.input_connections.get(slot)
+        if link is not None:
+            inputs.append((slot, 'port', link[0].id, link[1]))
+        elif value is not None:
+            inputs.append((slot, 'value', type(value).__name__, repr(value)))
+    return (node.type,
+            json.dumps(node.properties, sort_keys=True, default=str),
+            tuple(output.get('name') for output in node.outputs or ()),
+            tuple(inputs))
+
+
+def merge_duplicates(nodes, order):
+    """Rewire the consumers of identical side-effect-free nodes to the first
+    of them. Returns {merged id: id of the node kept instead}."""
+    kept, merged = {}, {}
+    for nid in order:
+        node = nodes[nid]
+        if node.type not in KERNELS or node.type.startswith('tools/'):
+            continue
+        keeper = kept.setdefault(_signature(node), node)
+        if keeper is node:
+            continue
+        for origin_slot, targets in node.output_connections.items():
+            for target, target_slot in targets:
+                target.input_connections[target_slot] = (keeper, origin_slot)
+                keeper.output_connections.setdefault(origin_slot, []).append((target, target_slot))
+        node.output_connections.clear()
+        _detach_inputs(node)
+        merged[nid] = keeper.id
+    return merged
+
+
+def _has_effect(node):
+    return node.type not in KERNELS or node.type.startswith('tools/')
+
+
+def prune_dead(nodes, order):
+    """Detach the nodes no node with an effect depends on. Returns their ids."""
+    needed = set()
+    for nid in reversed(order):
+        node = nodes[nid]
+        if nid in needed or _has_effect(node):
+            needed.add(nid)
+            needed.update(origin.id for origin, _ in node.input_connections.values())
+    dead = [nid for nid in order if nid not in needed]
+    for nid in dead:
+        _detach_inputs(nodes[nid])
+    return dead
+
+
+def optimize(nodes, order):
+    """
+    Fold constants, merge duplicates and drop dead nodes in place: `nodes`
+    loses the removed nodes and the returned execution order skips them.
+    Returns (order, {'folded': [ids], 'merged': {id: kept id}, 'pruned': [ids]}).
+    """
+    folded = fold_constants(nodes, order)
+    removed = set(folded)
+    merged = merge_duplicates(nodes, [nid for nid in order if nid not in removed])
+    removed.update(merged)
+    pruned = prune_dead(nodes, [nid for nid in order if nid not in removed])
+    removed.update(pruned)
+    for nid in removed:
+        del nodes[nid]
+    return ([nid for nid in order if nid not in removed],
+            {'folded': folded, 'merged': merged, 'pruned': pruned})
+
+
+def _is_pure(node):
+    return node.type in STATELESS or node.type.startswith('get/') or node.type in CONSTANTS
+
+
+def lazy_arguments(nodes, order, keep=()):
+    """
+    {id of a node with a trigger: ids, in execution order, of the pure nodes
+    to run right before it on the bars it is triggered}. A pure node is lazy
+    when every node it feeds is in `order` and reads it on a slot other than
+    its trigger, directly or through other lazy nodes. Nodes in `keep` (e.g.
+    recorded ports) run on every bar.
+    """
+    in_order = set(order)
+    lazy = set()
+    for nid in reversed(order):
+        node = nodes[nid]
+        if nid in keep or not _is_pure(node) or not node.output_connections:
+            continue
+        if all(target.id in in_order and
+               (target.id in lazy or (target.trigger is not None and slot != target.trigger))
+               for targets in node.output_connections.values() for target, slot in targets):
+            lazy.add(nid)
+
+    position = {nid: k for k, nid in enumerate(order)}
+    plan = {}
+    for nid in order:
+        node = nodes[nid]
+        if node.trigger is None:
+            continue
+        needs, stack = set(), [origin for slot, (origin, _) in node.input_connections.items()
+                               if slot != node.trigger]
+        while stack:
+            origin = stack.pop()
+            if origin.id in lazy and origin.id not in needs:
+                needs.add(origin.id)
+                stack.extend(o for o, _ in origin.input_connections.values())
+        plan[nid] = sorted(needs, key=position.get)
+    return plan
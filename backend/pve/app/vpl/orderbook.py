@@ -0,0 +1,277 @@
+# app/vpl/orderbook.py
+"""
+Simulated book of the *open* orders, used by update_orders.
+
+Node.orders keeps every order record ever created (it is what the chart,
+the analyzer and the DB get). Scanning it on every bar makes a backtest cost
+bars × total orders, and grid strategies pile up thousands of executed /
+cancelled records. The book only indexes what can still fill:
+
+  • buy limits / sell limits in two price heaps,
+  • buy / sell conditional triggers in two more heaps,
+  • market orders (and conditionals without a trigger) in a "due" list,
+
+so a bar only pops the orders whose price was touched by its low/high.
+
+Per-order data lives in parallel slot columns (record, seq, key) instead of
+extra dicts; heap entries are (key, seq, slot) and are deleted lazily: an
+entry is stale once its slot was released or re-keyed (modify), and a record
+whose status is no longer 'open' (cancelled, API error, ...) is dropped the
+next time it is looked at. Executed records are appended to `history`.
+
+PositionLedger is the matching position side: the fill engine books every
+executed order into it once and GetPositionNode reads the cached result.
+"""
+import heapq
+from collections import deque
+
+import pandas as pd
+
+BUY_LIMIT, SELL_LIMIT, BUY_STOP, SELL_STOP = range(4)
+
+# heaps are min-heaps on `key`; a heap fills while key <= its bar threshold:
+#   buy limit   low  <= price    →  key -price    threshold -low
+#   sell limit  high >= price    →  key  price    threshold  high
+#   buy stop    high >= trigger  →  key  trigger  threshold  high
+#   sell stop   low  <= trigger  →  key -trigger  threshold -low
+_NEGATED = (True, False, False, True)
+
+
+class OrderBook:
+    def __init__(self, orders=()):
+        self.clear()
+        for order in orders:
+            self.add(order)
+
+    def clear(self):
+        self.record = []        # slot -> order record (None when free)
+        self.seq = []           # slot -> creation sequence (0 when free)
+        self.key = []           # slot -> heap key it is indexed at (None: never fills on price)
+        self._free = []
+        self._slots = {}        # order id -> slot
+        self._heaps = ([], [], [], [])
+        self._due = []          # (seq, slot) filled on the next bar whatever the price
+        self._next_seq = 0
+        self._live = 0
+        self.history = []       # executed records, in execution order
+
+    def __len__(self):
+        return self._live
+
+    # ------------------------------------------------------------------
+    # maintenance (called by the order nodes)
+    # ------------------------------------------------------------------
+
+    def add(self, order):
+        """Index a freshly created order record."""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self.record)
+            self.record.append(None)
+            self.seq.append(0)
+            self.key.append(None)
+        self._next_seq += 1
+        self.record[slot] = order
+        self.seq[slot] = self._next_seq
+        self._slots[order['id']] = slot
+        self._live += 1
+        self._index(slot)
+
+    def reprice(self, order):
+        """Re-index an order after its price was modified."""
+        slot = self._slots.get(order['id'])
+        if slot is not None and self.record[slot] is order:
+            self._index(slot)
+
+    def remove(self, order):
+        """Forget an order that was cancelled (no-op if it isn't in the book)."""
+        slot = self._slots.get(order['id'])
+        if slot is not None and self.record[slot] is order:
+            self._release(slot)
+
+    def open_orders(self):
+        """Open records in creation order."""
+        slots = [slot for slot, order in enumerate(self.record)
+                 if order is not None and order.get('status') == 'open']
+        slots.sort(key=self.seq.__getitem__)
+        return [self.record[slot] for slot in slots]
+
+    # ------------------------------------------------------------------
+    # per bar
+    # ------------------------------------------------------------------
+
+    def fill(self, low, high):
+        """
+        Pop every open order touched by this bar and return the records in
+        creation order (the order the old full scan executed them in). The
+        caller marks them executed.
+        """
+        filled = []
+        if self._due:
+            due, self._due = self._due, []
+            for seq, slot in due:
+                if self._valid(slot, seq):
+                    filled.append((seq, slot))
+
+        heaps = self._heaps
+        for book, negated in enumerate(_NEGATED):
+            heap = heaps[book]
+            if not heap:
+                continue
+            limit = -low if negated else high
+            while heap and heap[0][0] <= limit:
+                key, seq, slot = heapq.heappop(heap)
+                if self.key[slot] == key and self._valid(slot, seq):
+                    filled.append((seq, slot))
+
+        if len(filled) > 1:
+            filled.sort()
+        orders = []
+        for seq, slot in filled:
+            if self.seq[slot] != seq:        # same order popped twice (re-keyed to its old price)
+                continue
+            order = self.record[slot]
+            self._release(slot)
+            self.history.append(order)
+            orders.append(order)
+        return orders
+
+    # ------------------------------------------------------------------
+    # internals
+    # ------------------------------------------------------------------
+
+    def _valid(self, slot, seq):
+        if self.seq[slot] != seq:
+            return False
+        if self.record[slot].get('status') != 'open':
+            self._release(slot)
+            return False
+        return True
+
+    def _index(self, slot):
+        order = self.record[slot]
+        seq = self.seq[slot]
+        direction = order.get('direction')
+
+        if order.get('order_category') == 'conditional':
+            price = order.get('trigger_price')
+            if price is None:
+                self.key[slot] = None
+                self._due.append((seq, slot))
+                return
+            book = BUY_STOP if direction else SELL_STOP
+        elif order.get('type') == 'market':
+            self.key[slot] = None
+            self._due.append((seq, slot))
+            return
+        elif order.get('type') == 'limit':
+            price = order.get('price')
+            book = BUY_LIMIT if direction else SELL_LIMIT
+        else:
+            price = None
+
+        if price is None or price != price:     # no price / NaN: can never fill
+            self.key[slot] = None
+            return
+        key = -price if _NEGATED[book] else price
+        self.key[slot] = key
+        heapq.heappush(self._heaps[book], (key, seq, slot))
+        self._maybe_compact()
+
+    def _release(self, slot):
+        order = self.record[slot]
+        if self._slots.get(order['id']) == slot:
+            del self._slots[order['id']]
+        self.record[slot] = None
+        self.seq[slot] = 0
+        self.key[slot] = None
+        self._free.append(slot)
+        self._live -= 1
+
+    def _maybe_compact(self):
+        """Rebuild the heaps once stale entries outnumber live orders."""
+        size = sum(len(h) for h in self._heaps)
+        if size <= 2 * self._live + 64:
+            return
+        for slot, order in enumerate(self.record):
+            if order is not None and order.get('status') != 'open':
+                self._release(slot)
+        for heap in self._heaps:
+            heap[:] = [(key, seq, slot) for key, seq, slot in heap
+                       if self.seq[slot] == seq and self.key[slot] == key]
+            heapq.heapify(heap)
+
+
+class PositionLedger:
+    """
+    FIFO net position of the executed orders, updated once per fill instead
+    of being replayed from every executed order on every bar.
+
+    Open lots are kept oldest first as [quantity, price, direction, order];
+    fills offset lots of the opposite direction from the front, exactly like
+    GetPositionNode's old replay (so `direction is True` is a buy, anything
+    else a sell). Price / quantity and the earliest lot are derived from the
+    lots when asked for after a change and cached until the next one. The
+    creation time itself is read from that lot's record on every call, as the
+    replay did: _postprocess_orders turns the records' timestamps into
+    strings between incremental runs.
+    """
+
+    def __init__(self, orders=()):
+        self.clear()
+        executed = [o for o in orders if o.get('status') == 'executed']
+        executed.sort(key=lambda o: pd.to_datetime(o.get('time_executed') or o.get('time_created')))
+        for order in executed:
+            self.apply(order)
+
+    def clear(self):
+        self.lots = deque()
+        self.applied = []         # executed records, in the order they were applied
+        self._position = (None, 0, None)      # avg price, net quantity, earliest lot's order
+        self._dirty = False
+
+    def apply(self, order):
+        """Book one executed order."""
+        remaining = order.get('quantity')
+        price = order.get('price')
+        buy = order.get('direction') is True
+        lots = self.lots
+
+        while remaining > 0 and lots and (lots[0][2] is not buy):
+            lot = lots[0]
+            if lot[0] > remaining:
+                lot[0] -= remaining
+                remaining = 0
+            else:
+                remaining -= lot[0]
+                lots.popleft()
+        if remaining > 0:
+            lots.append([remaining, price, buy, order])
+
+        self.applied.append(order)
+        self._dirty = True
+
+    def forget(self, order):
+        """An executed order was cancelled after the fact: replay without it."""
+        if not any(o is order for o in self.applied):
+            return
+        applied = [o for o in self.applied if o is not order and o.get('status') == 'executed']
+        self.clear()
+        for o in applied:
+            self.apply(o)
+
+    def position(self):
+        """(average price, net quantity, earliest open-lot creation time)."""
+        if self._dirty:
+            lots = self.lots
+            net_quantity = sum(q if buy else -q for q, _, buy, _ in lots)
+            if net_quantity != 0:
+                avg_price = sum(q * p for q, p, _, _ in lots) / abs(net_quantity)
+            else:
+                avg_price = None
+            first = min((lot[3] for lot in lots), key=lambda o: o.get('time_created'), default=None)
+            self._position = (avg_price, net_quantity, first)
+            self._dirty = False
+        avg_price, net_quantity, first = self._position
+        return avg_price, net_quantity, first.get('time_created') if first is not None else None
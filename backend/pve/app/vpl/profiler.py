@@ -0,0 +1,78 @@
+# app/vpl/profiler.py
+"""
+Per-node wall time of a run, when asked for (process_graph(profile=True)).
+
+Nothing here touches the normal bar loop: execute_stateful only swaps each
+node's execute (and update_orders) for the timed wrapper below when it is
+given a Profile, so a run without one pays nothing. Nodes evaluated column-
+wise (columnar.py) are timed once per run, their one call covering all bars.
+
+report() is plain JSON: it is saved with the BacktestResult and sent with
+the last compilation_progress event.
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_clock = time.perf_counter
+
+
+class Profile:
+    """Call count, total and max seconds per node id, and for update_orders."""
+
+    def __init__(self):
+        self.nodes = {}            # id -> [calls, total, max]
+        self.columnar = set()      # ids timed by execute_columnar
+        self.orders = [0, 0.0, 0.0]
+        self.bars = 0
+
+    def _timed(self, stats, fn):
+        def timed(*args):
+            t0 = _clock()
+            try:
+                return fn(*args)
+            finally:
+                dt = _clock() - t0
+                stats[0] += 1
+                stats[1] += dt
+                if dt > stats[2]:
+                    stats[2] = dt
+        return timed
+
+    def node(self, node):
+        """node.execute, timed."""
+        return self._timed(self.nodes.setdefault(node.id, [0, 0.0, 0.0]), node.execute)
+
+    def update_orders(self, fn):
+        return self._timed(self.orders, fn)
+
+    def column(self, nid, seconds):
+        stats = self.nodes.setdefault(nid, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        self.columnar.add(nid)
+
+    def report(self, nodes):
+        def entry(stats):
+            calls, total, worst = stats
+            return {'calls': calls, 'total_ms': round(total * 1e3, 3), 'max_ms': round(worst * 1e3, 3)}
+
+        rows = []
+        for nid, stats in self.nodes.items():
+            node = nodes.get(nid)
+            rows.append({'id': nid, 'type': node.type if node is not None else None,
+                         'mode': 'column' if nid in self.columnar else 'bar', **entry(stats)})
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return {'bars': self.bars, 'update_orders': entry(self.orders), 'nodes': rows}
+
+    def log(self, nodes, top=5):
+        report = self.report(nodes)
+        orders = report['update_orders']
+        logger.info("Profile over %d bars: update_orders %d calls, %.1f ms",
+                    report['bars'], orders['calls'], orders['total_ms'])
+        for row in report['nodes'][:top]:
+            logger.info("  node %s (%s, %s): %d calls, %.1f ms total, %.3f ms max",
+                        row['id'], row['type'], row['mode'], row['calls'], row['total_ms'], row['max_ms'])
+        return report
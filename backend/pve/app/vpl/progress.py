@@ -0,0 +1,55 @@
+# app/vpl/progress.py
+"""
+Bar progress of a run, reported at most every `interval` seconds, and the
+cancellation check that rides along with it.
+
+The bar loops (execute_stateful, the compiled loop of codegen.py) hold the
+index of the next bar to tick at and call tick() there, so they pay one
+integer comparison per bar and a clock read every `every` bars; without a
+BarProgress the index is -1 and never reached. report(done, total,
+bars_per_sec, eta_seconds) is whatever the caller does with it (the
+backtest task sends compilation_progress events). cancelled() is asked at
+most every `interval` seconds too, and when it says so tick() raises
+Cancelled out of the loop (a newer compile of the same graph superseded
+this one, see tasks.py).
+"""
+import time
+
+
+class Cancelled(Exception):
+    """The run was called off while its bars were being processed."""
+
+
+class BarProgress:
+    def __init__(self, total, report=None, cancelled=None, interval=0.5, every=256):
+        self.total = total
+        self.report = report
+        self.cancelled = cancelled
+        self.interval = interval
+        self.every = every
+        self._start = None
+        self._last = 0.0
+
+    def tick(self, done):
+        """Report and check for cancellation if `interval` has passed;
+        returns the next bar to tick at."""
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = self._last = now
+        elif now - self._last >= self.interval:
+            self._last = now
+            if self.cancelled is not None and self.cancelled():
+                raise Cancelled(f"cancelled after {done} of {self.total} bars")
+            self._report(done, now)
+        return done + self.every
+
+    def finish(self):
+        self._report(self.total, time.perf_counter())
+
+    def _report(self, done, now):
+        if self.report is None:
+            return
+        elapsed = now - self._start if self._start is not None else 0.0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - done) / rate if rate > 0 else None
+        self.report(done, self.total, rate, eta)
@@ -0,0 +1,123 @@
+# app/vpl/resultcache.py
+"""
+Backtest results, cached by what determines them.
+
+A backtest is a pure function of the graph, the symbol, the timeframe, the
+date range, the engine and the instrument specs, so compiling the same
+strategy again (re-opening it, every new user compiling the templates)
+needs no engine run. result_key() hashes those inputs; the graph is
+normalized first, without the editor layout (node positions, sizes,
+colours, ...) and with its keys sorted, so moving a node around keeps the
+key.
+
+ResultCache keeps the payload update_chart needs (data, orders, precision,
+min_move) in Redis, zlib-compressed JSON with a TTL so Redis' volatile-lru
+policy can evict it (see docker-compose.yml), on top of backtest_results,
+whose rows carry the key: a Redis miss falls back to the newest row with
+that key and puts it back in Redis.
+
+Ranges ending less than UNSETTLED ago are not cached: their last candles can
+still change.
+"""
+import hashlib
+import json
+import logging
+import time
+import zlib
+
+import pandas as pd
+import redis
+
+from .graphcache import ENGINE_VERSION, RETRY_AFTER
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_KEYS = {'pos', 'size', 'flags', 'order', 'color', 'bgcolor', 'boxcolor', 'shape', 'title'}
+REDIS_TTL = 7 * 24 * 3600
+UNSETTLED = pd.Timedelta(days=1)
+
+
+def normalize_graph(graph_json):
+    """The graph dict with what only the editor uses removed."""
+    data = json.loads(graph_json) if isinstance(graph_json, str) else graph_json
+    data = data.get('graph', data)
+    nodes = [{k: v for k, v in node.items() if k not in LAYOUT_KEYS} for node in data.get('nodes', [])]
+    return {'nodes': nodes, 'links': data.get('links', [])}
+
+
+def result_key(graph_json, symbol, timeframe, start_date, end_date, specs):
+    """Cache key of a backtest, None when its range is too recent to cache
+    or its instrument is unknown."""
+    if not specs:
+        return None
+    end = pd.Timestamp(end_date)
+    end = end.tz_localize('UTC') if end.tzinfo is None else end
+    if end > pd.Timestamp.now(tz='UTC') - UNSETTLED:
+        return None
+    inputs = {
+        'graph': normalize_graph(graph_json),
+        'symbol': symbol, 'timeframe': timeframe,
+        'start': str(pd.Timestamp(start_date)), 'end': str(pd.Timestamp(end_date)),
+        'engine': ENGINE_VERSION, 'specs': specs,
+    }
+    text = json.dumps(inputs, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """get(key) / put(key, payload), Redis first, then `load(key)` (the table)."""
+
+    def __init__(self, redis_client, load=None, ttl=REDIS_TTL):
+        self._redis = redis_client
+        self._load = load
+        self._ttl = ttl
+        self._redis_retry_at = 0.0
+
+    @staticmethod
+    def _name(key):
+        return f"vpl:result:{ENGINE_VERSION}:{key}"
+
+    def get(self, key):
+        payload = self._get_redis(key)
+        if payload is not None:
+            logger.info("Backtest result %s… from Redis", key[:12])
+            return payload
+        if self._load is None:
+            return None
+        payload = self._load(key)
+        if payload is not None:
+            logger.info("Backtest result %s… from backtest_results", key[:12])
+            self.put(key, payload)
+        return payload
+
+    def put(self, key, payload):
+        if time.monotonic() < self._redis_retry_at:
+            return
+        try:
+            blob = zlib.compress(json.dumps(payload).encode('utf-8'))
+            self._redis.set(self._name(key), blob, ex=self._ttl)
+        except (TypeError, ValueError) as e:
+            logger.warning("Backtest result %s… not cached (%s)", key[:12], e)
+        except redis.RedisError as e:
+            self._failed('write', key, e)
+
+    def _get_redis(self, key):
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            blob = self._redis.get(self._name(key))
+        except redis.RedisError as e:
+            self._failed('read', key, e)
+            return None
+        if blob is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(blob))
+        except (zlib.error, ValueError) as e:
+            logger.warning("Backtest result %s… unreadable in Redis (%s)", key[:12], e)
+            return None
+
+    def _failed(self, action, key, error):
+        logger.warning("Result cache: Redis %s of %s… failed (%s), not using it for %ds",
+                       action, key[:12], error, RETRY_AFTER)
+        self._redis_retry_at = time.monotonic() + RETRY_AFTER
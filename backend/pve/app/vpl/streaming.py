@@ -0,0 +1,811 @@
+# app/vpl/streaming.py
+"""
+Constant-memory, per-bar state of the indicator nodes.
+
+The ma_* helpers in utils.py take the whole price history and re-slice the
+last `window` values on every bar, so a node kept an ever-growing list and
+paid O(window) per bar. The classes here keep only what the next bar needs:
+
+  • a fixed-size ring of the last values (RingBuffer),
+  • running sums, one add / one subtract per bar (RollingSum),
+  • a running linearly-weighted sum: shifting weights 1..n down by one is
+    sum(x) away from the previous weighted sum (WMA, HMA, linreg),
+  • SWMA as two stacked box sums (its triangle is a box convolved with a box)
+    and SINWMA as a rotating complex sum (sine weights are Im(e^{iθk})),
+  • running |Δ| / up / down sums for KAMA and VIDYA.
+
+ALMA, FWMA and PWMA have no such recurrence: they dot the precomputed
+ma_weights kernel with a contiguous view of a doubled ring buffer, which is
+one numpy call per bar and no allocation.
+
+Running sums pick up an ulp of drift here and there, so each one is re-summed
+from its ring every `size` pushes (amortised O(1)), and as soon as a NaN/inf
+leaves the window. Values stay tolerance-equal to the ma_* reference
+functions. A sum whose window holds only zeros reports exactly 0, as the
+reference does; KAMA and VIDYA branch on that.
+
+make_ma(ma_type, window) returns an object whose update(price) gives the
+value of the bar (None during warm-up, same warm-up as the ma_* function).
+
+RollingExtreme is LowestNode / HighestNode: a monotonic deque, amortised O(1)
+per bar whatever the window.
+
+RSI and SuperTrend are Wilder averages: during the seed window they only
+need a running sum (added in the same order as rsi_calculate /
+supertrend_calculate sum their lists, so the values are bit-identical),
+afterwards the previous average plus the previous close.
+
+Every state can also be seeded from a whole history at once (seed), which is
+how a columnar backtest hands over to live bars: the window states replay
+just the tail they depend on, the recursive ones take their last value from
+the batch kernels in utils.py.
+"""
+import cmath
+import math
+from collections import deque
+
+import numpy as np
+
+from .utils import ma_ema, ma_rma, ma_t3, ma_mcgd, ma_smma, ma_jma, ma_hwma, ma_weights, ma_batch
+
+
+class RingBuffer:
+    """The last `size` values pushed."""
+    __slots__ = ('size', 'values', 'pos', 'count')
+
+    def __init__(self, size):
+        self.size = size
+        self.values = [0.0] * size
+        self.pos = 0            # next slot to write, i.e. the oldest value once full
+        self.count = 0
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def push(self, value):
+        """Store `value` and return the one it evicted (None while filling)."""
+        pos = self.pos
+        if self.count == self.size:
+            evicted = self.values[pos]
+        else:
+            evicted = None
+            self.count += 1
+        self.values[pos] = value
+        pos += 1
+        self.pos = pos if pos < self.size else 0
+        return evicted
+
+    def ago(self, k):
+        """Value pushed `k` bars ago (0 = latest)."""
+        return self.values[(self.pos - 1 - k) % self.size]
+
+    def ordered(self):
+        """Held values, oldest first."""
+        if self.count < self.size:
+            return self.values[:self.count]
+        return self.values[self.pos:] + self.values[:self.pos]
+
+
+class RollingSum:
+    """Sum of the last `size` values."""
+    __slots__ = ('ring', 'total', 'nonzero', '_since')
+
+    def __init__(self, size):
+        self.ring = RingBuffer(size)
+        self.total = 0
+        self.nonzero = 0        # non-zero (or NaN) values in the window
+        self._since = 0         # pushes since the last exact re-sum
+
+    @property
+    def full(self):
+        return self.ring.count == self.ring.size
+
+    def push(self, value):
+        ring = self.ring
+        evicted = ring.push(value)
+        if value:
+            self.nonzero += 1
+        if evicted is None:
+            self.total += value
+        else:
+            if evicted:
+                self.nonzero -= 1
+            self._since += 1
+            if self._since >= ring.size or evicted - evicted:
+                self._since = 0
+                self.total = sum(ring.ordered())
+            else:
+                self.total += value - evicted
+        if not self.nonzero:
+            self.total = 0.0
+
+
+class RollingWMA:
+    """Sum and weighted sum (weights 1..size, oldest first) of the last `size` values."""
+    __slots__ = ('ring', 'total', 'weighted', 'divisor', '_since')
+
+    def __init__(self, size):
+        self.ring = RingBuffer(size)
+        self.total = 0
+        self.weighted = 0
+        self.divisor = size * (size + 1) // 2
+        self._since = 0
+
+    @property
+    def full(self):
+        return self.ring.count == self.ring.size
+
+    @property
+    def value(self):
+        return self.weighted / self.divisor if self.full else None
+
+    def push(self, value):
+        ring = self.ring
+        position = ring.count + 1
+        evicted = ring.push(value)
+        if evicted is None:
+            self.total += value
+            self.weighted += position * value
+            return
+        self._since += 1
+        if self._since >= ring.size or evicted - evicted:
+            self._since = 0
+            values = ring.ordered()
+            self.total = sum(values)
+            self.weighted = sum(w * v for w, v in enumerate(values, 1))
+        else:
+            # every weight drops by one (the oldest value's to zero), the new value gets `size`
+            self.weighted += ring.size * value - self.total
+            self.total += value - evicted
+
+
+# ----------------------------------------------------------------------
+# window MAs
+# ----------------------------------------------------------------------
+
+class Streaming:
+    """
+    Base of the node states: update() advances one bar, seed(values) brings a
+    fresh instance to the state update() over every value would leave it in.
+    By default seed replays the last `span` values, which is exact for state
+    that only depends on a finite window (span None: replay them all).
+    `recursive` states also carry a value forward from bar to bar (and seed
+    it from the batch kernel), their span only covers the window part.
+    """
+    __slots__ = ()
+    span = None
+    recursive = False
+
+    def seed(self, values):
+        if self.span is not None and len(values) > self.span:
+            values = values[len(values) - self.span:]
+        for value in values:
+            self.update(value)
+
+
+class SMA(Streaming):
+    def __init__(self, window):
+        self.window = window
+        self.span = window
+        self.sum = RollingSum(window)
+
+    def update(self, price):
+        self.sum.push(price)
+        return self.sum.total / self.window if self.sum.full else None
+
+
+class WMA(Streaming):
+    def __init__(self, window):
+        self.span = window
+        self.wma = RollingWMA(window)
+
+    def update(self, price):
+        self.wma.push(price)
+        return self.wma.value
+
+
+class HMA(Streaming):
+    def __init__(self, window):
+        self.half = RollingWMA(max(1, window // 2))
+        self.whole = RollingWMA(window)
+        self.smooth = RollingWMA(max(1, int(math.sqrt(window))))
+        self.span = window + self.smooth.ring.size - 1
+
+    def update(self, price):
+        self.half.push(price)
+        self.whole.push(price)
+        if not self.whole.full:
+            return None
+        self.smooth.push(2 * self.half.value - self.whole.value)
+        return self.smooth.value
+
+
+class LinReg(Streaming):
+    def __init__(self, window):
+        n = window
+        self.n = n
+        self.span = n
+        self.wma = RollingWMA(n)
+        self.sum_x = n * (n - 1) // 2
+        self.denominator = n * ((n - 1) * n * (2 * n - 1) // 6) - self.sum_x * self.sum_x
+
+    def update(self, price):
+        wma = self.wma
+        wma.push(price)
+        if not wma.full or self.denominator == 0:
+            return None
+        n, sum_x = self.n, self.sum_x
+        sum_y = wma.total
+        sum_xy = wma.weighted - sum_y           # x runs 0..n-1, the WMA weights 1..n
+        slope = (n * sum_xy - sum_x * sum_y) / self.denominator
+        intercept = (sum_y - slope * sum_x) / n
+        return slope * (n - 1) + intercept
+
+
+class TRIMA(Streaming):
+    def __init__(self, window):
+        self.window = window
+        self.half = (window + 1) // 2
+        self.span = window + self.half - 1
+        self.inner = RollingSum(self.half)
+        self.outer = RollingSum(self.half)
+        self.seen = 0
+
+    def update(self, price):
+        self.inner.push(price)
+        if self.seen < self.window:
+            self.seen += 1
+            if self.seen < self.window:
+                return None
+        self.outer.push(self.inner.total / self.half)
+        return self.outer.total / self.half if self.outer.full else None
+
+
+class KAMA(Streaming):
+    recursive = True
+
+    FASTEST = 2.0 / (2 + 1)
+    SLOWEST = 2.0 / (30 + 1)
+
+    def __init__(self, window):
+        self.window = window
+        self.span = window + 1
+        self.prices = RingBuffer(window + 1)
+        self.volatility = RollingSum(window)
+        self.prev = None
+
+    def seed(self, values):
+        super().seed(values)            # last window + 1 prices and their changes
+        if len(values) > self.span:
+            self.prev = float(ma_batch(values, self.window, 'kama')[-1])
+
+    def update(self, price):
+        prices = self.prices
+        if prices.count:
+            self.volatility.push(abs(price - prices.ago(0)))
+        prices.push(price)
+        if not prices.full:
+            self.prev = price if prices.count == 1 else None
+            return self.prev
+
+        change = abs(price - prices.ago(prices.size - 1))
+        volatility = self.volatility.total
+        er = change / volatility if volatility != 0 else 0
+        sc = (er * (self.FASTEST - self.SLOWEST) + self.SLOWEST) ** 2
+        self.prev = price if self.prev is None else self.prev + sc * (price - self.prev)
+        return self.prev
+
+
+class VIDYA(Streaming):
+    recursive = True
+
+    def __init__(self, window):
+        self.window = window
+        self.span = window + 1
+        self.prices = RingBuffer(window + 1)
+        self.ups = RollingSum(window)
+        self.downs = RollingSum(window)
+        self.prev = None
+
+    def seed(self, values):
+        super().seed(values)
+        if len(values) > self.span:
+            self.prev = float(ma_batch(values, self.window, 'vidya')[-1])
+
+    def update(self, price):
+        prices = self.prices
+        if prices.count:
+            change = price - prices.ago(0)
+            if change > 0:
+                self.ups.push(change)
+                self.downs.push(0)
+            else:
+                self.ups.push(0)
+                self.downs.push(abs(change))
+        prices.push(price)
+        if not prices.full:
+            self.prev = price if prices.count == 1 else None
+            return self.prev
+
+        sum_ups, sum_downs = self.ups.total, self.downs.total
+        cmo = (sum_ups - sum_downs) / (sum_ups + sum_downs) if (sum_ups + sum_downs) != 0 else 0
+        alpha = abs(cmo) * 2.0 / (self.window + 1)
+        self.prev = price if self.prev is None else alpha * price + (1 - alpha) * self.prev
+        return self.prev
+
+
+class KernelMA(Streaming):
+    """Fixed weight kernel (ALMA / FWMA / PWMA) over a doubled ring buffer."""
+
+    def __init__(self, ma_type, window):
+        self.window = window
+        self.span = window
+        self.weights = ma_weights(ma_type, window)
+        # slot i is written at i and i + window, so the last `window` values
+        # are always the contiguous slice [pos, pos + window), oldest first
+        self.buffer = np.zeros(2 * window)
+        self.pos = 0
+        self.count = 0
+
+    def update(self, price):
+        window, pos = self.window, self.pos
+        self.buffer[pos] = self.buffer[pos + window] = price
+        pos += 1
+        self.pos = pos = pos if pos < window else 0
+        if self.count < window:
+            self.count += 1
+            if self.count < window:
+                return None
+        return float(self.buffer[pos:pos + window] @ self.weights)
+
+
+class SinWMA(Streaming):
+    """Σ p_k·sin(θ(k+1)) is the imaginary part of Σ p_k·e^{iθ(k+1)}, which
+    rotates by e^{-iθ} when every value moves one position older."""
+
+    def __init__(self, window):
+        self.span = window
+        theta = math.pi / (window + 1)
+        self.powers = [cmath.exp(1j * theta * (k + 1)) for k in range(window)]
+        self.back = cmath.exp(-1j * theta)
+        self.norm = sum(math.sin(math.pi * (i + 1) / (window + 1)) for i in range(window))
+        self.ring = RingBuffer(window)
+        self.acc = 0j
+        self._since = 0
+
+    def update(self, price):
+        ring = self.ring
+        position = ring.count
+        evicted = ring.push(price)
+        if evicted is None:
+            self.acc += price * self.powers[position]
+            if not ring.full:
+                return None
+        else:
+            self._since += 1
+            if self._since >= ring.size or evicted - evicted:
+                self._since = 0
+                self.acc = sum(p * w for p, w in zip(ring.ordered(), self.powers))
+            else:
+                self.acc = (self.acc - evicted * self.powers[0]) * self.back + price * self.powers[-1]
+        return self.acc.imag / self.norm
+
+
+class SWMA(Streaming):
+    """Triangle weights 1..m..1 = box(a) * box(b); a box sum of box sums."""
+
+    def __init__(self, window):
+        self.span = window
+        mid = window // 2
+        a, b = (mid + 1, mid + 1) if window % 2 == 1 else (mid, mid + 1)
+        self.inner = RollingSum(a)
+        self.outer = RollingSum(b)
+        self.norm = a * b
+
+    def update(self, price):
+        self.inner.push(price)
+        if not self.inner.full:
+            return None
+        self.outer.push(self.inner.total)
+        return self.outer.total / self.norm if self.outer.full else None
+
+
+class ZLMA(Streaming):
+    recursive = True
+
+    def __init__(self, window):
+        self.window = window
+        self.span = window
+        self.lag = (window - 1) // 2
+        self.prices = RingBuffer(self.lag + 1)
+        self.seen = 0
+        self.ema = None
+
+    def seed(self, values):
+        super().seed(values)            # lag ring + warm-up count
+        if len(values) > self.window:
+            self.ema = float(ma_batch(values[self.window - 1:], self.window, 'ema')[-1])
+
+    def update(self, price):
+        self.prices.push(price)
+        if self.seen < self.window:
+            self.seen += 1
+            if self.seen < self.window:
+                return None
+        self.ema = ma_ema(price, self.window, self.ema)
+        return self.ema + (price - self.prices.ago(self.lag))
+
+
+class SSF(Streaming):
+    def __init__(self, window):
+        pi = 3.14159
+        sqrt2 = 1.414
+        a1 = math.exp(-sqrt2 * pi / window)
+        b1 = 2 * a1 * math.cos(sqrt2 * pi / window)
+        self.c2 = b1
+        self.c3 = -a1 * a1
+        self.c1 = 1 - self.c2 - self.c3
+        self.seen = 0
+        self.last = None
+        self.state = None
+
+    def update(self, price):
+        last, self.last = self.last, price
+        if self.seen < 2:
+            self.seen += 1
+            if self.state is None:
+                self.state = (price, price)
+            return price
+        s0, s1 = self.state
+        result = self.c1 * (price + last) / 2 + self.c2 * s0 + self.c3 * s1
+        self.state = (result, s0)
+        return result
+
+
+class SSF3(Streaming):
+    def __init__(self, window):
+        pi = 3.14159
+        sqrt3 = 1.732
+        a1 = math.exp(-pi * sqrt3 / window)
+        self.c4 = a1 * a1
+        self.c3 = -a1 * a1 * a1
+        self.c2 = 3 * a1 + 2 * a1 * a1 * math.cos(1.738 * pi / window)
+        self.c1 = 1 - self.c2 - self.c3 - self.c4
+        self.seen = 0
+        self.state = None
+
+    def update(self, price):
+        if self.seen < 3:
+            self.seen += 1
+            if self.state is None:
+                self.state = (price, price, price)
+            return price
+        s0, s1, s2 = self.state
+        result = self.c1 * price + self.c2 * s0 + self.c3 * s1 + self.c4 * s2
+        self.state = (result, s0, s1)
+        return result
+
+
+# ----------------------------------------------------------------------
+# recursive MAs: already O(1), the state is the previous value / a dict
+# ----------------------------------------------------------------------
+
+class Recursive(Streaming):
+    """ema, rma, mcgd, smma: value = fn(price, window, previous value)."""
+
+    def __init__(self, ma_type, fn, window):
+        self.ma_type = ma_type
+        self.fn = fn
+        self.window = window
+        self.prev = None
+
+    def update(self, price):
+        self.prev = self.fn(price, self.window, self.prev)
+        return self.prev
+
+    def seed(self, values):
+        if len(values):
+            self.prev = float(ma_batch(values, self.window, self.ma_type)[-1])
+
+
+class Stateful(Streaming):
+    """t3, jma, hwma: value, state = fn(price, window, state)."""
+
+    def __init__(self, fn, window):
+        self.fn = fn
+        self.window = window
+        self.state = None
+
+    def update(self, price):
+        value, self.state = self.fn(price, self.window, self.state)
+        return value
+
+
+class T3(Stateful):
+    def __init__(self, window):
+        super().__init__(ma_t3, window)
+
+    def seed(self, values):
+        if not len(values):
+            return
+        # e1..e6 are EMAs of EMAs
+        chain, state = values, {}
+        for k in range(1, 7):
+            chain = ma_batch(chain, self.window, 'ema')
+            state[f'e{k}'] = float(chain[-1])
+        self.state = state
+
+
+class JMA(Stateful):
+    def __init__(self, window):
+        super().__init__(ma_jma, window)
+
+    def seed(self, values):
+        if not len(values):
+            return
+        # e0 is an EWM of the price, e1 one of (price - e0) started at the
+        # first price; with phase 0 the output e2 is e0
+        x = np.asarray(values, dtype=float)
+        e0 = ma_batch(x, self.window, 'jma')
+        e1 = ma_batch(np.concatenate([x[:1], x[1:] - e0[1:]]), self.window, 'jma')
+        self.state = {'e0': float(e0[-1]), 'e1': float(e1[-1]), 'e2': float(e0[-1])}
+
+
+class DEMA(Streaming):
+    def __init__(self, window):
+        self.window = window
+        self.ema1 = self.ema2 = None
+
+    def update(self, price):
+        self.ema1 = ma_ema(price, self.window, self.ema1)
+        self.ema2 = ma_ema(self.ema1, self.window, self.ema2)
+        return 2 * self.ema1 - self.ema2
+
+    def seed(self, values):
+        if len(values):
+            ema1 = ma_batch(values, self.window, 'ema')
+            ema2 = ma_batch(ema1, self.window, 'ema')
+            self.ema1, self.ema2 = float(ema1[-1]), float(ema2[-1])
+
+
+class TEMA(Streaming):
+    def __init__(self, window):
+        self.window = window
+        self.ema1 = self.ema2 = self.ema3 = None
+
+    def update(self, price):
+        self.ema1 = ma_ema(price, self.window, self.ema1)
+        self.ema2 = ma_ema(self.ema1, self.window, self.ema2)
+        self.ema3 = ma_ema(self.ema2, self.window, self.ema3)
+        return 3 * self.ema1 - 3 * self.ema2 + self.ema3
+
+    def seed(self, values):
+        if len(values):
+            ema1 = ma_batch(values, self.window, 'ema')
+            ema2 = ma_batch(ema1, self.window, 'ema')
+            ema3 = ma_batch(ema2, self.window, 'ema')
+            self.ema1, self.ema2, self.ema3 = float(ema1[-1]), float(ema2[-1]), float(ema3[-1])
+
+
+def _hwma(price, window, state):
+    return ma_hwma(price, state)
+
+
+_MA_TYPES = {
+    'sma': SMA,
+    'wma': WMA,
+    'hma': HMA,
+    'linreg': LinReg,
+    'trima': TRIMA,
+    'kama': KAMA,
+    'vidya': VIDYA,
+    'alma': lambda window: KernelMA('alma', window),
+    'fwma': lambda window: KernelMA('fwma', window),
+    'pwma': lambda window: KernelMA('pwma', window),
+    'sinwma': SinWMA,
+    'swma': SWMA,
+    'zlma': ZLMA,
+    'ssf': SSF,
+    'ssf3': SSF3,
+    'dema': DEMA,
+    'tema': TEMA,
+    'ema': lambda window: Recursive('ema', ma_ema, window),
+    'rma': lambda window: Recursive('rma', ma_rma, window),
+    'mcgd': lambda window: Recursive('mcgd', ma_mcgd, window),
+    'smma': lambda window: Recursive('smma', ma_smma, window),
+    't3': T3,
+    'jma': JMA,
+    'hwma': lambda window: Stateful(_hwma, window),
+}
+
+
+def make_ma(ma_type, window):
+    """Streaming state for one MANode; unknown types fall back to SMA like before."""
+    return _MA_TYPES.get(ma_type, SMA)(window)
+
+
+# Recursive states never forget their first bar completely; they are given
+# SETTLE windows of history, after which an EMA's start-up error is down to
+# e^-8 of the initial gap and an RMA's (RSI, SuperTrend) to e^-4.
+SETTLE = 4
+
+
+def state_lookback(state, window):
+    """
+    Bars, the current one included, that `state` (built for `window`) needs
+    before its value no longer depends on where the history started: its span
+    for finite-window states, SETTLE windows on top of it for recursive ones.
+    """
+    if state.span is not None and not state.recursive:
+        return state.span
+    return SETTLE * window + (state.span or 0)
+
+
+# ----------------------------------------------------------------------
+# rolling min / max
+# ----------------------------------------------------------------------
+
+class RollingExtreme(Streaming):
+    """
+    Min (kind 'min') or max of the last `window` values, the partial leading
+    window included. The deque holds (index, value) pairs that can still
+    become the extreme: values only ever get worse towards the back, so the
+    front is the answer and every value is pushed and popped at most once.
+    Equal values are kept, the front is the oldest one like min()/max() give.
+    """
+
+    def __init__(self, window, kind):
+        self.window = window
+        self.span = window
+        self.lowest = kind == 'min'
+        self.candidates = deque()
+        self.index = 0
+
+    def update(self, value):
+        candidates = self.candidates
+        i = self.index
+        self.index = i + 1
+        if self.lowest:
+            while candidates and candidates[-1][1] > value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] < value:
+                candidates.pop()
+        candidates.append((i, value))
+        if candidates[0][0] <= i - self.window:
+            candidates.popleft()
+        return candidates[0][1]
+
+
+# ----------------------------------------------------------------------
+# Wilder-smoothed oscillators
+# ----------------------------------------------------------------------
+
+class RSI(Streaming):
+    """rsi_calculate without the price / gains / losses lists."""
+    __slots__ = ('window', 'alpha', 'prev_price', 'seen', 'sum_gain', 'sum_loss', 'avg_gain', 'avg_loss')
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 1.0 / window
+        self.prev_price = None
+        self.seen = 0               # price changes seen, capped at window
+        self.sum_gain = 0
+        self.sum_loss = 0
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def update(self, price):
+        prev_price, self.prev_price = self.prev_price, price
+        if prev_price is None:
+            return None
+        change = price - prev_price
+        gain = max(change, 0)
+        loss = max(-change, 0)
+
+        if self.avg_gain is None:
+            self.sum_gain += gain
+            self.sum_loss += loss
+            self.seen += 1
+            if self.seen < self.window:
+                return None
+            self.avg_gain = self.sum_gain / self.window
+            self.avg_loss = self.sum_loss / self.window
+        else:
+            alpha = self.alpha
+            self.avg_gain = alpha * gain + (1 - alpha) * self.avg_gain
+            self.avg_loss = alpha * loss + (1 - alpha) * self.avg_loss
+
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return 100.0 - (100.0 / (1 + rs))
+
+    def seed(self, prices):
+        window = self.window
+        if len(prices) <= window + 1:
+            super().seed(prices)
+            return
+        change = np.diff(np.asarray(prices, dtype=float))
+        gains = np.maximum(change, 0)
+        losses = np.maximum(-change, 0)
+        self.sum_gain = sum(gains[:window].tolist())
+        self.sum_loss = sum(losses[:window].tolist())
+        self.seen = window
+        self.avg_gain = float(ma_batch(np.concatenate([[self.sum_gain / window], gains[window:]]), window, 'rma')[-1])
+        self.avg_loss = float(ma_batch(np.concatenate([[self.sum_loss / window], losses[window:]]), window, 'rma')[-1])
+        self.prev_price = prices[-1]
+
+
+class SuperTrend(Streaming):
+    """supertrend_calculate without the high / low / close / TR lists."""
+    __slots__ = ('window', 'alpha', 'prev_close', 'seen', 'sum_tr', 'atr',
+                 'trend', 'supertrend', 'upper_band', 'lower_band')
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 1.0 / window
+        self.prev_close = None
+        self.seen = 0
+        self.sum_tr = 0
+        self.atr = None
+        self.trend = 1
+        self.supertrend = None
+        self.upper_band = None
+        self.lower_band = None
+
+    def update(self, high, low, close, multiplier=3.0):
+        prev_close, self.prev_close = self.prev_close, close
+        if prev_close is None:
+            return None
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        if self.atr is None:
+            self.sum_tr += tr
+            self.seen += 1
+            if self.seen < self.window:
+                return None
+            self.atr = self.sum_tr / self.window
+        else:
+            self.atr = self.alpha * tr + (1 - self.alpha) * self.atr
+        return self._advance(high, low, close, prev_close, multiplier)
+
+    def seed(self, highs, lows, closes, multiplier=3.0):
+        window = self.window
+        if len(closes) <= window + 1:
+            for high, low, close in zip(highs, lows, closes):
+                self.update(high, low, close, multiplier)
+            return
+        h, l, c = (np.asarray(v, dtype=float) for v in (highs, lows, closes))
+        prev_close = c[:-1]
+        tr = np.maximum.reduce([h[1:] - l[1:], np.abs(h[1:] - prev_close), np.abs(l[1:] - prev_close)])
+        self.sum_tr = sum(tr[:window].tolist())
+        self.seen = window
+        atr = ma_batch(np.concatenate([[self.sum_tr / window], tr[window:]]), window, 'rma').tolist()
+        # the bands are path dependent: one pass over plain floats
+        hs, ls, cs = h.tolist(), l.tolist(), c.tolist()
+        for t in range(window, len(cs)):
+            self.atr = atr[t - window]
+            self._advance(hs[t], ls[t], cs[t], cs[t - 1], multiplier)
+        self.prev_close = cs[-1]
+
+    def _advance(self, high, low, close, prev_close, multiplier):
+        hl2 = (high + low) / 2
+        upper_band = hl2 + multiplier * self.atr
+        lower_band = hl2 - multiplier * self.atr
+
+        # the bands only ratchet towards price unless the previous close broke through
+        if self.upper_band is None or upper_band < self.upper_band or prev_close > self.upper_band:
+            self.upper_band = upper_band
+        if self.lower_band is None or lower_band > self.lower_band or prev_close < self.lower_band:
+            self.lower_band = lower_band
+
+        if self.supertrend is None:
+            self.trend = -1 if close <= self.lower_band else 1
+        elif self.trend == 1 and close < self.lower_band:
+            self.trend = -1
+        elif self.trend == -1 and close > self.upper_band:
+            self.trend = 1
+        self.supertrend = self.lower_band if self.trend == 1 else self.upper_band
+        return self.supertrend
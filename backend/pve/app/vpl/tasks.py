@@ -1,9 +1,16 @@
 # pve/app/vpl/tasks.py
 
 from pve.app import celery, redis_client
-import logging, json, pandas as pd
+import logging, json, uuid, pandas as pd
+import redis
+from celery.signals import worker_ready
 from pve.app.models.graph_model import Graph
-from pve.app.vpl.nodes import process_graph
+from pve.app.vpl.nodes import process_graph, get_instrument_specs
+from pve.app.vpl.progress import Cancelled
+from pve.app.vpl.resultcache import ResultCache, result_key
+from pve.app.vpl.templates import TEMPLATE_USER_ID, load_templates, template_key
+from pve.app.utils.migrations import migrate
+from pve.config import Config
 from pve.app.socketio_setup import socketio
 from pve.app.utils.logger import SocketIOLogHandler
 from pve.app.models.backtest_model import BacktestResult
@@ -12,6 +19,8 @@ from pve.app.vpl.analyzer import BacktestAnalyzer
 
 logger = logging.getLogger(__name__)
 
+results = ResultCache(redis_client, load=BacktestResult.load_by_result_key)
+
 class RedisLogHandler(logging.Handler):
     def __init__(self, channel):
         super().__init__()
@@ -30,14 +39,94 @@ class socket_logging:
     def __enter__(self):
         self.root.setLevel(logging.INFO)         # ensure INFO+ passes
         self.root.addHandler(self.handler)
+        return self.handler
 
     def __exit__(self, exc_type, exc, tb):
         self.root.removeHandler(self.handler)
+        self.handler.close()                     # send what is still buffered
+
+
+def chart_records(df):
+    """The result frame as update_chart rows: epoch-second dates, None for NaN."""
+    df['date'] = df['date'].astype('int64') // 10 ** 9
+    columns_to_ignore = ['date', 'open', 'high', 'low', 'close', 'volume']
+    ma_columns = [col for col in df.columns if col not in columns_to_ignore]
+    df[ma_columns] = df[ma_columns].astype(object)
+    df[ma_columns] = df[ma_columns].where(pd.notna(df[ma_columns]), None)
+    return df.to_dict('records')
+
+
+def bar_progress(user_id, graph_name, logs):
+    """process_graph progress callback: one compilation_progress event per
+    report (process_graph rate-limits them), mapping the bars done onto the
+    30-80% stretch of the task. Buffered log lines go out first."""
+    def report(done, total, bars_per_sec, eta):
+        logs.flush()
+        eta_text = f", ETA {eta:.0f}s" if eta is not None else ""
+        socketio.emit('compilation_progress', {
+            'status': 'progress',
+            'progress': 30 + (50 * done // total if total else 50),
+            'stage': f'Processing bars {done:,}/{total:,} ({bars_per_sec:,.0f} bars/s{eta_text})',
+            'graph_name': graph_name,
+            'bars_done': done,
+            'bars_total': total,
+            'bars_per_sec': round(bars_per_sec, 1),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+        }, to=str(user_id))
+    return report
+
+
+# ── superseding: one live compile per (user, graph) ──────────────────────────
+GENERATION_TTL = 24 * 3600
+
+
+def _generation_key(user_id, graph_name):
+    return f"vpl:compile:{user_id}:{graph_name}"
+
+
+def submit_backtest(user_id, graph_name, profile=False):
+    """Queue a backtest of the graph that supersedes any earlier one: the
+    (user, graph) generation is bumped, the previous task is revoked if it
+    is still queued, and stops at its next check if it is running."""
+    key = _generation_key(user_id, graph_name)
+    task_id = str(uuid.uuid4())
+    kwargs = {'profile': profile}
+    previous = None
+    try:
+        kwargs['generation'] = redis_client.incr(key)
+        redis_client.expire(key, GENERATION_TTL)
+        previous = redis_client.set(f"{key}:task", task_id, ex=GENERATION_TTL, get=True)
+    except redis.RedisError as e:
+        logger.warning("Compile generation of %s not recorded (%s), not superseding", key, e)
+    if previous:
+        try:
+            celery.control.revoke(previous.decode())
+        except Exception as e:
+            logger.warning("Could not revoke superseded task %s (%s)", previous, e)
+    return process_graph_task.apply_async((user_id, graph_name), kwargs, task_id=task_id)
+
+
+def superseded(user_id, graph_name, generation):
+    """cancelled() callback of a run: True once a newer compile of the same
+    graph was submitted. One Redis GET per call; a Redis error counts as no."""
+    key = _generation_key(user_id, graph_name)
+
+    def check():
+        if generation is None:
+            return False
+        try:
+            latest = redis_client.get(key)
+        except redis.RedisError:
+            return False
+        return latest is not None and int(latest) != generation
+    return check
+
 
 @celery.task(bind=True)
-def process_graph_task(self, user_id, graph_name):
+def process_graph_task(self, user_id, graph_name, profile=False, generation=None):
     # wrap the *entire* backtest in socket-logging
-    with socket_logging(user_id):
+    is_superseded = superseded(user_id, graph_name, generation)
+    with socket_logging(user_id) as logs:
         logger.info("Starting backtest for graph %s", graph_name)
 
         try:
@@ -70,6 +159,41 @@ def process_graph_task(self, user_id, graph_name):
                 'graph_name': graph_name
             }, to=str(user_id))
 
+            if is_superseded():
+                raise Cancelled("superseded before it started")
+
+            # Same graph, market and range as an earlier backtest: no engine run
+            key = result_key(graph_json, symbol, timeframe, start_date, end_date,
+                             get_instrument_specs(symbol))
+            cached = results.get(key) if key and not profile else None
+            if cached is not None:
+                socketio.emit('update_chart', {
+                    'status': 'success',
+                    'data': cached['data'],
+                    'precision': cached['precision'],
+                    'minMove': cached['min_move'],
+                    'orders': cached['orders']
+                }, to=str(user_id))
+
+                if BacktestResult.find_by_result_key(user_id, graph_name, key) is None:
+                    BacktestResult.save(
+                        user_id, graph_name, cached['data'], cached['orders'],
+                        cached['precision'], cached['min_move'], symbol, timeframe,
+                        start_date, end_date, graph_json,
+                        result_key=key
+                    )
+
+                socketio.emit('compilation_progress', {
+                    'status': 'completed',
+                    'progress': 100,
+                    'stage': 'Compilation completed (cached result)',
+                    'graph_name': graph_name,
+                    'profile': None
+                }, to=str(user_id))
+
+                logger.info("Backtest of %s served from the result cache", graph_name)
+                return
+
             # Stage 3: Processing graph (this is the main computation, 30-80%)
             socketio.emit('compilation_progress', {
                 'status': 'progress',
@@ -79,7 +203,7 @@ def process_graph_task(self, user_id, graph_name):
             }, to=str(user_id))
 
             # This will now fire INFO logs from process_graph, update_orders, nodes, etc.
-            df, precision, min_move, orders, _ = process_graph(
+            df, precision, min_move, orders, state = process_graph(
                 graph_json, start_date, end_date,
                 symbol, timeframe,
                 mode='backtest',
@@ -87,8 +211,16 @@ def process_graph_task(self, user_id, graph_name):
                 warmup_only=False,
                 dataframe=None,
                 state=None,
-                incremental=False
+                incremental=False,
+                columnar=True,
+                compiled=True,
+                profile=profile,
+                progress=bar_progress(user_id, graph_name, logs),
+                cancelled=is_superseded
             )
+            if is_superseded():
+                raise Cancelled("superseded before its results were saved")
+            timings = state['profile'].report(state['nodes']) if profile else None
 
             # Stage 4: Processing results (85%)
             socketio.emit('compilation_progress', {
@@ -99,12 +231,7 @@ def process_graph_task(self, user_id, graph_name):
             }, to=str(user_id))
 
             if df is not None:
-                df['date'] = df['date'].astype('int64') // 10 ** 9
-                columns_to_ignore = ['date', 'open', 'high', 'low', 'close', 'volume']
-                ma_columns = [col for col in df.columns if col not in columns_to_ignore]
-                df[ma_columns] = df[ma_columns].astype(object)
-                df[ma_columns] = df[ma_columns].where(pd.notna(df[ma_columns]), None)
-                data = df.to_dict('records')
+                data = chart_records(df)
 
                 # Stage 5: Saving results (95%)
                 socketio.emit('compilation_progress', {
@@ -125,15 +252,20 @@ def process_graph_task(self, user_id, graph_name):
                 BacktestResult.save(
                     user_id, graph_name, data, orders,
                     precision, min_move, symbol, timeframe,
-                    start_date, end_date, graph_json
+                    start_date, end_date, graph_json,
+                    profile=timings, result_key=key
                 )
+                if key:
+                    results.put(key, {'data': data, 'orders': orders,
+                                      'precision': precision, 'min_move': min_move})
 
                 # Stage 6: Complete (100%)
                 socketio.emit('compilation_progress', {
                     'status': 'completed',
                     'progress': 100,
                     'stage': 'Compilation completed successfully!',
-                    'graph_name': graph_name
+                    'graph_name': graph_name,
+                    'profile': timings
                 }, to=str(user_id))
 
                 logger.info("Backtest completed successfully for %s", graph_name)
@@ -144,6 +276,10 @@ def process_graph_task(self, user_id, graph_name):
                     'graph_name': graph_name
                 }, to=str(user_id))
                 
+        except Cancelled as e:
+            # a newer compile of this graph is queued or running; it reports
+            logger.info("Backtest of %s superseded by a newer compile (%s)", graph_name, e)
+
         except Exception as e:
             # this logs full traceback, both to file and over SocketIO
             logger.exception("Error during backtest")
@@ -154,6 +290,76 @@ def process_graph_task(self, user_id, graph_name):
             }, to=str(user_id))
 
 
+# ── shared template backtests ────────────────────────────────────────────────
+TEMPLATE_LOCK = "vpl:templates:precompute"
+TEMPLATE_LOCK_TTL = 3600
+
+
+@celery.task
+def precompute_template_results():
+    """Save a TEMPLATE_USER_ID backtest of every template that has none for
+    its current version and data window (result key); signups copy them
+    (load_template_graph_for_user). Only one worker does it at a time."""
+    try:
+        if not redis_client.set(TEMPLATE_LOCK, 1, nx=True, ex=TEMPLATE_LOCK_TTL):
+            logger.info("Template results are being precomputed elsewhere")
+            return
+    except redis.RedisError as e:
+        logger.warning("Template precompute lock not taken (%s), going on", e)
+    try:
+        for template in load_templates():
+            name = template['name']
+            try:
+                key = template_key(template)
+                if key is None:
+                    logger.info("Template %s is not cacheable, new users compile it", name)
+                    continue
+                if BacktestResult.find_by_result_key(TEMPLATE_USER_ID, name, key) is not None:
+                    continue
+
+                payload = results.get(key)
+                if payload is None:
+                    logger.info("Precomputing template %s", name)
+                    df, precision, min_move, orders, _ = process_graph(
+                        template['graph_json'], template['start_date'], template['end_date'],
+                        template['symbol'], template['timeframe'],
+                        mode='backtest', warmup_only=False,
+                        columnar=True, compiled=True
+                    )
+                    if df is None:
+                        logger.error("Template %s produced no data", name)
+                        continue
+                    payload = {'data': chart_records(df), 'orders': orders,
+                               'precision': precision, 'min_move': min_move}
+                    results.put(key, payload)
+
+                BacktestResult.save(
+                    TEMPLATE_USER_ID, name, payload['data'], payload['orders'],
+                    payload['precision'], payload['min_move'],
+                    template['symbol'], template['timeframe'],
+                    template['start_date'], template['end_date'], template['graph_json'],
+                    result_key=key
+                )
+                logger.info("Template %s precomputed", name)
+            except Exception:
+                logger.exception("Failed to precompute template %s", name)
+    finally:
+        try:
+            redis_client.delete(TEMPLATE_LOCK)
+        except redis.RedisError:
+            pass
+
+
+@worker_ready.connect
+def precompute_templates_on_start(sender, **kwargs):
+    # the main worker process creates no app, so migrate here: the shared
+    # results are saved and looked up by backtest_results.result_key
+    if migrate(vars(Config)):
+        precompute_template_results.delay()
+    else:
+        logger.error("Template results not precomputed, the schema is not up to date")
+
+
 @celery.task(bind=True)
 def process_analyzer_task(self, user_id, backtest_id, initial_capital):
     logger = logging.getLogger('pve.app.analyzer')
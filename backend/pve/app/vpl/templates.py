@@ -0,0 +1,54 @@
+# app/vpl/templates.py
+"""
+The strategy templates every new user starts with (backend/template_graphs).
+
+Their backtests are the same for everybody, so they are run once per
+template version and data window, by precompute_template_results (tasks.py,
+scheduled with Celery beat and on worker start), and saved under
+TEMPLATE_USER_ID with their result key (resultcache.py). A signup copies
+those rows instead of queueing one backtest per template.
+"""
+import json
+import logging
+import os
+
+from .resultcache import result_key
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))), 'template_graphs')
+TEMPLATE_USER_ID = 0   # owner of the shared template backtests, not a real user
+
+
+def load_templates(template_dir=TEMPLATE_DIR):
+    """Every readable *.json template as a dict: name, graph_json, start_date,
+    end_date, symbol, timeframe. Unreadable files are logged and skipped."""
+    templates = []
+    for fname in sorted(os.listdir(template_dir)):
+        if not fname.lower().endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(template_dir, fname), 'r', encoding='utf-8') as f:
+                template_data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to read template %s: %s", fname, e)
+            continue
+        templates.append({
+            # prefer an explicit name in the JSON, else the file name
+            'name': template_data.get('graphName') or os.path.splitext(fname)[0].replace('_', ' ').title(),
+            'graph_json': json.dumps(template_data.get('graph', {})),
+            'start_date': template_data.get('startDate', '2024-01-01'),
+            'end_date': template_data.get('endDate', '2024-01-04'),
+            'symbol': template_data.get('symbol', 'BTCUSDT'),
+            'timeframe': template_data.get('timeframe', '1h'),
+        })
+    return templates
+
+
+def template_key(template):
+    """Result key of the template's backtest (None when it is not cacheable)."""
+    from .nodes import get_instrument_specs  # nodes is heavy; only load it when needed
+    return result_key(template['graph_json'], template['symbol'], template['timeframe'],
+                      template['start_date'], template['end_date'],
+                      get_instrument_specs(template['symbol']))
@@ -5,6 +5,8 @@ from ..utils.database import get_db_connection
 import logging
 from functools import wraps
 import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Union
 import math
 
@@ -662,4 +664,276 @@ def supertrend_calculate(highs, lows, closes, window, multiplier=3.0, supertrend
     
     return supertrend_state['supertrend'], supertrend_state
 
+# ============================================================================
+# BATCH KERNELS - whole-column versions of the streaming calculations above.
+# Input is a float array of the *valid* (non-None) values a node would have
+# received bar by bar; output has the same length, NaN where the streaming
+# function returns None.
+# ============================================================================
+
+def _ewm(values, alpha):
+    """y[0] = x[0], y[t] = alpha * x[t] + (1 - alpha) * y[t-1]"""
+    if len(values) == 0:
+        return np.asarray(values, dtype=float)
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def _rolling_mean(values, window):
+    return pd.Series(values).rolling(window).mean().to_numpy()
+
+def _weighted(values, weights):
+    """Rolling dot product with a fixed kernel, weights[-1] applies to the newest value."""
+    window = len(weights)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window) @ weights
+    return out
+
+def _shifted(values, lag):
+    out = np.full(len(values), np.nan)
+    if lag < len(values):
+        out[lag:] = values[:len(values) - lag]
+    return out
+
+def ma_weights(ma_type, window):
+    """Normalised weight kernel of the fixed-window weighted MAs."""
+    if ma_type == 'wma':
+        weights = np.arange(1, window + 1, dtype=float)
+    elif ma_type == 'alma':
+        m = 0.85 * (window - 1)
+        s = window / 6.0
+        weights = np.exp(-((np.arange(window) - m) ** 2) / (2 * s ** 2))
+    elif ma_type == 'fwma':
+        fib = [1, 1]
+        while len(fib) < window:
+            fib.append(fib[-1] + fib[-2])
+        weights = np.array(fib[:window], dtype=float)
+    elif ma_type == 'pwma':
+        weights = np.array([math.comb(window - 1, i) for i in range(window)], dtype=float)
+    elif ma_type == 'sinwma':
+        weights = np.sin(np.pi * np.arange(1, window + 1) / (window + 1))
+    elif ma_type == 'swma':
+        mid = window // 2
+        head = list(range(1, mid + 2)) if window % 2 == 1 else list(range(1, mid + 1))
+        weights = np.array(head + list(range(mid, 0, -1)), dtype=float)
+    else:
+        raise ValueError(f"No weight kernel for ma_type '{ma_type}'")
+    return weights / weights.sum()
+
+def ma_batch(prices, window, ma_type):
+    """Moving average of a whole price column, same warm-up as MANode."""
+    x = np.asarray(prices, dtype=float)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n == 0:
+        return out
+
+    if ma_type == 'ema':
+        return _ewm(x, 2.0 / (window + 1))
+    if ma_type == 'rma':
+        return _ewm(x, 1.0 / window)
+    if ma_type == 'smma':
+        return _ewm(x, 1.0 / window)
+    if ma_type == 'dema':
+        ema1 = _ewm(x, 2.0 / (window + 1))
+        return 2 * ema1 - _ewm(ema1, 2.0 / (window + 1))
+    if ma_type == 'tema':
+        alpha = 2.0 / (window + 1)
+        ema1 = _ewm(x, alpha)
+        ema2 = _ewm(ema1, alpha)
+        return 3 * ema1 - 3 * ema2 + _ewm(ema2, alpha)
+    if ma_type == 't3':
+        a = 0.7
+        alpha = 2.0 / (window + 1)
+        e = [x]
+        for _ in range(6):
+            e.append(_ewm(e[-1], alpha))
+        c1 = -a**3
+        c2 = 3 * a**2 + 3 * a**3
+        c3 = -6 * a**2 - 3 * a - 3 * a**3
+        c4 = 1 + 3 * a + a**3 + 3 * a**2
+        return c1 * e[6] + c2 * e[5] + c3 * e[4] + c4 * e[3]
+    if ma_type == 'jma':
+        beta = 0.45 * (window - 1) / (0.45 * (window - 1) + 2)
+        return _ewm(x, 1 - beta)
+    if ma_type in ('wma', 'alma', 'fwma', 'pwma', 'sinwma', 'swma'):
+        return _weighted(x, ma_weights(ma_type, window))
+    if ma_type == 'hma':
+        half_period = max(1, window // 2)
+        sqrt_period = max(1, int(math.sqrt(window)))
+        if n >= window:
+            raw = (2 * _weighted(x, ma_weights('wma', half_period))
+                   - _weighted(x, ma_weights('wma', window)))[window - 1:]
+            out[window - 1:] = _weighted(raw, ma_weights('wma', sqrt_period))
+        return out
+    if ma_type == 'linreg':
+        if window < 2:
+            return out
+        idx = np.arange(window, dtype=float)
+        sum_x = idx.sum()
+        sum_x2 = (idx * idx).sum()
+        sum_y = _weighted(x, np.ones(window))
+        sum_xy = _weighted(x, idx)
+        slope = (window * sum_xy - sum_x * sum_y) / (window * sum_x2 - sum_x * sum_x)
+        intercept = (sum_y - slope * sum_x) / window
+        return slope * (window - 1) + intercept
+    if ma_type == 'trima':
+        half_period = (window + 1) // 2
+        if n >= window:
+            out[window - 1:] = _rolling_mean(_rolling_mean(x, half_period)[window - 1:], half_period)
+        return out
+    if ma_type == 'zlma':
+        lag = (window - 1) // 2
+        if n >= window:
+            ema = _ewm(x[window - 1:], 2.0 / (window + 1))
+            out[window - 1:] = ema + (x[window - 1:] - _shifted(x, lag)[window - 1:])
+        return out
+    if ma_type in ('kama', 'vidya'):
+        out[0] = x[0]
+        if n <= window:
+            return out
+        diff = np.abs(np.diff(x, prepend=np.nan))
+        if ma_type == 'kama':
+            change = np.abs(x - _shifted(x, window))
+            volatility = _weighted(diff, np.ones(window))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                er = np.where(volatility != 0, change / volatility, 0.0)
+            fastest_sc = 2.0 / (2 + 1)
+            slowest_sc = 2.0 / (30 + 1)
+            alpha = (er * (fastest_sc - slowest_sc) + slowest_sc) ** 2
+        else:
+            change = np.diff(x, prepend=np.nan)
+            ups = _weighted(np.where(change > 0, change, 0.0), np.ones(window))
+            downs = _weighted(np.where(change > 0, 0.0, np.abs(change)), np.ones(window))
+            total = ups + downs
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cmo = np.where(total != 0, (ups - downs) / total, 0.0)
+            alpha = np.abs(cmo) * 2.0 / (window + 1)
+        # bars 1..window-1 reset the previous value to None, so the
+        # recursion restarts from the price at bar `window`
+        prev = x[0] if window == 1 else None
+        xs = x.tolist()
+        alphas = alpha.tolist()
+        for t in range(window, n):
+            if prev is None:
+                prev = xs[t]
+            elif ma_type == 'kama':
+                prev = prev + alphas[t] * (xs[t] - prev)
+            else:
+                prev = alphas[t] * xs[t] + (1 - alphas[t]) * prev
+            out[t] = prev
+        return out
+    if ma_type == 'ssf':
+        pi = 3.14159
+        sqrt2 = 1.414
+        a1 = math.exp(-sqrt2 * pi / window)
+        c2 = 2 * a1 * math.cos(sqrt2 * pi / window)
+        c3 = -a1 * a1
+        c1 = 1 - c2 - c3
+        xs = x.tolist()
+        res = xs[:2]
+        s0 = s1 = xs[0]
+        for t in range(2, n):
+            s0, s1 = c1 * (xs[t] + xs[t - 1]) / 2 + c2 * s0 + c3 * s1, s0
+            res.append(s0)
+        return np.array(res, dtype=float)
+    if ma_type == 'ssf3':
+        pi = 3.14159
+        sqrt3 = 1.732
+        a1 = math.exp(-pi * sqrt3 / window)
+        c4 = a1 * a1
+        c3 = -a1 * a1 * a1
+        c2 = 3 * a1 + 2 * a1 * a1 * math.cos(1.738 * pi / window)
+        c1 = 1 - c2 - c3 - c4
+        xs = x.tolist()
+        res = xs[:3]
+        s0 = s1 = s2 = xs[0]
+        for t in range(3, n):
+            s0, s1, s2 = c1 * xs[t] + c2 * s0 + c3 * s1 + c4 * s2, s0, s1
+            res.append(s0)
+        return np.array(res, dtype=float)
+    if ma_type == 'mcgd':
+        xs = x.tolist()
+        prev = None
+        res = []
+        for price in xs:
+            prev = ma_mcgd(price, window, prev)
+            res.append(prev)
+        return np.array(res, dtype=float)
+    if ma_type == 'hwma':
+        xs = x.tolist()
+        state = None
+        res = []
+        for price in xs:
+            value, state = ma_hwma(price, state)
+            res.append(value)
+        return np.array(res, dtype=float)
+
+    # sma and unknown types
+    return _rolling_mean(x, window)
+
+def rsi_batch(prices, window):
+    """RSI of a whole price column, same warm-up as RSINode."""
+    x = np.asarray(prices, dtype=float)
+    out = np.full(len(x), np.nan)
+    if len(x) <= window:
+        return out
+    change = np.diff(x)
+    gains = np.maximum(change, 0)
+    losses = np.maximum(-change, 0)
+    seed_gain = gains[:window].sum() / window
+    seed_loss = losses[:window].sum() / window
+    avg_gain = _ewm(np.concatenate([[seed_gain], gains[window:]]), 1.0 / window)
+    avg_loss = _ewm(np.concatenate([[seed_loss], losses[window:]]), 1.0 / window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi_values = 100.0 - (100.0 / (1 + avg_gain / avg_loss))
+    out[window:] = np.where(avg_loss == 0, 100.0, rsi_values)
+    return out
+
+def supertrend_batch(highs, lows, closes, window, multiplier=3.0):
+    """SuperTrend of whole high/low/close columns, same warm-up as SuperTrendNode."""
+    h = np.asarray(highs, dtype=float)
+    l = np.asarray(lows, dtype=float)
+    c = np.asarray(closes, dtype=float)
+    n = len(c)
+    out = np.full(n, np.nan)
+    if n <= window:
+        return out
+    prev_close = c[:-1]
+    tr = np.maximum.reduce([h[1:] - l[1:], np.abs(h[1:] - prev_close), np.abs(l[1:] - prev_close)])
+    seed = tr[:window].sum() / window
+    atr = _ewm(np.concatenate([[seed], tr[window:]]), 1.0 / window)
+    hl2 = (h[window:] + l[window:]) / 2
+    upper = (hl2 + multiplier * atr).tolist()
+    lower = (hl2 - multiplier * atr).tolist()
+    cs = c.tolist()
+
+    final_upper = final_lower = supertrend = None
+    trend = 1
+    for i in range(len(upper)):
+        t = i + window
+        pc = cs[t - 1]
+        if final_upper is None or upper[i] < final_upper or pc > final_upper:
+            final_upper = upper[i]
+        if final_lower is None or lower[i] > final_lower or pc < final_lower:
+            final_lower = lower[i]
+        close = cs[t]
+        if supertrend is None:
+            if close <= final_lower:
+                supertrend, trend = final_upper, -1
+            else:
+                supertrend, trend = final_lower, 1
+        elif trend == 1 and close < final_lower:
+            supertrend, trend = final_upper, -1
+        elif trend == -1 and close > final_upper:
+            supertrend, trend = final_lower, 1
+        else:
+            supertrend = final_lower if trend == 1 else final_upper
+        out[t] = supertrend
+    return out
+
+def rolling_extreme_batch(values, window, kind):
+    """Rolling min / max including the partial leading window (LowestNode / HighestNode)."""
+    rolled = pd.Series(np.asarray(values, dtype=float)).rolling(window, min_periods=1)
+    return (rolled.min() if kind == 'min' else rolled.max()).to_numpy()
+
 symbols_db = ['1000000MOGUSDT', '1000BONKUSDT', '1000FLOKIUSDT', '1000NEIROCTOUSDT', '1000PEPEUSDT', '1000XUSDT', 'AAVEUSDT', 'ACTUSDT', 'ADAUSDT', 'APEUSDT', 'APTUSDT', 'ARBUSDT', 'ATOMUSDT', 'AVAXUSDT', 'BANUSDT', 'BCHUSDT', 'BNBUSDT', 'BOMEUSDT', 'BRETTUSDT', 'BTCPERP', 'BTCUSDT', 'CATIUSDT', 'CRVUSDT', 'DEGENUSDT', 'DOGEUSDT', 'DOGSUSDT', 'DOTUSDT', 'DRIFTUSDT', 'EIGENUSDT', 'ENAUSDT', 'ETCUSDT', 'ETHFIUSDT', 'ETHUSDT', 'FTMUSDT', 'GALAUSDT', 'GOATUSDT', 'GRASSUSDT', 'HBARUSDT', 'INJUSDT', 'JUPUSDT', 'KASUSDT', 'LDOUSDT', 'LINKUSDT', 'LTCUSDT', 'MEWUSDT', 'MOODENGUSDT', 'NEARUSDT', 'NEIROETHUSDT', 'NOTUSDT', 'OMUSDT', 'ONDOUSDT', 'OPUSDT', 'ORDIUSDT', 'PNUTUSDT', 'POLUSDT', 'POPCATUSDT', 'RENDERUSDT', 'SEIUSDT', 'SHIB1000USDT', 'SLERFUSDT', 'SOLUSDT', 'STRKUSDT', 'STXUSDT', 'SUIUSDT', 'TAOUSDT', 'TIAUSDT', 'TONUSDT', 'TROYUSDT', 'UNIUSDT', 'WIFUSDT', 'WLDUSDT', 'XLMUSDT', 'XRPUSDT']
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Shared fixtures of the backend tests.
+
+Run from backend/:  python -m pytest
+"""
+import json
+
+import pytest
+
+from pve.app.vpl import nodes as vpl
+from utils.bench_engine import synthetic_candles
+
+SYMBOLS = ('ANIMEUSDT', '1000PEPEUSDT', 'BTCUSDT')
+
+
+@pytest.fixture(scope='session')
+def instruments_dir(tmp_path_factory):
+    """A directory holding a bybit_instruments_info.json for SYMBOLS."""
+    spec = {"retCode": 0, "result": {"list": [
+        {"symbol": symbol, "priceFilter": {"tickSize": "0.0001"}, "priceScale": "4",
+         "lotSizeFilter": {"minOrderQty": "1", "qtyStep": "1"}}
+        for symbol in SYMBOLS]}}
+    directory = tmp_path_factory.mktemp('instruments')
+    (directory / 'bybit_instruments_info.json').write_text(json.dumps(spec))
+    return directory
+
+
+@pytest.fixture
+def instruments(instruments_dir, monkeypatch):
+    """Run from instruments_dir, where get_instrument_specs and
+    get_precision_and_min_move_local read the spec file."""
+    monkeypatch.chdir(instruments_dir)
+    vpl.Node.instrument_specs = None
+    yield
+    vpl.Node.instrument_specs = None
+
+
+@pytest.fixture
+def runtime(instruments):
+    """Returns bind(df, symbol): a fresh backtest runtime over `df`."""
+    def bind(df, symbol='BTCUSDT'):
+        vpl.Node.configure_runtime('backtest', None, None)
+        vpl.Node.instrument_specs = None
+        vpl._initialise_node_runtime(df, symbol)
+    return bind
+
+
+@pytest.fixture(scope='session')
+def candles():
+    return synthetic_candles(1500)
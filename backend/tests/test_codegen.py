@@ -0,0 +1,80 @@
+"""compile_bar_loop (vpl/codegen.py): parity with the interpreter, and
+nothing from the graph JSON is ever run as code."""
+import json
+
+import pytest
+
+from pve.app.vpl import nodes as vpl
+from pve.app.vpl.codegen import CodegenUnsupported, compile_bar_loop
+
+
+def _graph(a, b, c, d, e, f, g):
+    """close + 5.0, its cross over close, a clip with swapped bounds (logs a
+    warning every bar) and a rolling lowest: inlined, constant and called
+    nodes."""
+    return {
+        'nodes': [
+            {'id': a, 'type': 'get/close', 'outputs': [{'name': 'close'}]},
+            {'id': b, 'type': 'set/float', 'properties': {'value': 5.0}, 'outputs': [{'name': 'Float'}]},
+            {'id': c, 'type': 'math/add_float', 'inputs': [{}, {}], 'outputs': [{'name': 'Float'}]},
+            {'id': d, 'type': 'compare/cross_over', 'inputs': [{}, {}], 'outputs': [{'name': 'Condition'}]},
+            {'id': e, 'type': 'math/clip_float', 'inputs': [{}, {}, {}], 'outputs': [{'name': 'Float'}]},
+            {'id': f, 'type': 'set/integer', 'properties': {'value': 20}, 'outputs': [{'name': 'Integer'}]},
+            {'id': g, 'type': 'math/lowest', 'inputs': [{}, {}], 'outputs': [{'name': 'Float'}]},
+        ],
+        'links': [
+            [1, a, 0, c, 0, 'float'], [2, b, 0, c, 1, 'float'],
+            [3, c, 0, d, 0, 'float'], [4, a, 0, d, 1, 'float'],
+            [5, b, 0, e, 0, 'float'], [6, a, 0, e, 1, 'float'], [7, c, 0, e, 2, 'float'],
+            [8, a, 0, g, 0, 'float'], [9, f, 0, g, 1, 'integer'],
+        ],
+    }
+
+
+def _run(graph, path, df, runtime):
+    runtime(df)
+    nodes, order, _ = vpl._build_dag(graph, optimize=False)
+    record = [(node.id, node.outputs[0]['name']) for node in nodes.values()
+              if node.type not in ('get/close', 'set/float', 'set/integer')]
+    if path == 'interpreter':
+        recorded = vpl.execute_stateful(order, nodes, record=record)
+    else:
+        recorded = compile_bar_loop(order, nodes, vpl.update_orders, fed={}, record=record)(
+            vpl.BarCursor(vpl.Node.get_df()))
+    return [list(recorded[port]) for port in record]
+
+
+def test_compiled_loop_matches_interpreter(candles, runtime):
+    graph = _graph(1, 2, 3, 4, 5, 6, 7)
+    df = candles.head(300)
+    assert _run(graph, 'compiled', df, runtime) == _run(graph, 'interpreter', df, runtime)
+
+
+PAYLOAD = '__import__("pathlib").Path({marker}).touch()'
+
+
+@pytest.mark.parametrize('position, template', [
+    (0, '1=0;{payload};y'),      # statement, through the node's local names
+    (3, '1=0;{payload};y'),      # statement, through the cross state locals
+    (2, '3\n{payload}'),         # newline out of the per-node comment
+    (4, '5 {{{payload}}}'),      # expression of the clip warning's f-string
+    (6, '7=0;{payload};y'),      # called node: iv/ov/x locals
+])
+def test_hostile_node_id_is_not_executed(candles, runtime, tmp_path, position, template):
+    marker = tmp_path / 'pwned'
+    ids = [1, 2, 3, 4, 5, 6, 7]
+    ids[position] = template.format(payload=PAYLOAD.format(marker=json.dumps(str(marker))))
+    graph = _graph(*ids)
+    df = candles.head(50)
+    compiled = _run(graph, 'compiled', df, runtime)
+    assert not marker.exists()
+    assert compiled == _run(graph, 'interpreter', df, runtime)
+
+
+def test_non_integer_slots_are_not_compiled(candles, runtime):
+    runtime(candles.head(10))
+    nodes, order, _ = vpl._build_dag(_graph(1, 2, 3, 4, 5, 6, 7), optimize=False)
+    slot, origin, name = nodes[3].input_conn_list[0]
+    nodes[3].input_conn_list[0] = ('0] = 0;x[0', origin, name)
+    with pytest.raises(CodegenUnsupported):
+        compile_bar_loop(order, nodes, vpl.update_orders)
@@ -0,0 +1,31 @@
+"""execute_columnar (vpl/columnar.py)."""
+import pytest
+
+from pve.app.vpl import nodes as vpl
+from pve.app.vpl.columnar import ColumnarUnsupported, execute_columnar
+
+
+def test_unsupported_graph_leaves_nodes_untouched(candles, runtime):
+    """2.0 + 3.0 (a constant node) evaluated, then an add_indicator whose
+    name is wired to the closes, which the columnar pass can't take."""
+    graph = {
+        'nodes': [
+            {'id': 1, 'type': 'set/float', 'properties': {'value': 2.0}, 'outputs': [{'name': 'Float'}]},
+            {'id': 2, 'type': 'set/float', 'properties': {'value': 3.0}, 'outputs': [{'name': 'Float'}]},
+            {'id': 3, 'type': 'math/add_float', 'inputs': [{}, {}], 'outputs': [{'name': 'Float'}]},
+            {'id': 4, 'type': 'get/close', 'outputs': [{'name': 'close'}]},
+            {'id': 5, 'type': 'tools/add_indicator', 'inputs': [{}, {}], 'outputs': [{'name': 'Series'}]},
+        ],
+        'links': [
+            [1, 1, 0, 3, 0, 'float'], [2, 2, 0, 3, 1, 'float'],
+            [3, 3, 0, 5, 0, 'float'], [4, 4, 0, 5, 1, 'float'],
+        ],
+    }
+    runtime(candles.head(100))
+    nodes, order, _ = vpl._build_dag(graph, optimize=False)
+    before = {nid: (list(node.input_values), dict(node.output_values)) for nid, node in nodes.items()}
+
+    with pytest.raises(ColumnarUnsupported):
+        execute_columnar(order, nodes, candles.head(100))
+    assert {nid: (list(node.input_values), dict(node.output_values))
+            for nid, node in nodes.items()} == before
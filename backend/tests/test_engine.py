@@ -0,0 +1,88 @@
+"""
+Every execution path of process_graph against the baseline, the interpreter
+over the graph as drawn (no constant folding, merging or pruning), on the
+template strategies: same orders, same output frame (indicator and signal
+columns included).
+"""
+import pandas as pd
+import pytest
+
+from pve.app.vpl import nodes as vpl
+from pve.app.vpl.graphcache import GraphCache
+from pve.app.vpl.templates import load_templates
+
+TEMPLATES = {t['name']: t for t in load_templates()}
+PATHS = {
+    'interpreter': {},
+    'compiled': {'compiled': True},
+    'columnar': {'columnar': True},
+    'columnar+compiled': {'columnar': True, 'compiled': True},
+}
+WARMUP, LIVE, WINDOW = 1000, 200, 50     # bot flow: history, bars run one by one, frame kept
+
+
+def use_graphs(monkeypatch, optimize=True):
+    """process_graph builds its graphs here, without Redis."""
+    monkeypatch.setattr(vpl, 'graph_cache', GraphCache(
+        lambda graph_json: vpl._compile(vpl._parse_graph_json(graph_json), optimize)))
+
+
+def run(template, df, **kwargs):
+    final_df, _, _, orders, state = vpl.process_graph(
+        template['graph_json'], None, None, template['symbol'], template['timeframe'],
+        warmup_only=False, dataframe=df.copy(), **kwargs)
+    return final_df, orders, state
+
+
+def run_bot(template, df, **warmup):
+    """Warm up on the first WARMUP candles, then one incremental run per new
+    candle over the last WINDOW ones, like a live bot. Returns each run's
+    (final_df, orders as they were after it): the order list itself is the
+    same object in every run."""
+    final_df, orders, state = run(template, df.iloc[:WARMUP], **warmup)
+    runs = [(final_df, [dict(o) for o in orders])]
+    for t in range(WARMUP, WARMUP + LIVE):
+        window = df.iloc[max(0, t - WINDOW):t + 1].reset_index(drop=True)
+        final_df, orders, state = run(template, window, incremental=True, state=state)
+        runs.append((final_df, [dict(o) for o in orders]))
+    return runs
+
+
+@pytest.fixture(scope='module')
+def baselines(candles, instruments_dir):
+    """{template name: (final_df, orders)} of the unoptimized interpreter."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(instruments_dir)
+        use_graphs(mp, optimize=False)
+        results = {}
+        for name, template in TEMPLATES.items():
+            final_df, orders, _ = run(template, candles)
+            results[name] = final_df, orders
+    vpl.Node.instrument_specs = None
+    return results
+
+
+@pytest.mark.parametrize('path', PATHS)
+@pytest.mark.parametrize('name', TEMPLATES)
+def test_path_matches_baseline(name, path, baselines, candles, instruments, monkeypatch):
+    use_graphs(monkeypatch)
+    final_df, orders, _ = run(TEMPLATES[name], candles, **PATHS[path])
+    expected_df, expected_orders = baselines[name]
+    assert orders, "the template should trade on these candles"
+    assert orders == expected_orders
+    pd.testing.assert_frame_equal(final_df, expected_df)
+
+
+@pytest.mark.parametrize('name', TEMPLATES)
+def test_incremental_after_columnar_warmup(name, candles, instruments, monkeypatch):
+    """A bot warmed up column-wise and compiled keeps trading like one
+    warmed up by the plain interpreter."""
+    use_graphs(monkeypatch, optimize=False)
+    expected = run_bot(TEMPLATES[name], candles)
+    use_graphs(monkeypatch)
+    runs = run_bot(TEMPLATES[name], candles, columnar=True, compiled=True)
+    assert len(runs[-1][1]) > len(runs[0][1]), "the template should trade on the live candles"
+
+    for (final_df, orders), (expected_df, expected_orders) in zip(runs, expected):
+        assert orders == expected_orders
+        pd.testing.assert_frame_equal(final_df, expected_df)
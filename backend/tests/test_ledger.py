@@ -0,0 +1,101 @@
+"""PositionLedger (vpl/orderbook.py) against GetPositionNode's old replay of
+every executed order."""
+import random
+
+import pandas as pd
+
+from pve.app.vpl import nodes as vpl
+from pve.app.vpl.orderbook import PositionLedger
+
+BASE = pd.Timestamp('2025-01-01')
+
+
+def replay(orders):
+    """The old GetPositionNode: FIFO over every executed order, oldest first."""
+    executed = sorted((o for o in orders if o.get('status') == 'executed'),
+                      key=lambda o: pd.to_datetime(o.get('time_executed') or o.get('time_created')))
+    unmatched = []
+    for order in executed:
+        remaining, buy = order['quantity'], order['direction'] is True
+        while remaining > 0 and unmatched and unmatched[0]['buy'] is not buy:
+            entry = unmatched[0]
+            if entry['quantity'] > remaining:
+                entry['quantity'] -= remaining
+                remaining = 0
+            else:
+                remaining -= entry['quantity']
+                unmatched.pop(0)
+        if remaining > 0:
+            unmatched.append({'quantity': remaining, 'price': order['price'], 'buy': buy,
+                              'time_created': order['time_created']})
+    net = sum(e['quantity'] if e['buy'] else -e['quantity'] for e in unmatched)
+    avg = sum(e['quantity'] * e['price'] for e in unmatched) / abs(net) if net != 0 else None
+    return avg, net, min((e['time_created'] for e in unmatched), default=None)
+
+
+def executed(quantity, price, direction, created, filled=None):
+    return {'quantity': quantity, 'price': price, 'direction': direction, 'status': 'executed',
+            'time_created': BASE + pd.Timedelta(minutes=created),
+            'time_executed': BASE + pd.Timedelta(minutes=created if filled is None else filled)}
+
+
+def test_matches_the_replay():
+    for trial in range(60):
+        rng = random.Random(trial)
+        orders, ledger = [], PositionLedger()
+        for t in range(150):
+            for _ in range(rng.randint(0, 3)):
+                # direction 1.0 is not `True`: the replay counted it as a sell
+                order = executed(rng.choice([1, 2, 3, 0.5, 1.7]), rng.uniform(90, 110),
+                                 rng.choice([True, False, 1.0]), rng.randint(0, t), t)
+                orders.append(order)
+                ledger.apply(order)
+            if orders and rng.random() < 0.1:
+                order = rng.choice(orders)
+                if order['status'] == 'executed':
+                    order['status'] = 'cancelled'
+                    ledger.forget(order)
+            assert ledger.position() == replay(orders)
+        assert PositionLedger(orders).position() == ledger.position()
+
+
+def test_built_from_records_in_execution_order():
+    late = executed(1, 100.0, True, 0, 10)
+    early = executed(2, 110.0, False, 5, 6)
+    early['time_executed'] = early['time_executed'].isoformat()   # as after _postprocess_orders
+    pending = {**executed(5, 90.0, True, 1), 'status': 'open'}
+
+    ledger = PositionLedger([late, pending, early])
+    assert ledger.applied == [early, late]
+    assert ledger.position() == replay([late, pending, early]) == (110.0, -1, early['time_created'])
+
+
+def test_forgetting_an_unknown_order_changes_nothing():
+    ledger = PositionLedger()
+    order = executed(1, 100.0, True, 0)
+    ledger.apply(order)
+    ledger.forget(executed(1, 100.0, True, 0))
+    assert ledger.applied == [order]
+    assert ledger.position() == (100.0, 1, order['time_created'])
+
+
+def test_lot_times_follow_postprocess_orders():
+    """The position is cached between fills, but the earliest lot's creation
+    time must come out of its record as _postprocess_orders left it."""
+    first, second = executed(1, 100.0, True, 0), executed(2, 106.0, True, 3)
+    first['id'], second['id'] = 'a', 'b'
+    vpl.Node.set_orders([first, second])
+    try:
+        ledger = vpl.Node.ledger
+        assert ledger.position() == (104.0, 3, BASE)
+
+        vpl._postprocess_orders(None)
+        assert first['time_created'] == BASE.isoformat()
+        assert ledger.position() == (104.0, 3, BASE.isoformat())
+
+        third = executed(1, 90.0, False, 4)       # closes the first lot
+        ledger.apply(third)
+        assert ledger.position() == (106.0, 2, second['time_created'])
+        assert ledger.position() == replay([first, second, third])
+    finally:
+        vpl.Node.reset_orders()
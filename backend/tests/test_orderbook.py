@@ -0,0 +1,131 @@
+"""OrderBook (vpl/orderbook.py) against the full scan over every order
+record that update_orders used to do."""
+import random
+
+from pve.app.vpl.orderbook import OrderBook
+
+
+def scan_fill(orders, low, high):
+    """The old update_orders: every open record, in creation order."""
+    filled = []
+    for order in orders:
+        if order.get('status') != 'open':
+            continue
+        direction = order['direction']
+        if order['order_category'] == 'conditional':
+            trigger = order.get('trigger_price')
+            hit = trigger is None or (high >= trigger if direction else low <= trigger)
+        elif order['type'] == 'market':
+            hit = True
+        else:
+            price = order.get('price')
+            hit = price is not None and (low <= price if direction else high >= price)
+        if hit:
+            filled.append(order)
+    return filled
+
+
+def limit(oid, direction, price):
+    return {'id': oid, 'direction': direction, 'order_category': 'normal',
+            'type': 'limit', 'price': price, 'trigger_price': None, 'status': 'open'}
+
+
+def execute(orders):
+    for order in orders:
+        order['status'] = 'executed'
+    return [order['id'] for order in orders]
+
+
+def test_fills_like_a_full_scan():
+    for trial in range(60):
+        rng = random.Random(trial)
+        scanned, booked, book = [], [], OrderBook()
+        for _ in range(200):
+            low = rng.uniform(90, 110)
+            high = low + rng.uniform(0, 5)
+            assert execute(book.fill(low, high)) == execute(scan_fill(scanned, low, high))
+
+            for _ in range(rng.randint(0, 6)):
+                r = rng.random()
+                if r < 0.5:
+                    category = rng.choice(['normal', 'normal', 'conditional'])
+                    order = {
+                        'id': f'o{len(scanned)}', 'direction': rng.choice([True, False]),
+                        'order_category': category,
+                        'type': rng.choice(['limit', 'limit', 'market']) if category == 'normal' else 'market',
+                        'price': rng.choice([round(rng.uniform(85, 115), 1), None]),
+                        'trigger_price': (rng.choice([round(rng.uniform(85, 115), 1), None])
+                                          if category == 'conditional' else None),
+                        'status': 'open',
+                    }
+                    scanned.append(order)
+                    booked.append(dict(order))
+                    book.add(booked[-1])
+                elif scanned:
+                    i = rng.randrange(len(scanned))
+                    if r < 0.7:                    # CancelOrderNode
+                        scanned[i]['status'] = booked[i]['status'] = 'cancelled'
+                        book.remove(booked[i])
+                    elif r < 0.8:                  # status changed behind the book's back
+                        scanned[i]['status'] = booked[i]['status'] = 'error'
+                    elif scanned[i]['status'] == 'open':   # ModifyOrderNode
+                        price = round(rng.uniform(85, 115), 1)
+                        scanned[i]['price'] = booked[i]['price'] = price
+                        book.reprice(booked[i])
+        assert [o['status'] for o in scanned] == [o['status'] for o in booked]
+
+
+def test_cancelling_a_filled_order_is_a_no_op():
+    book = OrderBook()
+    filled, resting = limit('a', True, 100.0), limit('b', True, 95.0)
+    book.add(filled)
+    book.add(resting)
+    assert execute(book.fill(99.0, 101.0)) == ['a']
+
+    filled['status'] = 'cancelled'
+    book.remove(filled)
+    assert len(book) == 1
+    assert book.open_orders() == [resting]
+    assert execute(book.fill(94.0, 96.0)) == ['b']
+    assert book.history == [filled, resting]
+
+
+def test_freed_slot_is_not_removed_through_a_stale_record():
+    """A filled order's slot is reused; removing the old record again must
+    not release the new order sitting in it."""
+    book = OrderBook()
+    old = limit('a', True, 100.0)
+    book.add(old)
+    execute(book.fill(99.0, 101.0))
+    new = limit('b', False, 120.0)
+    book.add(new)
+
+    book.remove(old)
+    assert book.open_orders() == [new]
+    assert execute(book.fill(119.0, 121.0)) == ['b']
+
+
+def test_reprice_fills_at_the_new_price_only():
+    book = OrderBook()
+    order = limit('a', True, 100.0)
+    book.add(order)
+    order['price'] = 90.0
+    book.reprice(order)
+    assert book.fill(99.0, 101.0) == []
+    assert execute(book.fill(89.0, 91.0)) == ['a']
+
+
+def test_compaction_drops_stale_entries():
+    book = OrderBook()
+    orders = [limit(f'o{i}', True, 50.0 + i / 100) for i in range(1000)]
+    for order in orders:
+        book.add(order)
+    for order in orders[:-10]:
+        order['status'] = 'cancelled'
+        book.remove(order)
+    book.add(limit('last', True, 40.0))       # indexing is what triggers the rebuild
+
+    assert sum(len(heap) for heap in book._heaps) <= 2 * len(book) + 64
+    assert len(book) == 11
+    assert execute(book.fill(0.0, 1.0)) == [order['id'] for order in orders[-10:]] + ['last']
+    assert len(book) == 0
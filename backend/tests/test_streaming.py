@@ -0,0 +1,29 @@
+"""The streaming moving averages (vpl/streaming.py, what MANode runs per bar)
+and their column-wise twins (utils.ma_batch) against the reference ma_*
+helpers, fed the growing history the way MANode used to; see
+utils/bench_ma.py for the throughput side."""
+import pandas as pd
+import pytest
+
+from utils.bench_ma import FIXTURE, MA_TYPES, check
+
+WINDOWS = (5, 20, 100)
+BARS = 600          # the reference helpers are quadratic in the history
+RTOL = 1e-8
+
+
+@pytest.fixture(scope='module')
+def series(candles):
+    # the fixture's ticked quiet stretches give flat closes and exact ties
+    return {
+        'synthetic': candles['close'].tolist(),
+        'fixture': pd.read_csv(FIXTURE)['close'].tolist(),
+    }
+
+
+@pytest.mark.parametrize('ma_type', MA_TYPES)
+def test_matches_reference(ma_type, series):
+    for name, prices in series.items():
+        for window in WINDOWS:
+            error = check(ma_type, window, prices, BARS)
+            assert error <= RTOL, f"{ma_type}({window}) on {name}: max rel error {error:.1e}"
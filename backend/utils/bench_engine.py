@@ -0,0 +1,116 @@
+"""
+Bars/sec of the VPL engine on the template strategies.
+
+Runs every template_graphs/*.json graph over the same synthetic candles with
+each execution path and prints the throughput:
+
+    interpreter   execute_stateful over the whole graph
+    compiled      execute_compiled (straight-line bar loop, see vpl/codegen.py)
+    columnar      pure prefix column-wise, compiled loop for the trade suffix
+
+Logging is off unless --log is given: then every record at INFO is
+formatted, as the Celery task's Socket.IO log handler would (minus the emit).
+
+Usage (from backend/):  python -m utils.bench_engine [--bars 10000] [--repeat 3] [--log]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from pve.app.vpl import nodes as vpl
+from pve.app.vpl.columnar import execute_columnar
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'template_graphs')
+
+# used when bybit_instruments_info.json isn't around
+FALLBACK_SPECS = {"min_order_qty": 1.0, "qty_step": 1.0, "min_move": 0.0001}
+
+
+def synthetic_candles(n, seed=0, start=1.0, freq='3min'):
+    """Random-walk OHLCV frame shaped like the output of _prepare_dataframe."""
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.concatenate([[start], close[:-1]])
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.002, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.002, n)))
+    return pd.DataFrame({
+        'date': pd.date_range('2025-01-01', periods=n, freq=freq, tz='UTC'),
+        'open': open_, 'high': high, 'low': low, 'close': close,
+        'volume': rng.uniform(100, 1000, n),
+    })
+
+
+class FormatOnlyHandler(logging.Handler):
+    def emit(self, record):
+        self.format(record)
+
+
+def run_once(graph_dict, df, symbol, path):
+    """Fresh DAG + runtime, then time one full pass of `path`."""
+    vpl.Node.configure_runtime('backtest', None, None)
+    vpl.Node.instrument_specs = None
+    vpl._initialise_node_runtime(df, symbol)
+    if vpl.Node.instrument_specs is None:
+        vpl.Node.instrument_specs = FALLBACK_SPECS
+    nodes, order, prefix = vpl._build_dag(graph_dict)
+
+    t0 = time.perf_counter()
+    if path == 'interpreter':
+        vpl.execute_stateful(order, nodes)
+    elif path == 'compiled':
+        vpl.execute_compiled(order, nodes)
+    else:
+        feeds = execute_columnar(prefix, nodes, df)
+        in_prefix = set(prefix)
+        suffix = [nid for nid in order if nid not in in_prefix]
+        if suffix:
+            vpl.execute_compiled(suffix, nodes, feeds)
+    elapsed = time.perf_counter() - t0
+    return elapsed, len(vpl.Node.orders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bars', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--log', action='store_true', help='format INFO records like a backtest task')
+    args = parser.parse_args()
+
+    if args.log:
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        root.addHandler(FormatOnlyHandler())
+    else:
+        logging.disable(logging.CRITICAL)
+    df = synthetic_candles(args.bars)
+    paths = ('interpreter', 'compiled', 'columnar')
+
+    print(f"{args.bars} bars, best of {args.repeat}")
+    print(f"{'template':<22}" + ''.join(f"{p:>16}" for p in paths) + f"{'orders':>10}")
+    for path_json in sorted(glob.glob(os.path.join(TEMPLATE_DIR, '*.json'))):
+        with open(path_json) as f:
+            template = json.load(f)
+        graph_dict = vpl._parse_graph_json(json.dumps(template['graph']))
+        symbol = template.get('symbol', 'BTCUSDT')
+
+        cells, orders = [], set()
+        for path in paths:
+            best = float('inf')
+            for _ in range(args.repeat):
+                elapsed, n_orders = run_once(graph_dict, df, symbol, path)
+                best = min(best, elapsed)
+                orders.add(n_orders)
+            cells.append(f"{args.bars / best:>12,.0f} b/s")
+        name = os.path.splitext(os.path.basename(path_json))[0]
+        # the paths must agree on the simulated orders
+        print(f"{name:<22}" + ''.join(cells) + f"{'/'.join(map(str, sorted(orders))):>10}")
+
+
+if __name__ == '__main__':
+    main()
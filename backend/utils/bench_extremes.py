@@ -0,0 +1,75 @@
+"""
+Rolling min/max throughput of math/lowest and math/highest.
+
+For each window, runs the same synthetic close column through
+
+    list      the old node body: append, pop(0), min() over the whole window
+    deque     streaming.RollingExtreme (monotonic deque), what the nodes use
+    batch     utils.rolling_extreme_batch, the columnar backtest path
+
+checks that all three agree and prints bars/sec. The list cost grows with
+the window; deque and batch should stay flat.
+
+Usage (from backend/):  python -m utils.bench_extremes [--bars 20000] [--windows 10 100 1000 5000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from pve.app.vpl.streaming import RollingExtreme
+from pve.app.vpl.utils import rolling_extreme_batch
+from utils.bench_engine import synthetic_candles
+
+
+def list_extreme(values, window, kind):
+    pick = min if kind == 'min' else max
+    held, out = [], []
+    for value in values:
+        held.append(value)
+        if len(held) > window:
+            held.pop(0)
+        out.append(pick(held))
+    return out
+
+
+def deque_extreme(values, window, kind):
+    extreme = RollingExtreme(window, kind)
+    return [extreme.update(value) for value in values]
+
+
+def batch_extreme(values, window, kind):
+    return rolling_extreme_batch(values, window, kind)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bars', type=int, default=20000)
+    parser.add_argument('--windows', type=int, nargs='+', default=[10, 50, 200, 500, 1000, 2000, 5000])
+    args = parser.parse_args()
+
+    closes = synthetic_candles(args.bars)['close'].tolist()
+    paths = (('list', list_extreme), ('deque', deque_extreme), ('batch', batch_extreme))
+
+    print(f"{args.bars} bars")
+    print(f"{'window':>8}{'kind':>6}" + ''.join(f"{name:>16}" for name, _ in paths))
+    for window in args.windows:
+        for kind in ('min', 'max'):
+            cells, results = [], []
+            for _, fn in paths:
+                elapsed, out = timed(fn, closes, window, kind)
+                cells.append(f"{args.bars / elapsed:>12,.0f} b/s")
+                results.append(np.asarray(out, dtype=float))
+            if not all(np.array_equal(results[0], other) for other in results[1:]):
+                raise SystemExit(f"window {window} {kind}: paths disagree")
+            print(f"{window:>8}{kind:>6}" + ''.join(cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Parity and throughput of the 24 moving averages behind indicators/ma.
+
+Every ma_type runs over two close series, bench_engine's synthetic random
+walk and the bundled fixture (utils/fixtures/ma_candles.csv: 3-minute
+candles rounded to a 0.0001 tick, with quiet stretches, so flat closes and
+exact ties show up), once per window:
+
+    streaming   streaming.make_ma(...).update per bar, what MANode runs
+    batch       utils.ma_batch over the whole column, the columnar path
+
+Both are checked against the reference ma_* helpers in utils.py, fed the
+growing price history the way MANode used to, over the first --check bars
+(relative tolerance --rtol). The streaming cost per bar is also compared
+between the smallest and the largest window and between the first and the
+second half of the series: a ratio above --growth flags the kernel as growing
+with the window or with the history. The exit status is 1 when a check fails
+or a kernel is flagged.
+
+No DB is needed. To swap the fixture for real candles (needs the app config):
+
+    python -m utils.bench_ma --record BTCUSDT 2025-03-01 2025-03-09
+
+Usage (from backend/):  python -m utils.bench_ma [--windows 5 20 100 500] [--types sma kama ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from pve.app.vpl import utils as ta
+from pve.app.vpl.streaming import make_ma
+from utils.bench_engine import synthetic_candles
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ma_candles.csv')
+
+MA_TYPES = (
+    'sma', 'ema', 'dema', 'tema', 'wma', 'hma', 'rma', 'linreg', 'trima', 'kama',
+    'alma', 'fwma', 'pwma', 'sinwma', 'swma', 'zlma', 'ssf', 'ssf3', 't3', 'vidya',
+    'mcgd', 'smma', 'jma', 'hwma',
+)
+
+
+def reference_ma(ma_type, window, prices):
+    """Per-bar values of the ma_* helpers, driven like the old MANode did."""
+    history, state, out = [], {}, []
+    for price in prices:
+        history.append(price)
+        if ma_type in ('sma', 'wma', 'linreg', 'alma', 'fwma', 'pwma', 'sinwma', 'swma'):
+            value = getattr(ta, f'ma_{ma_type}')(history, window)
+        elif ma_type in ('ema', 'rma', 'mcgd'):
+            value = state['prev'] = getattr(ta, f'ma_{ma_type}')(price, window, state.get('prev'))
+        elif ma_type in ('kama', 'vidya'):
+            value = state['prev'] = getattr(ta, f'ma_{ma_type}')(history, window, state.get('prev'))
+        elif ma_type == 'smma':
+            value = state['prev'] = ta.ma_smma(price, window, state.get('prev'), 'prev' not in state)
+        elif ma_type == 'dema':
+            value, state['e1'], state['e2'] = ta.ma_dema(history, window, state.get('e1'), state.get('e2'))
+        elif ma_type == 'tema':
+            value, state['e1'], state['e2'], state['e3'] = ta.ma_tema(
+                history, window, state.get('e1'), state.get('e2'), state.get('e3'))
+        elif ma_type in ('hma', 'trima', 'zlma', 'ssf', 'ssf3'):
+            value, state['s'] = getattr(ta, f'ma_{ma_type}')(history, window, state.get('s'))
+        elif ma_type in ('t3', 'jma'):
+            value, state['s'] = getattr(ta, f'ma_{ma_type}')(price, window, state.get('s'))
+        elif ma_type == 'hwma':
+            value, state['s'] = ta.ma_hwma(price, state.get('s'))
+        else:
+            raise ValueError(ma_type)
+        out.append(value)
+    return out
+
+
+def max_rel_error(values, reference):
+    """Largest relative difference; a None/NaN on one side only is infinite."""
+    worst = 0.0
+    for a, b in zip(values, reference):
+        a = None if a is None or a != a else a
+        b = None if b is None or b != b else b
+        if a is None or b is None:
+            if a is not b:
+                return float('inf')
+            continue
+        if a != b:
+            worst = max(worst, abs(a - b) / max(abs(b), 1e-12))
+    return worst
+
+
+def time_streaming(ma_type, window, prices, repeat):
+    """Best seconds per bar over the first and the second half of `prices`."""
+    half = len(prices) // 2
+    first = second = float('inf')
+    for _ in range(repeat):
+        ma = make_ma(ma_type, window)
+        update = ma.update
+        t0 = time.perf_counter()
+        for price in prices[:half]:
+            update(price)
+        t1 = time.perf_counter()
+        for price in prices[half:]:
+            update(price)
+        t2 = time.perf_counter()
+        first = min(first, (t1 - t0) / half)
+        second = min(second, (t2 - t1) / (len(prices) - half))
+    return first, second
+
+
+def time_batch(ma_type, window, prices, repeat):
+    column = np.asarray(prices, dtype=float)
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        ta.ma_batch(column, window, ma_type)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def check(ma_type, window, prices, n_check):
+    head = prices[:n_check]
+    reference = reference_ma(ma_type, window, head)
+    ma = make_ma(ma_type, window)
+    streaming = [ma.update(price) for price in head]
+    batch = ta.ma_batch(np.asarray(head, dtype=float), window, ma_type).tolist()
+    return max(max_rel_error(streaming, reference), max_rel_error(batch, reference))
+
+
+def bench_series(name, prices, args):
+    print(f"\n{name}: {len(prices)} bars")
+    print(f"{'ma_type':<8}{'window':>7}{'ns/bar':>10}{'stream b/s':>14}{'batch b/s':>14}{'max rel err':>13}  flags")
+    failures = []
+    for ma_type in args.types:
+        per_bar = {}
+        for window in args.windows:
+            first, second = time_streaming(ma_type, window, prices, args.repeat)
+            per_bar[window] = (first + second) / 2
+            batch = time_batch(ma_type, window, prices, args.repeat)
+            error = check(ma_type, window, prices, args.check)
+
+            flags = []
+            if error > args.rtol:
+                flags.append('MISMATCH')
+            if second > args.growth * first:
+                flags.append(f'history x{second / first:.1f}')
+            if window == args.windows[-1] and len(args.windows) > 1:
+                ratio = per_bar[window] / per_bar[args.windows[0]]
+                if ratio > args.growth:
+                    flags.append(f'window x{ratio:.1f}')
+            if flags:
+                failures.append((name, ma_type, window, flags))
+            print(f"{ma_type:<8}{window:>7}{per_bar[window] * 1e9:>10,.0f}"
+                  f"{1 / per_bar[window]:>14,.0f}{len(prices) / batch:>14,.0f}"
+                  f"{error:>13.1e}  {' '.join(flags)}")
+    return failures
+
+
+def record(symbol, start, end):
+    from pve.app import create_app
+
+    with create_app().app_context():
+        df = ta.fetch_data(symbol, start, end)
+    if df is None or df.empty:
+        raise SystemExit(f"no candles for {symbol} between {start} and {end}")
+    df[['date', 'open', 'high', 'low', 'close', 'volume']].to_csv(FIXTURE, index=False)
+    print(f"wrote {len(df)} candles to {FIXTURE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bars', type=int, default=20000, help='length of the synthetic series')
+    parser.add_argument('--windows', type=int, nargs='+', default=[5, 20, 100, 500])
+    parser.add_argument('--types', nargs='+', default=list(MA_TYPES), choices=MA_TYPES, metavar='MA_TYPE')
+    parser.add_argument('--check', type=int, default=1000, help='bars compared with the reference helpers')
+    parser.add_argument('--rtol', type=float, default=1e-8)
+    parser.add_argument('--growth', type=float, default=3.0, help='cost ratio that flags a kernel')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--record', nargs=3, metavar=('SYMBOL', 'START', 'END'),
+                        help='replace the fixture with candles from the DB and exit')
+    args = parser.parse_args()
+    args.windows = sorted(args.windows)
+
+    if args.record:
+        record(*args.record)
+        return
+
+    series = {
+        'synthetic': synthetic_candles(args.bars)['close'].tolist(),
+        'fixture': pd.read_csv(FIXTURE)['close'].tolist(),
+    }
+    failures = []
+    for name, prices in series.items():
+        failures += bench_series(name, prices, args)
+
+    if failures:
+        print(f"\n{len(failures)} flagged:")
+        for name, ma_type, window, flags in failures:
+            print(f"  {name:<10}{ma_type:<8}{window:>6}  {' '.join(flags)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
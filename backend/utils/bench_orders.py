@@ -0,0 +1,83 @@
+"""
+Order-handling throughput of the VPL engine.
+
+Builds a small grid graph that, on every bar, places a buy limit just under
+the close, polls it with trade/get_order and modifies it, so the run ends with
+one order record per bar. With linear order lookups the cost per bar grows
+with the number of orders; with the id index it stays flat, which shows as a
+constant bars/sec across the bar counts below.
+
+Usage (from backend/):  python -m utils.bench_orders [--bars 2000 5000 10000]
+"""
+import argparse
+import json
+import logging
+import time
+
+from pve.app.vpl import nodes as vpl
+from utils.bench_engine import synthetic_candles, FALLBACK_SPECS
+
+
+def _node(node_id, node_type, outputs, properties=None, n_inputs=0):
+    return {
+        'id': node_id, 'type': node_type,
+        'properties': properties or {},
+        'inputs': [{'name': f'in{i}'} for i in range(n_inputs)],
+        'outputs': [{'name': name} for name in outputs],
+    }
+
+
+def grid_graph():
+    """close*0.99 buy limit every bar + get_order / modify_order on its ID."""
+    nodes = [
+        _node(1, 'get/close', ['close']),
+        _node(2, 'set/float', ['Float'], {'value': 0.99}),
+        _node(3, 'math/multiply_float', ['Float'], n_inputs=2),
+        _node(4, 'set/bool', ['Bool'], {'value': True}),
+        _node(5, 'logic/if', ['True', 'False'], n_inputs=1),
+        _node(6, 'set/float', ['Float'], {'value': 1.0}),
+        _node(7, 'trade/create_order', ['ID', 'Exec'], n_inputs=5),
+        _node(8, 'trade/get_order', ['ID', 'Price', 'Quantity', 'Created', 'Executed?', 'Open?'], n_inputs=1),
+        _node(9, 'set/float', ['Float'], {'value': 0.98}),
+        _node(10, 'math/multiply_float', ['Float'], n_inputs=2),
+        _node(11, 'trade/modify_order', ['ID', 'Exec'], n_inputs=4),
+    ]
+    # [link_id, origin_id, origin_slot, target_id, target_slot, type]
+    links = [
+        [1, 1, 0, 3, 0, 'float'], [2, 2, 0, 3, 1, 'float'],
+        [3, 4, 0, 5, 0, 'bool'],
+        [4, 5, 0, 7, 0, 'exec'], [5, 4, 0, 7, 1, 'bool'], [6, 4, 0, 7, 2, 'bool'],
+        [7, 3, 0, 7, 3, 'float'], [8, 6, 0, 7, 4, 'float'],
+        [9, 7, 0, 8, 0, 'string'],
+        [10, 8, 1, 10, 0, 'float'], [11, 9, 0, 10, 1, 'float'],
+        [12, 7, 1, 11, 0, 'exec'], [13, 7, 0, 11, 1, 'string'], [14, 10, 0, 11, 2, 'float'],
+    ]
+    return {'nodes': nodes, 'links': links}
+
+
+def run_once(graph_dict, df, symbol='BTCUSDT'):
+    vpl.Node.configure_runtime('backtest', None, None)
+    vpl.Node.instrument_specs = FALLBACK_SPECS
+    vpl._initialise_node_runtime(df, symbol)
+    nodes, order, _ = vpl._build_dag(graph_dict)
+
+    t0 = time.perf_counter()
+    vpl.execute_stateful(order, nodes)
+    return time.perf_counter() - t0, len(vpl.Node.orders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bars', type=int, nargs='+', default=[2000, 5000, 10000])
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    graph_dict = vpl._parse_graph_json(json.dumps(grid_graph()))
+    print(f"{'bars':>8}{'orders':>10}{'bars/sec':>14}")
+    for n in args.bars:
+        elapsed, n_orders = run_once(graph_dict, synthetic_candles(n))
+        print(f"{n:>8}{n_orders:>10}{n / elapsed:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
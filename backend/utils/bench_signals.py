@@ -0,0 +1,83 @@
+"""
+Cost of building tools/add_signal columns at the end of a backtest.
+
+Puts --markers signal markers on random bars of a --bars synthetic frame and
+times _add_indicator_and_signal_cols, which matches the fired dates against
+the frame's in one vectorized pass. The old construction scanned the whole
+date column once per marker (O(markers × bars)); it is timed on the first
+--legacy markers only, extrapolated to all of them, and its column is checked
+against the new one on those markers. Exit status is 1 when the vectorized
+build takes longer than --max-seconds.
+
+Usage (from backend/):  python -m utils.bench_signals [--bars 500000] [--markers 50000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from pve.app.vpl import nodes as vpl
+from pve.app.vpl.buffers import SeriesBuffer
+from utils.bench_engine import synthetic_candles
+
+
+def signal_node(dates):
+    node = vpl.AddSignalNode(1, 'tools/add_signal', {'name': 'Entries'}, [], [])
+    node.marker_dates = SeriesBuffer.of(dates, dtype='int64')
+    return node
+
+
+def legacy_column(df, markers, col):
+    """The old per-marker scan over the date column."""
+    series = [None] * len(df)
+    date_col = df['date']
+    for m in markers[-len(df):]:
+        dt = m.get('date')
+        if dt is None:
+            continue
+        idx = date_col[date_col == dt].index
+        for i in idx:
+            series[i] = col
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bars', type=int, default=500_000)
+    parser.add_argument('--markers', type=int, default=50_000)
+    parser.add_argument('--legacy', type=int, default=200, help='markers run through the old scan')
+    parser.add_argument('--max-seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    df = synthetic_candles(args.bars)
+    dates = pd.DatetimeIndex(df['date']).as_unit('ns').asi8
+    rng = np.random.default_rng(0)
+    fired = np.sort(rng.choice(args.bars, size=args.markers, replace=False))
+
+    t0 = time.perf_counter()
+    vpl._add_indicator_and_signal_cols({1: signal_node(dates[fired])}, df)
+    vectorized = time.perf_counter() - t0
+
+    sample = fired[:args.legacy]
+    markers = [{'date': d} for d in df['date'].iloc[sample]]
+    t0 = time.perf_counter()
+    old = legacy_column(df, markers, '$Entries')
+    legacy = (time.perf_counter() - t0) * args.markers / max(len(sample), 1)
+
+    check = df[['date']].copy()
+    vpl._add_indicator_and_signal_cols({1: signal_node(dates[sample])}, check)
+    if check['$Entries'].tolist() != pd.Series(old, dtype=check['$Entries'].dtype).tolist():
+        raise SystemExit("vectorized signal column differs from the per-marker scan")
+
+    print(f"{args.bars} bars, {args.markers} markers")
+    print(f"{'per-marker scan':<18}{legacy:>10.2f} s  (extrapolated from {len(sample)} markers)")
+    print(f"{'vectorized':<18}{vectorized:>10.3f} s  x{legacy / vectorized:,.0f}")
+    if vectorized > args.max_seconds:
+        print(f"vectorized build over --max-seconds {args.max_seconds}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
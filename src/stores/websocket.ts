@@ -76,8 +76,9 @@ export const useWebSocketStore = defineStore('websocket', () => {
     });
 
     socket.value!.on('log_message', (data: any) => {
-      const parsedLog = parseLogMessage(data.message);
-      logs.value.push(parsedLog);
+      // batched as { messages: [...] } by the backtest task, single { message } elsewhere
+      const messages: string[] = data.messages ?? [data.message];
+      logs.value.push(...messages.map(parseLogMessage));
     });
 
     socket.value!.on('update_chart', (response: any) => {